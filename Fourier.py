@@ -1,20 +1,23 @@
 import os
 import sys
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
 
 import numpy as np
 
 from numba import njit
 
-# Теперь импортируем модуль для работы с osc
+import tracing
+from jit_cache import NUMBA_CACHE
+
+# Модуль для работы с osc (Aegis_osc) ищется и в текущем каталоге;
+# импортируется там, где открываются файлы, — для расчёта спектров он не нужен
 module_path = os.path.abspath("./")
 sys.path.append(module_path)
-try:
-    import Aegis_osc
-except ImportError as e:
-    raise "Не удалось импортировать модуль для работы с осциллограммами!"
 
 
-@njit
+@njit(cache=NUMBA_CACHE)
 def fill_dataset_for_nulls(signal: np.ndarray, target_len: int):
     """Добавляет нули в конец NumPy массива до определённой длины."""
     current_len = len(signal)
@@ -24,7 +27,7 @@ def fill_dataset_for_nulls(signal: np.ndarray, target_len: int):
     return signal
 
 
-@njit
+@njit(cache=NUMBA_CACHE)
 def four2(signal: np.ndarray, d: int = -1) -> np.ndarray:
     """
     Реализация алгоритма БПФ на Python на основе кода из книги В.П. Дьяконова.
@@ -99,6 +102,185 @@ def four2(signal: np.ndarray, d: int = -1) -> np.ndarray:
     return signal
 
 
+def four2_size(length: int) -> int:
+    """Размер БПФ, до которого four2 дополняет сигнал длины length."""
+    n = 2
+    while n < 2 * length:
+        n <<= 1
+    return n
+
+
+def _block_magnitude(osc_block: np.ndarray) -> tuple[np.ndarray, int]:
+    """Амплитудные спектры блока [N, L] (первая половина, нулевой отсчёт обнулён) и длина БПФ."""
+    osc_block = np.asarray(osc_block, dtype=np.float64)
+    n = four2_size(osc_block.shape[1])
+    spectr = np.abs(np.fft.rfft(osc_block, n=n, axis=1))[:, : n // 2]
+    spectr[:, 0] = 0
+    return spectr, n
+
+
+def _magnitude_groups(osc_block: np.ndarray, lengths=None):
+    """
+    Амплитудные спектры блока [N, L] группами строк с одинаковой длиной БПФ:
+    (номера строк, спектры [n_rows, n // 2], n). Длина БПФ строки — four2_size(lengths[i])
+    (как у SpectrumEngine для осциллограммы этой длины), без lengths — four2_size(L) для всех строк.
+    """
+    osc_block = np.asarray(osc_block)
+    if lengths is None:
+        spectr, n = _block_magnitude(osc_block)
+        yield np.arange(len(osc_block)), spectr, n
+        return
+    lengths = np.minimum(np.asarray(lengths, dtype=np.int64), osc_block.shape[1])
+    sizes = np.array([four2_size(int(length)) for length in lengths], dtype=np.int64)
+    for n in np.unique(sizes).tolist():
+        rows = np.flatnonzero(sizes == n)
+        # Отсчёты после длины строки — нули, поэтому блок можно обрезать до n
+        group = np.asarray(osc_block[rows, :min(n, osc_block.shape[1])], dtype=np.float64)
+        spectr = np.abs(np.fft.rfft(group, n=n, axis=1))[:, : n // 2]
+        spectr[:, 0] = 0
+        yield rows, spectr, n
+
+
+def dominant_frequencies(osc_block: np.ndarray, freq_khz: np.ndarray, lengths=None) -> np.ndarray:
+    """
+    Доминирующие частоты (кГц) для блока осциллограмм [N, L] — те же,
+    что SpectrumEngine.spectrum показывает для каждой осциллограммы.
+    lengths - длины осциллограмм [N], если в блоке они дополнены нулями
+    """
+    freq_khz = np.broadcast_to(np.asarray(freq_khz, dtype=np.float64), (len(osc_block),))
+    result = np.empty(len(osc_block), dtype=np.float64)
+    for rows, spectr, n in _magnitude_groups(osc_block, lengths):
+        result[rows] = np.argmax(spectr, axis=1) * (freq_khz[rows] / n)
+    return result
+
+
+def spectral_features(osc_block: np.ndarray, freq_khz: np.ndarray, lengths=None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Доминирующие частоты (как dominant_frequencies) и центроиды спектра мощности (кГц)
+    для блока осциллограмм [N, L] по одному БПФ на группу строк одной длины БПФ.
+    lengths - длины осциллограмм [N], если в блоке они дополнены нулями
+    """
+    freq_khz = np.broadcast_to(np.asarray(freq_khz, dtype=np.float64), (len(osc_block),))
+    dominant = np.empty(len(osc_block), dtype=np.float64)
+    centroid = np.empty(len(osc_block), dtype=np.float64)
+    for rows, spectr, n in _magnitude_groups(osc_block, lengths):
+        step = freq_khz[rows] / n
+        power = spectr ** 2
+        total = power.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = (power @ np.arange(spectr.shape[1], dtype=np.float64)) / total * step
+        dominant[rows] = np.argmax(spectr, axis=1) * step
+        centroid[rows] = np.where(total > 0, values, np.nan)
+    return dominant, centroid
+
+
+class SpectrumEngine:
+    """
+    Кэширующий расчёт амплитудных спектров осциллограмм на основе rFFT.
+
+    Результат spectrum() совпадает с тем, что строилось через four2
+    (|FFT| * 2 / n, первая половина отсчётов, нулевой отсчёт обнулён).
+    Оси частот кэшируются по (длина БПФ, частота дискретизации),
+    спектры и доминирующие частоты — в LRU-кэше по ключу (файл, № кадра).
+
+    Спектр для графика и спектр для АЧХ (ach_spectrum) берутся из одного БПФ:
+    если осциллограмма не длиннее fft_size, БПФ считается сразу на fft_size
+    отсчётов, а спектр меньшего размера получается прореживанием
+    (для дополненного нулями сигнала это точные отсчёты того же спектра).
+
+    Методы можно вызывать из нескольких потоков (АЧХ считается в фоновом потоке).
+    """
+
+    def __init__(self, max_entries: int = 512, fft_size: int = 8192):
+        self.max_entries = max_entries
+        self.fft_size = fft_size
+        self._axes: dict[tuple[int, float], np.ndarray] = {}
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.RLock()
+
+    def clear(self) -> None:
+        """Очищает кэш спектров (оси частот сохраняются)."""
+        with self._lock:
+            self._cache.clear()
+
+    def freq_axis(self, n: int, freq_khz: float) -> np.ndarray:
+        """Ось частот в кГц для первой половины спектра БПФ размера n."""
+        key = (n, float(freq_khz))
+        axis = self._axes.get(key)
+        if axis is None:
+            axis = np.arange(n // 2, dtype=np.float64) * (float(freq_khz) / n)
+            axis.setflags(write=False)
+            axis = self._axes.setdefault(key, axis)
+        return axis
+
+    def _entry(self, key: Hashable) -> dict:
+        entry = self._cache.get(key)
+        if entry is None:
+            entry = {"n": 0, "mag": None, "truncated": {}, "display": None}
+            self._cache[key] = entry
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return entry
+
+    def _magnitude(self, entry: dict, signal: np.ndarray, n: int) -> np.ndarray:
+        """|rFFT(signal, n)| (n // 2 + 1 отсчётов) с повторным использованием уже посчитанного БПФ."""
+        length = len(signal)
+        if length > n:
+            # Сигнал обрезается до n отсчётов — прореживание общего БПФ не подходит
+            mag = entry["truncated"].get(n)
+            if mag is None:
+                mag = np.abs(np.fft.rfft(signal, n=n))
+                entry["truncated"][n] = mag
+            return mag
+
+        n_cached = entry["n"]
+        if n_cached < n or n_cached % n != 0:
+            n_cached = n
+            if length <= self.fft_size and self.fft_size > n and self.fft_size % n == 0:
+                n_cached = self.fft_size
+            with tracing.span("rfft", n=n_cached):
+                entry["mag"] = np.abs(np.fft.rfft(signal, n=n_cached))
+            entry["n"] = n_cached
+        return entry["mag"][::n_cached // n]
+
+    def spectrum(self, key: Hashable, signal: np.ndarray,
+                 freq_khz: float = 1000.0) -> tuple[np.ndarray, np.ndarray, float]:
+        """
+        Возвращает спектр осциллограммы для отображения.
+
+        Параметры:
+        key - ключ кэша, например (имя файла, № осциллограммы)
+        signal - осциллограмма
+        freq_khz - частота дискретизации, кГц
+
+        Возвращает:
+        (freq, spectr, dominant) - ось частот в кГц, амплитудный спектр
+        и частота его максимума в кГц
+        """
+        n = four2_size(len(signal))
+        with self._lock:
+            entry = self._entry(key)
+            display = entry["display"]
+            if display is not None and display[0] == (n, float(freq_khz)):
+                return display[1], display[2], display[3]
+
+            spectr = self._magnitude(entry, signal, n)[: n // 2] * (2.0 / n)
+            spectr[0] = 0
+            freq = self.freq_axis(n, freq_khz)
+            dominant = freq[int(np.argmax(spectr))]
+            spectr.setflags(write=False)
+            entry["display"] = ((n, float(freq_khz)), freq, spectr, dominant)
+        return freq, spectr, dominant
+
+    def ach_spectrum(self, key: Hashable, signal: np.ndarray, fft_size: Optional[int] = None) -> np.ndarray:
+        """Амплитудный спектр |FFT(signal, fft_size)|[:fft_size // 2] в том виде, в котором его использует calc_ach."""
+        fft_size = self.fft_size if fft_size is None else fft_size
+        with self._lock:
+            return self._magnitude(self._entry(key), signal, fft_size)[: fft_size // 2]
+
+
 class Fourier:
     @staticmethod
     def __find_closest_power(self, number):
@@ -119,7 +301,7 @@ class Fourier:
         return power
 
     @staticmethod
-    def abs_values_of_spectr(self, file_osc: Aegis_osc.File_osc, num_osc: int) -> tuple[list, list]:
+    def abs_values_of_spectr(self, file_osc: "Aegis_osc.File_osc", num_osc: int) -> tuple[list, list]:
         buf_size_max = max(2048, (1 << (self.__find_closest_power(file_osc.oscDefMod[num_osc].buf_size_max - 1))))
         spectr_buf_size = 1 << (self.__find_closest_power(file_osc.oscDefMod[num_osc].buf_size) - 1)
         # interval = file_osc.oscDefMod[num_osc].freq / 25 * buf_size_max / spectr_buf_size
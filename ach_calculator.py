@@ -10,7 +10,8 @@ import sys
 from typing import Optional
 
 import numpy as np
-from scipy.ndimage import uniform_filter1d
+
+import tracing
 
 
 def _default_config() -> dict:
@@ -25,33 +26,122 @@ def _default_config() -> dict:
         "skip_bins": 300,
         "freq_range": [50, 500],
         "db_range": [10, 70],
+        "method": "fft",
+        "welch_segment": 1024,
+        "welch_overlap": 0.5,
+        "welch_window": "hann",
     }
 
 
+# Методы расчёта амплитудного спектра для АЧХ: "fft" — один БПФ всей осциллограммы,
+# "welch" — усреднение мощности по перекрывающимся сегментам с окном (см. welch_spectra)
+ACH_METHODS = ("fft", "welch")
+WELCH_WINDOWS = {
+    "hann": np.hanning,
+    "hamming": np.hamming,
+    "blackman": np.blackman,
+    "rect": np.ones,
+}
+# Ограничение объёма комплексных спектров, рассчитываемых за один БПФ (метод welch), байт
+WELCH_MAX_BYTES = 64 * 1024 * 1024
+
+
+def default_ach_config_path() -> str:
+    """
+    Путь к ach_config.json рядом с исполняемым файлом:
+    - при запуске .exe — в каталоге exe;
+    - при запуске через Python — в каталоге главного скрипта (sys.argv[0]).
+    """
+    # Каталог исполняемого файла: exe при сборке, иначе — каталог main.py
+    if getattr(sys, "frozen", False):
+        exe_dir = os.path.dirname(os.path.abspath(sys.executable))
+    else:
+        exe_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
+    return os.path.join(exe_dir, "ach_config.json")
+
+
+# Ожидаемые типы параметров: "number" — число, "int" — целое > 0, "range" — пара чисел [мин, макс],
+# "share" — число в [0, 1), "choice" — одно из значений _CONFIG_CHOICES
+_CONFIG_TYPES = {
+    "refGT200": "number",
+    "SGT200": "number",
+    "unitADC": "number",
+    "fD_kHz": "number",
+    "fft_size": "int",
+    "smooth_window": "int",
+    "skip_bins": "int",
+    "freq_range": "range",
+    "db_range": "range",
+    "method": "choice",
+    "welch_segment": "int",
+    "welch_overlap": "share",
+    "welch_window": "choice",
+}
+_CONFIG_CHOICES = {
+    "method": ACH_METHODS,
+    "welch_window": tuple(WELCH_WINDOWS),
+}
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and np.isfinite(value)
+
+
+def validate_ach_config(config: dict) -> dict:
+    """
+    Проверяет типы параметров конфигурации АЧХ.
+
+    Целые параметры (fft_size, smooth_window, skip_bins) приводятся к int,
+    диапазоны (freq_range, db_range) — к списку из двух чисел [мин, макс].
+    Параметры с некорректным значением заменяются значениями по умолчанию.
+    Неизвестные ключи (например, _comment) сохраняются без изменений.
+    """
+    default = _default_config()
+    result = {**default, **config}
+    for key, kind in _CONFIG_TYPES.items():
+        value = result[key]
+        if kind == "number":
+            valid = _is_number(value)
+        elif kind == "int":
+            valid = _is_number(value) and float(value).is_integer() and value >= 0
+            if valid:
+                value = int(value)
+        elif kind == "share":
+            valid = _is_number(value) and 0 <= value < 1
+        elif kind == "choice":
+            valid = value in _CONFIG_CHOICES[key]
+        else:
+            valid = (isinstance(value, (list, tuple)) and len(value) == 2
+                     and all(_is_number(v) for v in value) and value[0] < value[1])
+            if valid:
+                value = [value[0], value[1]]
+        result[key] = value if valid else default[key]
+    if result["fft_size"] < 2:
+        result["fft_size"] = default["fft_size"]
+    if result["welch_segment"] < 2:
+        result["welch_segment"] = default["welch_segment"]
+    return result
+
+
 def load_ach_config(config_path: Optional[str] = None) -> dict:
     """
     Загружает конфигурацию АЧХ из JSON-файла.
 
-    Ищет файл только рядом с исполняемым файлом:
-    - при запуске .exe — в каталоге exe;
-    - при запуске через Python — в каталоге главного скрипта (sys.argv[0]).
+    Ищет файл только рядом с исполняемым файлом (см. default_ach_config_path).
     При отсутствии файла возвращает значения по умолчанию.
+    Типы параметров проверяются validate_ach_config.
 
     Returns:
         dict: Конфигурация с ключами refGT200, SGT200, unitADC, fD_kHz,
-              fft_size, smooth_window, skip_bins, freq_range, db_range.
+              fft_size, smooth_window, skip_bins, freq_range, db_range,
+              method, welch_segment, welch_overlap, welch_window.
     """
     default = _default_config()
 
     if config_path and os.path.isfile(config_path):
         search_paths = [config_path]
     else:
-        # Каталог исполняемого файла: exe при сборке, иначе — каталог main.py
-        if getattr(sys, "frozen", False):
-            exe_dir = os.path.dirname(os.path.abspath(sys.executable))
-        else:
-            exe_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
-        search_paths = [os.path.join(exe_dir, "ach_config.json")]
+        search_paths = [default_ach_config_path()]
 
     for path in search_paths:
         if path and os.path.isfile(path):
@@ -59,41 +149,180 @@ def load_ach_config(config_path: Optional[str] = None) -> dict:
                 with open(path, "r", encoding="utf-8") as f:
                     loaded = json.load(f)
                 # Мержим с дефолтами, чтобы не потерять новые ключи
-                return {**default, **loaded}
+                if isinstance(loaded, dict):
+                    return validate_ach_config(loaded)
             except (json.JSONDecodeError, IOError):
                 pass
 
     return default.copy()
 
 
-def calc_ach(
-    osc_data: np.ndarray,
-    k_mkV: float,
-    freq_khz: float,
+class AchConfigService:
+    """
+    Кэшированная конфигурация АЧХ.
+
+    Файл читается один раз при первом обращении к get(). Повторное чтение
+    выполняется только в refresh() и только если изменилось время модификации
+    файла (refresh() вызывается, например, по сигналу QFileSystemWatcher).
+    """
+
+    def __init__(self, config_path: Optional[str] = None):
+        self.config_path = config_path if config_path else default_ach_config_path()
+        self._config: Optional[dict] = None
+        self._mtime: Optional[float] = None
+
+    def _stat_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.config_path).st_mtime
+        except OSError:
+            return None
+
+    def get(self) -> dict:
+        """Возвращает текущую конфигурацию (без обращения к диску, кроме первого вызова)."""
+        if self._config is None:
+            self._mtime = self._stat_mtime()
+            self._config = load_ach_config(self.config_path)
+        return self._config
+
+    def refresh(self) -> bool:
+        """
+        Перечитывает файл, если он изменился на диске.
+
+        Returns:
+            bool: True, если параметры конфигурации изменились
+        """
+        mtime = self._stat_mtime()
+        if self._config is not None and mtime == self._mtime:
+            return False
+        old = self._config
+        self._mtime = mtime
+        self._config = load_ach_config(self.config_path)
+        return self._config != old
+
+
+def _velocity_offsets_db(freq_unique: np.ndarray, n_bins: int, fft_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Строит оси частот и поправки 20*log10(2*pi*f) для каждой уникальной частоты дискретизации.
+
+    Returns:
+        tuple: (freq_axes[U, n_bins], offsets_db[U, n_bins])
+    """
+    freq_axes = np.arange(n_bins, dtype=np.float64)[None, :] * freq_unique[:, None] / fft_size
+    # f[0]=0 даёт inf в specVel; заменяем нули на f[1] или 1e-10
+    if n_bins > 1:
+        f_safe = np.where(freq_axes > 0, freq_axes, freq_axes[:, 1:2])
+    else:
+        f_safe = np.full_like(freq_axes, 1e-10)
+    offsets_db = 20 * np.log10(2 * np.pi * f_safe)
+    return freq_axes, offsets_db
+
+
+@tracing.traced()
+def welch_spectra(osc_block: np.ndarray, fft_size: int, segment: int = 1024, overlap: float = 0.5,
+                  window: str = "hann", max_bytes: int = WELCH_MAX_BYTES,
+                  lengths: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Амплитудные спектры блока [N, L] методом Уэлча на сетке fft_size: [N, fft_size // 2].
+
+    Осциллограмма делится на сегменты длиной segment с перекрытием overlap
+    (представление sliding_window_view без копирования данных), каждый сегмент
+    умножается на окно и дополняется нулями до fft_size, мощности сегментов
+    усредняются. Результат — корень из средней мощности, делённый на среднее
+    значение окна (для синусоиды — та же амплитуда, что у БПФ без окна).
+    Сегменты обрабатываются группами, чтобы комплексные спектры группы занимали
+    не больше max_bytes — объём памяти не растёт с длиной осциллограммы.
+    Осциллограмма короче segment обрабатывается одним сегментом своей длины.
+
+    lengths - длины осциллограмм [N], если в блоке они дополнены нулями: сегменты
+    строки берутся только внутри [0, lengths[i]), поэтому результат совпадает
+    с расчётом для каждой осциллограммы отдельно
+    """
+    osc_block = np.asarray(osc_block, dtype=np.float64)
+    if osc_block.ndim == 1:
+        osc_block = osc_block[None, :]
+    n_osc, width = osc_block.shape
+    if lengths is None:
+        lengths = np.full(n_osc, width, dtype=np.int64)
+    else:
+        lengths = np.clip(np.asarray(lengths, dtype=np.int64), 1, max(width, 1))
+    # Длина сегмента зависит от длины строки только у строк короче segment
+    seg_lengths = np.minimum(max(1, min(segment, fft_size)), lengths)
+    groups = np.unique(seg_lengths)
+    if len(groups) == 1:
+        return _welch_group(osc_block, lengths, int(groups[0]), fft_size, overlap, window, max_bytes)
+    result = np.empty((n_osc, fft_size // 2), dtype=np.float64)
+    for seg in groups.tolist():
+        rows = np.flatnonzero(seg_lengths == seg)
+        sub = osc_block[rows, :int(lengths[rows].max())]
+        result[rows] = _welch_group(sub, lengths[rows], seg, fft_size, overlap, window, max_bytes)
+    return result
+
+
+def _welch_group(osc_block: np.ndarray, lengths: np.ndarray, segment: int, fft_size: int,
+                 overlap: float, window: str, max_bytes: int) -> np.ndarray:
+    """Спектры Уэлча строк с одинаковой длиной сегмента; у строки i — только сегменты внутри lengths[i]."""
+    n_osc = osc_block.shape[0]
+    n_bins = fft_size // 2
+    hop = max(1, int(round(segment * (1.0 - overlap))))
+    # [N, S, segment] — представление исходного блока, сегменты не копируются
+    segments = np.lib.stride_tricks.sliding_window_view(osc_block, segment, axis=1)[:, ::hop]
+    n_segments = segments.shape[1]
+    # Число сегментов строки, целиком лежащих в её действительных отсчётах
+    counts = (lengths - segment) // hop + 1
+    ragged = bool(np.any(counts < n_segments))
+    window_values = WELCH_WINDOWS.get(window, np.hanning)(segment)
+    if not window_values.any():
+        # Окно из одного отсчёта (hann(1) = 0)
+        window_values = np.ones(segment)
+
+    power = np.zeros((n_osc, n_bins), dtype=np.float64)
+    group = max(1, max_bytes // max(1, n_osc * (fft_size // 2 + 1) * 16))
+    for first in range(0, n_segments, group):
+        spec = np.fft.rfft(segments[:, first:first + group] * window_values, n=fft_size, axis=2)[..., :n_bins]
+        seg_power = spec.real ** 2 + spec.imag ** 2
+        if ragged:
+            inside = (first + np.arange(spec.shape[1]))[None, :] < counts[:, None]
+            power += np.einsum("nsk,ns->nk", seg_power, inside.astype(np.float64))
+        else:
+            power += seg_power.sum(axis=1)
+    return np.sqrt(power / np.maximum(counts, 1)[:, None]) / window_values.mean()
+
+
+@tracing.traced()
+def calc_ach_batch(
+    osc_block: np.ndarray,
+    k_mkV_vec: np.ndarray,
+    freq_vec: np.ndarray,
     config: Optional[dict] = None,
-) -> tuple[np.ndarray, np.ndarray, dict]:
+    spectra: Optional[np.ndarray] = None,
+    lengths: Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
     """
-    Рассчитывает АЧХ по осциллограмме.
+    Рассчитывает АЧХ сразу для блока осциллограмм (векторизованный вариант calc_ach).
 
-    Алгоритм:
-    1. Sref — абсолютная чувствительность: (20*log10(max*k_mkV) - refGT200) + SGT200
-    2. FFT с дополнением до fft_size, берётся амплитудный спектр
-    3. specVel = 20*log10(spec / (2*pi*f)) — переход к спектру скорости
-    4. Сглаживание uniform_filter1d
-    5. ref = Sref / max(specVel[skip_bins:])
-    6. ach_db = specVel * ref
+    Алгоритм тот же, что в calc_ach, но выполняется одним проходом по блоку:
+    один rFFT по оси 1, поправка 1/(2*pi*f) считается один раз на каждую
+    частоту дискретизации, сглаживание — вдоль оси частот.
+    При method="welch" амплитудный спектр — среднее по сегментам (welch_spectra)
+    на той же сетке fft_size, остальные шаги не меняются.
 
     Args:
-        osc_data: Осциллограмма в ед. АЦП (np.ndarray)
-        k_mkV: Коэффициент перевода АЦП -> мкВ для данной осциллограммы
-        freq_khz: Частота дискретизации в кГц
+        osc_block: Блок осциллограмм [N, L] в ед. АЦП (как из getDotsOSC)
+        k_mkV_vec: Коэффициенты АЦП -> мкВ [N] (как из get_K_mkV)
+        freq_vec: Частоты дискретизации в кГц [N] (или одно число для всего блока)
         config: Конфиг (если None — загружается load_ach_config())
+        spectra: Готовые амплитудные спектры |FFT(osc, fft_size)|[:fft_size // 2]
+                 [N, fft_size // 2] (например, из SpectrumEngine); если заданы,
+                 БПФ не выполняется (только для method="fft")
+        lengths: Длины осциллограмм [N], если в блоке они дополнены нулями
+                 (нужны методу welch; для fft дополнение нулями не меняет результат)
 
     Returns:
-        tuple: (freq, ach_db, metadata)
-            - freq: массив частот в кГц
-            - ach_db: значения АЧХ в дБ отн. 1 В/(м/с)
-            - metadata: dict с ключами Sabs (Sref), fmax, ref
+        tuple: (freq, ach_db, Sabs, fmax, ref)
+            - freq: частоты в кГц [N, bins] (при одной частоте дискретизации —
+              представление без копирования одной строки)
+            - ach_db: значения АЧХ в дБ отн. 1 В/(м/с) [N, bins]
+            - Sabs, fmax, ref: метаданные по каждой осциллограмме [N]
     """
     if config is None:
         config = load_ach_config()
@@ -104,47 +333,101 @@ def calc_ach(
     smooth_window = config.get("smooth_window", 50)
     skip_bins = config.get("skip_bins", 300)
 
-    osc_data = np.asarray(osc_data, dtype=np.float64)
+    osc_block = np.asarray(osc_block, dtype=np.float64)
+    if osc_block.ndim == 1:
+        osc_block = osc_block[None, :]
+    n_osc = osc_block.shape[0]
+    k_mkV_vec = np.broadcast_to(np.asarray(k_mkV_vec, dtype=np.float64), (n_osc,))
+    freq_vec = np.broadcast_to(np.asarray(freq_vec, dtype=np.float64), (n_osc,))
 
     # 1. Абсолютная чувствительность ПАЭ
-    max_adc = np.max(np.abs(osc_data))
-    max_uV = max_adc * k_mkV
-    sref = (20 * np.log10(max_uV) - ref_gt200) + s_gt200
+    max_adc = np.max(np.abs(osc_block), axis=1)
+    with np.errstate(divide="ignore"):
+        sref = (20 * np.log10(max_adc * k_mkV_vec) - ref_gt200) + s_gt200
 
-    # 2. FFT, амплитудный спектр (половина — односторонний)
-    spec = np.abs(np.fft.fft(osc_data, n=fft_size))
-    spec = spec[: fft_size // 2]
+    # 2. rFFT, амплитудный спектр (односторонний)
+    n_bins = fft_size // 2
+    if config.get("method", "fft") == "welch":
+        spec = welch_spectra(osc_block, fft_size, config.get("welch_segment", 1024),
+                             config.get("welch_overlap", 0.5), config.get("welch_window", "hann"),
+                             lengths=lengths)
+    elif spectra is None:
+        spec = np.abs(np.fft.rfft(osc_block, n=fft_size, axis=1))[:, :n_bins]
+    else:
+        spec = np.asarray(spectra, dtype=np.float64).reshape(n_osc, n_bins)
 
-    # 3. Частоты и защита от деления на ноль при f=0
-    n = len(spec)
-    f = np.arange(n, dtype=np.float64) * freq_khz / fft_size
-    # f[0]=0 даёт inf в specVel; заменяем нули на f[1] или 1e-10
-    f_safe = np.where(f > 0, f, f[1] if n > 1 else 1e-10)
+    # 3. Частоты и поправки 1/(2*pi*f) — по одной на каждую частоту дискретизации
+    freq_unique, inverse = np.unique(freq_vec, return_inverse=True)
+    freq_axes, offsets_db = _velocity_offsets_db(freq_unique, n_bins, fft_size)
 
     # 4. Спектр скорости (в дБ)
-    spec_vel = 20 * np.log10(spec / (2 * np.pi * f_safe))
+    with np.errstate(divide="ignore"):
+        spec_vel = 20 * np.log10(spec)
+    if len(freq_unique) == 1:
+        spec_vel -= offsets_db[0]
+        freq = np.broadcast_to(freq_axes[0], (n_osc, n_bins))
+    else:
+        spec_vel -= offsets_db[inverse]
+        freq = freq_axes[inverse]
 
     # 5. Сглаживание
     if smooth_window > 1:
-        spec_vel = uniform_filter1d(spec_vel, size=smooth_window, mode="nearest")
+        # scipy.ndimage импортируется при первом расчёте, а не при запуске программы
+        from scipy.ndimage import uniform_filter1d
+        spec_vel = uniform_filter1d(spec_vel, size=smooth_window, axis=1, mode="nearest")
 
     # 6. Нормировка
-    region = spec_vel[skip_bins:]
-    if len(region) == 0:
-        ref = 1.0
-    else:
-        max_spec_vel = np.max(region)
-        if np.isfinite(max_spec_vel) and max_spec_vel > 0:
-            ref = sref / max_spec_vel
-        else:
-            ref = 1.0
+    region = spec_vel[:, skip_bins:]
+    ref = np.ones(n_osc, dtype=np.float64)
+    fmax = np.zeros(n_osc, dtype=np.float64)
+    if region.shape[1] > 0:
+        max_spec_vel = np.max(region, axis=1)
+        valid = np.isfinite(max_spec_vel) & (max_spec_vel > 0)
+        ref[valid] = sref[valid] / max_spec_vel[valid]
+
+        # fmax — частота максимума в области skip_bins:
+        idx_max = np.argmax(region, axis=1) + skip_bins
+        fmax = freq[np.arange(n_osc), idx_max].astype(np.float64)
+
+    ach_db = spec_vel * ref[:, None]
+
+    return freq, ach_db, sref, fmax, ref
+
 
-    ach_db = spec_vel * ref
+@tracing.traced()
+def calc_ach(
+    osc_data: np.ndarray,
+    k_mkV: float,
+    freq_khz: float,
+    config: Optional[dict] = None,
+) -> tuple[np.ndarray, np.ndarray, dict]:
+    """
+    Рассчитывает АЧХ по осциллограмме.
 
-    # fmax — частота максимума в области skip_bins:
-    idx_max = np.argmax(region) + skip_bins
-    fmax = float(f[idx_max]) if idx_max < n else 0.0
+    Алгоритм:
+    1. Sref — абсолютная чувствительность: (20*log10(max*k_mkV) - refGT200) + SGT200
+    2. FFT с дополнением до fft_size, берётся амплитудный спектр
+       (method="welch" — средний по сегментам спектр, см. welch_spectra)
+    3. specVel = 20*log10(spec / (2*pi*f)) — переход к спектру скорости
+    4. Сглаживание uniform_filter1d
+    5. ref = Sref / max(specVel[skip_bins:])
+    6. ach_db = specVel * ref
+
+    Args:
+        osc_data: Осциллограмма в ед. АЦП (np.ndarray)
+        k_mkV: Коэффициент перевода АЦП -> мкВ для данной осциллограммы
+        freq_khz: Частота дискретизации в кГц
+        config: Конфиг (если None — загружается load_ach_config())
 
-    metadata = {"Sabs": sref, "fmax": fmax, "ref": ref}
+    Returns:
+        tuple: (freq, ach_db, metadata)
+            - freq: массив частот в кГц
+            - ach_db: значения АЧХ в дБ отн. 1 В/(м/с)
+            - metadata: dict с ключами Sabs (Sref), fmax, ref
+    """
+    freq, ach_db, sabs, fmax, ref = calc_ach_batch(
+        np.asarray(osc_data, dtype=np.float64)[None, :], k_mkV, freq_khz, config
+    )
+    metadata = {"Sabs": float(sabs[0]), "fmax": float(fmax[0]), "ref": float(ref[0])}
 
-    return f.copy(), ach_db, metadata
+    return freq[0].copy(), ach_db[0], metadata
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Сравнение АЧХ нескольких ПАЭ: по одному .osc файлу на преобразователь.
+
+Файлы открываются и АЧХ рассчитываются в пуле процессов: каждый запрос кадра
+разбивается на задачи по файлам, которые выполняются параллельно, поэтому
+сравнение 10–20 файлов занимает примерно столько же, сколько расчёт одного
+(при достаточном числе ядер). Открытые файлы кэшируются в каждом процессе пула.
+
+Навигация синхронная: для всех файлов рассчитывается кадр с тем же номером,
+что и в основном файле. Пока рассчитывается один кадр, новые запросы
+схлопываются в один — для последнего выбранного кадра.
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+
+
+# Открытые файлы в процессе пула: путь -> источник осциллограмм
+_readers = {}
+
+
+def _reader(osc_path: str, default_freq_khz: float):
+    reader = _readers.get(osc_path)
+    if reader is None:
+        from osc_store import open_osc_reader
+        reader = _readers[osc_path] = open_osc_reader(osc_path, default_freq_khz=default_freq_khz)
+    return reader
+
+
+def load_file(osc_path: str, default_freq_khz: float = 1000) -> int:
+    """Открывает файл в процессе пула; возвращает число осциллограмм."""
+    return _reader(osc_path, default_freq_khz).num_osc
+
+
+def compute_frame_ach(osc_path: str, osc_index: int, config: dict) -> Optional[dict]:
+    """
+    АЧХ осциллограммы osc_index файла osc_path (выполняется в процессе пула).
+
+    Returns:
+        dict: freq, ach — кривая в диапазоне freq_range; Sabs, fmax — метаданные АЧХ;
+        None, если в файле нет осциллограммы с таким номером
+    """
+    from ach_calculator import calc_ach_batch
+
+    reader = _reader(osc_path, config.get("fD_kHz", 1000))
+    if not 0 <= osc_index < reader.num_osc:
+        return None
+    osc_block, k_mkV, freq_vec = reader.read_block(osc_index, osc_index + 1)
+    freq, ach_db, sabs, fmax, _ = calc_ach_batch(
+        osc_block, k_mkV, np.asarray(freq_vec, dtype=np.float64), config,
+        lengths=reader.lengths(osc_index, osc_index + 1),
+    )
+    freq_range = config.get("freq_range", [50, 500])
+    mask = (freq[0] >= freq_range[0]) & (freq[0] <= freq_range[1])
+    return {"freq": np.array(freq[0][mask]), "ach": np.array(ach_db[0][mask]),
+            "Sabs": float(sabs[0]), "fmax": float(fmax[0])}
+
+
+class AchComparison:
+    """
+    Набор файлов для сравнения и пул процессов для расчёта их АЧХ.
+
+    on_loaded(путь, число осциллограмм или None) и on_result(номер кадра, путь, результат или None)
+    вызываются из служебного потока пула — в Qt их нужно передавать через сигналы.
+
+    Параметры:
+    max_workers - число процессов (по умолчанию — число ядер)
+    mp_context - контекст multiprocessing (по умолчанию — стандартный для платформы)
+    """
+
+    def __init__(self, on_loaded: Callable[[str, Optional[int]], None],
+                 on_result: Callable[[int, str, Optional[dict]], None],
+                 max_workers: Optional[int] = None, mp_context=None):
+        self.on_loaded = on_loaded
+        self.on_result = on_result
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.mp_context = mp_context
+        self.paths: list[str] = []
+        self.num_osc: dict[str, int] = {}
+        self._executor = None
+        self._lock = threading.Lock()
+        self._generation = 0
+        # Номер отправленной группы задач (по задаче на файл) и число её незавершённых задач
+        self._batch = 0
+        self._in_flight = 0
+        self._pending = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self.mp_context)
+        return self._executor
+
+    def open(self, paths: list, config: dict) -> None:
+        """Задаёт файлы для сравнения и открывает их параллельно."""
+        with self._lock:
+            self._generation += 1
+            self.paths = list(dict.fromkeys(paths))
+            self.num_osc = {}
+            self._pending = None
+        if not self.paths:
+            return
+        pool = self._pool()
+        default_freq_khz = config.get("fD_kHz", 1000)
+        for path in self.paths:
+            future = pool.submit(load_file, path, default_freq_khz)
+            future.add_done_callback(lambda f, path=path: self._on_loaded(path, f))
+
+    def _on_loaded(self, path: str, future) -> None:
+        num_osc = None if future.cancelled() or future.exception() is not None else future.result()
+        with self._lock:
+            if path not in self.paths:
+                # Набор файлов сменился, пока файл открывался
+                return
+            if num_osc is not None:
+                self.num_osc[path] = num_osc
+        self.on_loaded(path, num_osc)
+
+    def request(self, osc_index: int, config: dict) -> None:
+        """Запрашивает АЧХ кадра osc_index для всех файлов сравнения."""
+        if not self.paths:
+            return
+        with self._lock:
+            self._generation += 1
+            self._pending = (self._generation, osc_index, dict(config), list(self.paths))
+            if self._in_flight:
+                # Запрос будет отправлен, когда завершится расчёт предыдущего кадра
+                return
+        self._submit_pending()
+
+    def _submit_pending(self) -> None:
+        with self._lock:
+            if self._pending is None or self._in_flight:
+                return
+            generation, osc_index, config, paths = self._pending
+            self._pending = None
+            self._batch += 1
+            batch = self._batch
+            self._in_flight = len(paths)
+        pool = self._pool()
+        for path in paths:
+            future = pool.submit(compute_frame_ach, path, osc_index, config)
+            future.add_done_callback(
+                lambda f, path=path: self._on_computed(batch, generation, osc_index, path, f))
+
+    def _on_computed(self, batch: int, generation: int, osc_index: int, path: str, future) -> None:
+        result = None if future.cancelled() or future.exception() is not None else future.result()
+        with self._lock:
+            if batch != self._batch:
+                return
+            self._in_flight -= 1
+            current = generation == self._generation
+            done = self._in_flight == 0
+        if current:
+            self.on_result(osc_index, path, result)
+        if done:
+            self._submit_pending()
+
+    def close(self) -> None:
+        """Останавливает пул процессов (незапущенные задачи отменяются)."""
+        with self._lock:
+            self._generation += 1
+            self.paths = []
+            self._pending = None
+            self._batch += 1
+            self._in_flight = 0
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Статистика АЧХ по всем осциллограммам файла (для паспорта ПАЭ).
+
+Файл обрабатывается блоками, память не зависит от числа кадров:
+  * среднее и дисперсия на каждой частоте считаются точно — блоки объединяются
+    по формулам Чана (параллельный вариант алгоритма Уэлфорда);
+  * перцентили (P5, P50, P95) оцениваются по гистограмме значений на каждой
+    частоте с шагом HIST_STEP_DB; погрешность не больше половины шага.
+
+Кривые всех кадров приводятся к общей оси частот — оси первой осциллограммы
+в диапазоне freq_range (кадры с другой частотой дискретизации интерполируются).
+"""
+
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+from ach_calculator import calc_ach_batch
+
+
+# Диапазон и шаг гистограммы уровней АЧХ, дБ; значения за пределами диапазона
+# попадают в крайние столбцы (перцентили ограничиваются диапазоном, среднее — нет)
+HIST_RANGE_DB = (-150.0, 150.0)
+HIST_STEP_DB = 0.25
+PERCENTILES = (5, 50, 95)
+
+
+def curves_on_axis(freq: np.ndarray, ach_db: np.ndarray, same_axis: np.ndarray,
+                   mask: np.ndarray, axis: np.ndarray) -> np.ndarray:
+    """
+    Приводит кривые АЧХ блока к общей оси частот axis.
+    Строки с той же частотой дискретизации (same_axis) вырезаются маской mask,
+    остальные интерполируются на axis.
+    """
+    curves = np.empty((ach_db.shape[0], len(axis)), dtype=np.float64)
+    curves[same_axis] = ach_db[same_axis][:, mask]
+    for i in np.flatnonzero(~same_axis):
+        curves[i] = np.interp(axis, freq[i], ach_db[i])
+    return curves
+
+
+class AchStats:
+    """
+    Потоковая статистика кривых АЧХ на оси частот freq.
+    Нечисловые значения (-inf при нулевом спектре) не учитываются.
+    """
+
+    def __init__(self, freq: np.ndarray, hist_range=HIST_RANGE_DB, hist_step: float = HIST_STEP_DB):
+        self.freq = np.asarray(freq, dtype=np.float64)
+        n = len(self.freq)
+        self.hist_range = (float(hist_range[0]), float(hist_range[1]))
+        self.hist_step = float(hist_step)
+        self.n_hist = int(round((self.hist_range[1] - self.hist_range[0]) / self.hist_step))
+        # Число кадров, рассчитанных на момент последнего update
+        self.frames = 0
+        self.count = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n, dtype=np.float64)
+        self.m2 = np.zeros(n, dtype=np.float64)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+        self.hist = np.zeros((n, self.n_hist), dtype=np.int32)
+        self._lock = threading.Lock()
+
+    def update(self, curves: np.ndarray) -> None:
+        """Добавляет кривые блока [N, len(freq)]."""
+        curves = np.asarray(curves, dtype=np.float64)
+        finite = np.isfinite(curves)
+        values = np.where(finite, curves, 0.0)
+        count = finite.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, values.sum(axis=0) / count, 0.0)
+        m2 = (np.where(finite, curves - mean, 0.0) ** 2).sum(axis=0)
+        n = len(self.freq)
+        bins = np.clip(((values - self.hist_range[0]) / self.hist_step).astype(np.int64), 0, self.n_hist - 1)
+        flat = (bins + np.arange(n) * self.n_hist)[finite]
+        hist = np.bincount(flat, minlength=n * self.n_hist).reshape(n, self.n_hist)
+        with self._lock:
+            self._combine(count, mean, m2)
+            self.hist += hist.astype(np.int32)
+            self.min = np.minimum(self.min, np.where(finite, curves, np.inf).min(axis=0))
+            self.max = np.maximum(self.max, np.where(finite, curves, -np.inf).max(axis=0))
+            self.frames += len(curves)
+
+    def _combine(self, count: np.ndarray, mean: np.ndarray, m2: np.ndarray) -> None:
+        """Объединение со статистикой (count, mean, m2) другой части данных (формулы Чана)."""
+        total = self.count + count
+        safe_total = np.maximum(total, 1)
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / safe_total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / safe_total
+        self.count = total
+
+    def merge(self, other: "AchStats") -> None:
+        """Добавляет статистику, накопленную по другой части файла (та же ось и гистограмма)."""
+        with self._lock:
+            self._combine(other.count, other.mean, other.m2)
+            self.hist += other.hist
+            self.min = np.minimum(self.min, other.min)
+            self.max = np.maximum(self.max, other.max)
+            self.frames += other.frames
+
+    def _percentiles(self, hist: np.ndarray, count: np.ndarray, q) -> np.ndarray:
+        """Перцентили q по гистограмме (линейная интерполяция внутри столбца)."""
+        cdf = np.cumsum(hist, axis=1, dtype=np.int64)
+        result = np.full((len(q), len(count)), np.nan)
+        rows = np.arange(len(count))
+        for i, p in enumerate(q):
+            target = p / 100.0 * count
+            j = np.minimum((cdf < target[:, None]).sum(axis=1), self.n_hist - 1)
+            before = np.where(j > 0, cdf[rows, np.maximum(j - 1, 0)], 0)
+            inside = hist[rows, j]
+            frac = np.where(inside > 0, (target - before) / np.maximum(inside, 1), 0.5)
+            result[i] = self.hist_range[0] + (j + np.clip(frac, 0.0, 1.0)) * self.hist_step
+        result[:, count == 0] = np.nan
+        return result
+
+    def result(self, percentiles=PERCENTILES) -> dict:
+        """
+        Returns:
+            dict: freq, frames, count, mean, std, min, max и p<q> для каждого q из percentiles
+            (массивы по оси freq; NaN на частотах без данных)
+        """
+        with self._lock:
+            count = self.count.copy()
+            mean = self.mean.copy()
+            m2 = self.m2.copy()
+            hist = self.hist.copy()
+            v_min, v_max = self.min.copy(), self.max.copy()
+            frames = self.frames
+        empty = count == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(m2 / np.maximum(count - 1, 1))
+        result = {
+            "freq": self.freq,
+            "frames": frames,
+            "count": count,
+            "mean": np.where(empty, np.nan, mean),
+            "std": np.where(empty, np.nan, std),
+            "min": np.where(empty, np.nan, v_min),
+            "max": np.where(empty, np.nan, v_max),
+        }
+        for p, values in zip(percentiles, self._percentiles(hist, count, percentiles)):
+            result[f"p{p:g}"] = values
+        return result
+
+
+class AchStatsBuilder(threading.Thread):
+    """
+    Статистика АЧХ всего файла (AchStats в атрибуте stats, создаётся после первого блока).
+    progress(обработано, всего) вызывается после каждого блока. Расчёт выполняется
+    в фоновом потоке (start()) или в текущем (run()).
+    """
+
+    def __init__(self, osc_path: str, config: dict,
+                 progress: Optional[Callable[[int, int], None]] = None, block_size: int = 500,
+                 reader=None):
+        super().__init__(name="ach-stats", daemon=True)
+        self.osc_path = osc_path
+        self.config = dict(config)
+        self.progress = progress
+        self.block_size = block_size
+        self.reader = reader
+        self.stats: Optional[AchStats] = None
+        self.stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def run(self) -> None:
+        reader = self.reader
+        if reader is None:
+            from osc_store import open_osc_reader
+            reader = open_osc_reader(self.osc_path, default_freq_khz=self.config.get("fD_kHz", 1000))
+        freq_range = self.config.get("freq_range", [50, 500])
+        num_osc = reader.num_osc
+        fs_axis = mask = None
+        for start in range(0, num_osc, self.block_size):
+            if self.stop_event.is_set():
+                return
+            end = min(start + self.block_size, num_osc)
+            osc_block, k_mkV, freq_vec = reader.read_block(start, end)
+            freq_vec = np.asarray(freq_vec, dtype=np.float64)
+            freq, ach_db, _, _, _ = calc_ach_batch(osc_block, k_mkV, freq_vec, self.config,
+                                                   lengths=reader.lengths(start, end))
+            if self.stats is None:
+                fs_axis = freq_vec[0]
+                mask = (freq[0] >= freq_range[0]) & (freq[0] <= freq_range[1])
+                self.stats = AchStats(np.array(freq[0][mask]))
+            self.stats.update(curves_on_axis(freq, ach_db, freq_vec == fs_axis, mask, self.stats.freq))
+            if self.progress is not None and not self.stop_event.is_set():
+                self.progress(end, num_osc)
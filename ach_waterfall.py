@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Водопад АЧХ: АЧХ всех осциллограмм файла в виде изображения (номер кадра x частота).
+
+АЧХ каждого кадра приводится к общей сетке из n_bins частот в диапазоне freq_range
+и хранится в float16 (для 10^5 кадров и 256 частот — около 50 МБ).
+Над полным разрешением строится пирамида уровней: на уровне k одна строка —
+среднее по PYRAMID_FACTOR ** k соседним кадрам. Для отображения берётся уровень,
+на котором видимый диапазон кадров занимает не больше max_rows строк, поэтому
+стоимость перерисовки не зависит от числа кадров в файле.
+
+Расчёт выполняется в фоновом потоке (AchWaterfallBuilder) блоками; ещё не
+рассчитанные строки содержат NaN и на изображении прозрачны.
+"""
+
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+from ach_calculator import calc_ach_batch
+from osc_store import open_osc_reader
+
+
+# Во сколько раз уменьшается число строк на каждом следующем уровне пирамиды
+PYRAMID_FACTOR = 4
+# Уровни пирамиды строятся, пока в уровне больше строк, чем MIN_LEVEL_ROWS
+MIN_LEVEL_ROWS = 256
+
+_FLOAT16_MAX = float(np.finfo(np.float16).max)
+
+
+def _interp_rows(x: np.ndarray, y_rows: np.ndarray, x_new: np.ndarray) -> np.ndarray:
+    """Линейная интерполяция строк y_rows[N, len(x)] на сетку x_new (общие веса для всех строк)."""
+    j = np.clip(np.searchsorted(x, x_new), 1, len(x) - 1)
+    x0, x1 = x[j - 1], x[j]
+    w = np.clip((x_new - x0) / np.where(x1 > x0, x1 - x0, 1.0), 0.0, 1.0)
+    return y_rows[:, j - 1] * (1.0 - w) + y_rows[:, j] * w
+
+
+class AchWaterfall:
+    """
+    АЧХ всех кадров на общей сетке частот с пирамидой уровней для отображения.
+
+    Параметры:
+    num_osc - количество осциллограмм
+    freq_range - диапазон частот [f_min, f_max] в кГц
+    n_bins - число частот общей сетки (столбцов изображения)
+    """
+
+    def __init__(self, num_osc: int, freq_range, n_bins: int = 256):
+        self.num_osc = num_osc
+        self.freq_range = (float(freq_range[0]), float(freq_range[1]))
+        self.n_bins = n_bins
+        step = (self.freq_range[1] - self.freq_range[0]) / n_bins
+        # Центры столбцов изображения, кГц
+        self.freq = self.freq_range[0] + (np.arange(n_bins) + 0.5) * step
+        # Число рассчитанных кадров (кадры считаются по порядку)
+        self.done = 0
+        self._lock = threading.Lock()
+
+        self.levels = [np.full((num_osc, n_bins), np.nan, dtype=np.float16)]
+        rows = num_osc
+        while rows > MIN_LEVEL_ROWS:
+            rows = -(-rows // PYRAMID_FACTOR)
+            self.levels.append(np.full((rows, n_bins), np.nan, dtype=np.float16))
+
+    def resample(self, freq: np.ndarray, ach_db: np.ndarray, freq_khz: np.ndarray) -> np.ndarray:
+        """
+        Приводит АЧХ блока (результат calc_ach_batch) к сетке self.freq.
+        Кадры с одинаковой частотой дискретизации интерполируются вместе.
+        """
+        rows = np.empty((ach_db.shape[0], self.n_bins), dtype=np.float32)
+        for fs in np.unique(freq_khz):
+            group = np.flatnonzero(freq_khz == fs)
+            rows[group] = _interp_rows(freq[group[0]], ach_db[group], self.freq)
+        return rows
+
+    def update_rows(self, start: int, rows: np.ndarray) -> None:
+        """Записывает строки кадров [start, start + len(rows)) и пересчитывает затронутые строки пирамиды."""
+        end = start + len(rows)
+        with self._lock:
+            # Значения за пределами диапазона float16 (например, -inf при нулевом спектре) ограничиваются
+            self.levels[0][start:end] = np.clip(rows, -_FLOAT16_MAX, _FLOAT16_MAX)
+            self.done = max(self.done, end)
+            for k in range(1, len(self.levels)):
+                src, dst = self.levels[k - 1], self.levels[k]
+                g0, g1 = start // PYRAMID_FACTOR, -(-end // PYRAMID_FACTOR)
+                block = src[g0 * PYRAMID_FACTOR:min(g1 * PYRAMID_FACTOR, len(src))].astype(np.float32)
+                pad = (g1 - g0) * PYRAMID_FACTOR - len(block)
+                if pad:
+                    block = np.vstack([block, np.full((pad, self.n_bins), np.nan, dtype=np.float32)])
+                block = block.reshape(g1 - g0, PYRAMID_FACTOR, self.n_bins)
+                valid = ~np.isnan(block)
+                count = valid.sum(axis=1)
+                total = np.where(valid, block, 0.0).sum(axis=1)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    dst[g0:g1] = np.where(count > 0, total / count, np.nan)
+                start, end = g0, g1
+
+    def level_for(self, n_frames: int, max_rows: int) -> int:
+        """Уровень пирамиды, на котором n_frames кадров занимают не больше max_rows строк."""
+        level = 0
+        while level + 1 < len(self.levels) and -(-n_frames // PYRAMID_FACTOR ** level) > max_rows:
+            level += 1
+        return level
+
+    def view(self, frame_start: int, frame_end: int, max_rows: int) -> tuple[np.ndarray, int, int]:
+        """
+        Изображение для кадров [frame_start, frame_end) не более чем из max_rows строк.
+
+        Returns:
+            (image[rows, n_bins] float32, первый кадр, кадр после последнего) —
+            границы выровнены по строкам выбранного уровня пирамиды
+        """
+        frame_start = max(0, min(frame_start, self.num_osc))
+        frame_end = max(frame_start, min(frame_end, self.num_osc))
+        level = self.level_for(frame_end - frame_start, max_rows)
+        scale = PYRAMID_FACTOR ** level
+        r0, r1 = frame_start // scale, -(-frame_end // scale)
+        with self._lock:
+            image = self.levels[level][r0:r1].astype(np.float32)
+        return image, r0 * scale, min(r1 * scale, self.num_osc)
+
+
+class AchWaterfallBuilder(threading.Thread):
+    """
+    Фоновый расчёт АЧХ всех кадров файла в AchWaterfall.
+    progress(обработано, всего) вызывается из фонового потока после каждого блока.
+    """
+
+    def __init__(self, osc_path: str, config: dict, waterfall: AchWaterfall,
+                 progress: Optional[Callable[[int, int], None]] = None, block_size: int = 500):
+        super().__init__(name="ach-waterfall", daemon=True)
+        self.osc_path = osc_path
+        self.config = dict(config)
+        self.waterfall = waterfall
+        self.progress = progress
+        self.block_size = block_size
+        self.stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def run(self) -> None:
+        try:
+            reader = open_osc_reader(self.osc_path, default_freq_khz=self.config.get("fD_kHz", 1000))
+        except Exception:
+            return
+        num_osc = min(reader.num_osc, self.waterfall.num_osc)
+        for start in range(0, num_osc, self.block_size):
+            if self.stop_event.is_set():
+                return
+            end = min(start + self.block_size, num_osc)
+            osc_block, k_mkV, freq_vec = reader.read_block(start, end)
+            freq_vec = np.asarray(freq_vec, dtype=np.float64)
+            freq, ach_db, _, _, _ = calc_ach_batch(osc_block, k_mkV, freq_vec, self.config,
+                                                   lengths=reader.lengths(start, end))
+            self.waterfall.update_rows(start, self.waterfall.resample(freq, ach_db, freq_vec))
+            if self.progress is not None and not self.stop_event.is_set():
+                self.progress(end, num_osc)
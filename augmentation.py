@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Аугментация осциллограмм блоками (для обучения).
+
+    out, params = augment_block(block, rng, shift=(5, 50), scale=(0.8, 1.2), snr_db=(20, 40), flip=0.5)
+    augment_dataset("dataset_dir", "augmented_dir", copies=10, seed=0, shift=(5, 50), snr_db=(20, 40))
+
+Преобразования (применяются в этом порядке, параметры случайны для каждой строки):
+  * сдвиг по времени вправо на shift отсчётов — циклический (shift_mode="cycle")
+    или с заполнением начала нулями (shift_mode="zero");
+  * умножение на коэффициент из диапазона scale;
+  * смена полярности с вероятностью flip;
+  * аддитивный нормальный шум с отношением сигнал/шум из диапазона snr_db, дБ
+    (мощность сигнала — средний квадрат отсчётов строки).
+
+Сдвиги выполняются одной выборкой по индексам для всего блока (без np.roll по кадрам).
+augment_dataset читает датасет build_dataset блоками и пишет результат на диск
+блоками: объём памяти не зависит от числа копий.
+"""
+
+import os
+import tempfile
+from typing import Callable, Optional
+
+import numpy as np
+
+
+SHIFT_MODES = ("cycle", "zero")
+DEFAULT_BLOCK_SIZE = 500
+
+
+def shift_block(block: np.ndarray, shifts: np.ndarray, mode: str = "cycle",
+                lengths: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Сдвиг каждой строки block[i] на shifts[i] отсчётов вправо.
+
+    mode - "cycle" (как np.roll) или "zero" (освободившееся начало заполняется нулями)
+    lengths - длины строк: сдвигаются только первые lengths[i] отсчётов, остальные не меняются
+    """
+    if mode not in SHIFT_MODES:
+        raise ValueError(f"Неизвестный режим сдвига: {mode} (ожидается один из {', '.join(SHIFT_MODES)})")
+    n, width = block.shape
+    cols = np.arange(width)[None, :]
+    shifts = np.asarray(shifts, dtype=np.int64)[:, None]
+    if lengths is None:
+        lengths = np.full((n, 1), width, dtype=np.int64)
+    else:
+        lengths = np.clip(np.asarray(lengths, dtype=np.int64), 1, width)[:, None]
+    inside = cols < lengths
+    gather = np.where(inside, (cols - shifts) % lengths, cols)
+    result = np.take_along_axis(block, gather, axis=1)
+    if mode == "zero":
+        result[inside & (cols < shifts)] = 0
+    return result
+
+
+def _uniform(rng: np.random.Generator, bounds, n: int) -> np.ndarray:
+    """Случайные значения из [bounds[0], bounds[1]] (или число bounds для всех строк)."""
+    if np.ndim(bounds) == 0:
+        return np.full(n, float(bounds))
+    return rng.uniform(float(bounds[0]), float(bounds[1]), size=n)
+
+
+def augment_block(block: np.ndarray, rng: np.random.Generator, shift=None, shift_mode: str = "cycle",
+                  scale=None, snr_db=None, flip: float = 0.0, lengths: Optional[np.ndarray] = None,
+                  out: Optional[np.ndarray] = None) -> tuple[np.ndarray, dict]:
+    """
+    Аугментирует строки блока [N, L]. Преобразование не применяется, если его параметр None (flip — 0).
+
+    shift - (min, max) сдвига, отсчётов (целые, включительно) или одно число
+    scale - (min, max) коэффициента усиления или одно число
+    snr_db - (min, max) отношения сигнал/шум, дБ, или одно число
+    flip - вероятность смены полярности
+    lengths - длины строк (остальные отсчёты — дополнение): учитываются в сдвиге и мощности сигнала
+    out - матрица результата [N, L] (по умолчанию создаётся float64)
+
+    Returns:
+        (out, параметры по строкам: shift, gain (коэффициент с учётом полярности), snr_db — NaN без шума)
+    """
+    block = np.asarray(block)
+    n, width = block.shape
+    if out is None:
+        out = np.empty((n, width), dtype=np.float64)
+    params = {"shift": np.zeros(n, dtype=np.int32), "gain": np.ones(n, dtype=np.float32),
+              "snr_db": np.full(n, np.nan, dtype=np.float32)}
+
+    if shift is not None:
+        if np.ndim(shift) == 0:
+            shifts = np.full(n, int(shift), dtype=np.int64)
+        else:
+            shifts = rng.integers(int(shift[0]), int(shift[1]) + 1, size=n)
+        params["shift"][:] = shifts
+        result = shift_block(block, shifts, shift_mode, lengths).astype(np.float64, copy=False)
+    else:
+        result = block.astype(np.float64)
+
+    gain = _uniform(rng, scale, n) if scale is not None else np.ones(n)
+    if flip > 0:
+        gain = np.where(rng.random(n) < flip, -gain, gain)
+    if scale is not None or flip > 0:
+        params["gain"][:] = gain
+        result *= gain[:, None]
+
+    if snr_db is not None:
+        snr = _uniform(rng, snr_db, n)
+        params["snr_db"][:] = snr
+        if lengths is None:
+            power = np.mean(result ** 2, axis=1)
+        else:
+            valid = np.clip(np.asarray(lengths, dtype=np.int64), 1, width)
+            power = np.where(np.arange(width)[None, :] < valid[:, None], result, 0.0)
+            power = (power ** 2).sum(axis=1) / valid
+        noise = rng.standard_normal((n, width))
+        noise *= np.sqrt(power / 10.0 ** (snr / 10.0))[:, None]
+        result += noise
+
+    out[:] = result
+    return out, params
+
+
+def augment_dataset(
+    path: str,
+    out_path: str,
+    copies: int = 10,
+    seed: Optional[int] = None,
+    keep_original: bool = True,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    progress: Optional[Callable[[int, int], None]] = None,
+    **transforms,
+) -> dict:
+    """
+    Аугментированный корпус из датасета build_dataset (path — .npz или каталог .npy).
+
+    copies - число аугментированных копий каждой строки
+    keep_original - первые строки результата — исходные строки без изменений
+    transforms - параметры augment_block (shift, shift_mode, scale, snr_db, flip)
+    progress(записано строк, всего)
+
+    Строки результата: [исходные], копия 1 всех строк, копия 2, ... Сохраняются X, все
+    массивы строк исходного датасета (augmented — True у копий), origin (номер исходной
+    строки), shift, gain, snr_db и classes/files. Одинаковые seed и block_size — одинаковый результат.
+
+    Returns:
+        dict: rows (строк в исходном датасете), out_rows (строк в результате)
+    """
+    from dataset_builder import ROW_FIELDS, _NpyDirWriter, _NpzFileWriter, load_dataset
+
+    data = load_dataset(path)
+    X_in = data["X"]
+    n, width = X_in.shape
+    first_copy = 1 if keep_original else 0
+    out_rows = n * (copies + first_copy)
+    rng = np.random.default_rng(seed)
+    lengths_all = np.minimum(data["length"], width) if "length" in data else None
+
+    origin = np.tile(np.arange(n, dtype=np.int64), copies + first_copy)
+    params = {"shift": np.zeros(out_rows, dtype=np.int32), "gain": np.ones(out_rows, dtype=np.float32),
+              "snr_db": np.full(out_rows, np.nan, dtype=np.float32)}
+    out_is_npz = out_path.lower().endswith(".npz")
+    tmp_root = os.path.dirname(os.path.abspath(out_path))
+    with tempfile.TemporaryDirectory(dir=tmp_root) as tmp_dir:
+        writer = _NpzFileWriter(out_path, tmp_dir) if out_is_npz else _NpyDirWriter(out_path)
+        X = writer.array("X", X_in.dtype, (out_rows, width))
+        for start in range(0, out_rows, block_size):
+            end = min(start + block_size, out_rows)
+            rows = origin[start:end]
+            block = X_in[rows]
+            copy = np.arange(start, end) // n >= first_copy
+            if copy.any():
+                lengths = lengths_all[rows[copy]] if lengths_all is not None else None
+                block[copy], block_params = augment_block(block[copy], rng, lengths=lengths, **transforms)
+                for name, values in block_params.items():
+                    params[name][start:end][copy] = values
+            X[start:end] = block
+            if progress is not None:
+                progress(end, out_rows)
+        X.flush()
+        del X
+
+        for name, dtype_field in ROW_FIELDS.items():
+            if name in data:
+                values = np.asarray(data[name])[origin].astype(dtype_field)
+                if name == "augmented":
+                    values |= np.arange(out_rows) >= n * first_copy
+                writer.save(name, values)
+        writer.save("origin", origin)
+        for name, values in params.items():
+            writer.save(name, values)
+        for name in ("classes", "files"):
+            if name in data:
+                writer.save(name, np.asarray(data[name]))
+        writer.close()
+    return {"rows": n, "out_rows": out_rows}
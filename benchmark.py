@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+"""
+Замеры производительности основных вычислений на синтетических осциллограммах.
+
+Вместо Aegis_osc.pyd используется fake_osc (сигналы, похожие на акустическую эмиссию),
+поэтому замеры можно запускать на любой системе:
+    python benchmark.py --frames 2000 --length 4096 --out bench.json
+    python benchmark.py --only fft,ach --repeat 50
+    python benchmark.py --out new.json --compare old.json
+    python benchmark.py --only startup
+
+Замер startup запускает программу в отдельных процессах (импорт модулей, прогрев numba
+и кэш компиляции должны начинаться с нуля) и измеряет время до показа окна,
+до первого кадра и до первой АЧХ.
+
+Для каждого замера выводятся задержки одного вызова (среднее, медиана, p95, p99, максимум, мс),
+производительность в кадрах в секунду и пиковый объём выделенной памяти (tracemalloc, МБ).
+Результат записывается в JSON, чтобы сравнивать версии между собой.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+import numpy as np
+
+import fake_osc
+
+
+BENCHMARKS = ("fft", "ach", "db", "padding", "features", "navigation", "startup")
+
+# Число запусков программы в замере startup
+STARTUP_RUNS = 3
+# Пауза между показом окна и открытием файла (пользователь выбирает файл), с
+STARTUP_IDLE_S = 2.0
+
+
+def measure(func: Callable[[int], None], repeat: int, items: int = 1, warmup: int = 1) -> dict:
+    """
+    Замер функции func(i), i = 0..repeat-1 (номер вызова, например номер кадра).
+
+    items - сколько кадров обрабатывается за один вызов (для кадр/с)
+    warmup - число вызовов до замера (компиляция numba, заполнение кэшей)
+    """
+    for i in range(warmup):
+        func(i)
+    latencies = np.empty(repeat, dtype=np.float64)
+    for i in range(repeat):
+        t_start = time.perf_counter()
+        func(i)
+        latencies[i] = time.perf_counter() - t_start
+
+    # Память замеряется отдельным вызовом: tracemalloc замедляет выполнение
+    tracemalloc.start()
+    func(0)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ms = latencies * 1000
+    total = latencies.sum()
+    return {
+        "calls": repeat,
+        "items_per_call": items,
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+        "frames_per_s": float(repeat * items / total) if total > 0 else 0.0,
+        "peak_mem_mb": peak / 2 ** 20,
+    }
+
+
+class Inputs:
+    """Синтетические осциллограммы для замеров."""
+
+    def __init__(self, frames: int, length: int, block_size: int, seed: int):
+        self.osc_file = fake_osc.FakeFileOsc(num_osc=frames, length=length, seed=seed)
+        self.frames = frames
+        self.length = length
+        self.seed = seed
+        self.block_size = min(block_size, frames)
+        self.block = np.asarray(self.osc_file.getDotsOSC(0, self.block_size), dtype=np.float64)
+        self.k_mkV = np.asarray(self.osc_file.get_K_mkV(0, self.block_size), dtype=np.float64)
+        self.freq_khz = np.full(self.block_size, self.osc_file.freq_khz)
+
+    def frame(self, i: int) -> np.ndarray:
+        return self.block[i % self.block_size]
+
+
+def bench_fft(inputs: Inputs, repeat: int) -> dict:
+    import scipy.fft
+    from Fourier import four2, four2_size
+
+    n = four2_size(inputs.length)
+
+    return {
+        # four2 сам дополняет сигнал до four2_size и меняет его, поэтому передаётся копия
+        "four2": measure(lambda i: four2(inputs.frame(i).astype(np.float64)), repeat),
+        "numpy_fft": measure(lambda i: np.fft.fft(inputs.frame(i), n=n), repeat),
+        "numpy_rfft": measure(lambda i: np.fft.rfft(inputs.frame(i), n=n), repeat),
+        "scipy_rfft": measure(lambda i: scipy.fft.rfft(inputs.frame(i), n=n), repeat),
+        "numpy_rfft_block": measure(lambda i: np.fft.rfft(inputs.block, n=n, axis=1),
+                                    max(1, repeat // 10), items=inputs.block_size),
+    }
+
+
+def bench_ach(inputs: Inputs, repeat: int) -> dict:
+    from ach_calculator import calc_ach, calc_ach_batch, load_ach_config
+
+    config = load_ach_config()
+    welch_config = dict(config, method="welch")
+    fs = float(inputs.freq_khz[0])
+    return {
+        "calc_ach": measure(lambda i: calc_ach(inputs.frame(i), inputs.k_mkV[i % inputs.block_size], fs, config),
+                            repeat),
+        "calc_ach_batch": measure(lambda i: calc_ach_batch(inputs.block, inputs.k_mkV, inputs.freq_khz, config),
+                                  max(1, repeat // 10), items=inputs.block_size),
+        "calc_ach_batch_welch": measure(lambda i: calc_ach_batch(inputs.block, inputs.k_mkV, inputs.freq_khz,
+                                                                 welch_config),
+                                        max(1, repeat // 10), items=inputs.block_size),
+    }
+
+
+def bench_db(inputs: Inputs, repeat: int) -> dict:
+    from work_with_osc import frame_metrics, get_dB_block, get_dB_osc
+
+    # set_K_mkV_and_dB заменён на get_dB_block (дБ блока) и frame_metrics (все метрики за один проход)
+    block_repeat = max(1, repeat // 10)
+    return {
+        "get_dB_osc": measure(lambda i: get_dB_osc(inputs.frame(i), inputs.k_mkV[i % inputs.block_size]), repeat),
+        "get_dB_block": measure(lambda i: get_dB_block(inputs.block, inputs.k_mkV), block_repeat,
+                                items=inputs.block_size),
+        "frame_metrics": measure(lambda i: frame_metrics(inputs.block, inputs.k_mkV, inputs.freq_khz),
+                                 block_repeat, items=inputs.block_size),
+    }
+
+
+def bench_padding(inputs: Inputs, repeat: int) -> dict:
+    from padding import PAD_MODES, pad_block
+    from work_with_osc import DataOsc
+
+    target_len = inputs.length * 2
+    block_repeat = max(1, repeat // 10)
+    out = np.empty((inputs.block_size, target_len), dtype=np.float32)
+    result = {
+        "fill_dataset_for_normal_rule_fft": measure(
+            lambda i: DataOsc.fill_dataset_for_normal_rule_fft(list(inputs.frame(i)), target_len), repeat),
+    }
+    # Дополнение блока целиком в заранее выделенную матрицу (как при построении датасета)
+    for mode in PAD_MODES:
+        result[f"pad_block_{mode}"] = measure(
+            lambda i, mode=mode: pad_block(inputs.block, target_len, mode, out=out, seed=i),
+            block_repeat, items=inputs.block_size)
+    return result
+
+
+def bench_features(inputs: Inputs, repeat: int) -> dict:
+    from work_with_osc import DataOsc
+
+    return {
+        "get_math_features": measure(lambda i: DataOsc.get_math_features(inputs.frame(i)), repeat),
+    }
+
+
+def bench_navigation(inputs: Inputs, repeat: int) -> dict:
+    """Обработчики навигации seeOSC (Qt без окна, QT_QPA_PLATFORM=offscreen)."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt5 import QtWidgets
+    except ImportError as e:
+        return {"skipped": f"PyQt5 недоступен: {e}"}
+    import main
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Файл нужен только для подписи индекса и хранилища; данные генерирует fake_osc
+        osc_path = os.path.join(tmp_dir, "bench.osc")
+        with open(osc_path, "wb") as f:
+            f.write(b"\0" * 4096)
+        window = main.App()
+        menu = window.menu
+        menu._open_osc(osc_path)
+        app.processEvents()
+        # Первые шаги (компиляция numba, создание кривых) в замер не входят
+        warmup = 2
+        steps = max(1, min(repeat, menu.num_osc - 1 - warmup))
+
+        def step_next(i):
+            menu.open_next_osc()
+            app.processEvents()
+
+        def step_prev(i):
+            menu.open_prev_osc()
+            app.processEvents()
+
+        rng = np.random.default_rng(0)
+        targets = rng.integers(0, menu.num_osc, size=steps + warmup)
+
+        def step_goto(i):
+            menu.edit_osc_num.setText(str(targets[i] + 1))
+            menu._goto_osc_by_edit()
+            app.processEvents()
+
+        results = {
+            "open_next_osc": measure(step_next, steps, warmup=warmup),
+            "open_prev_osc": measure(step_prev, steps, warmup=warmup),
+            "goto_osc": measure(step_goto, max(1, steps // 4), warmup=warmup),
+        }
+        # Дожидаемся последних расчётов АЧХ в фоне
+        deadline = time.perf_counter() + 5
+        while ((menu._ach_running or menu._ach_pending is not None)
+               and time.perf_counter() < deadline):
+            app.processEvents()
+            time.sleep(0.005)
+        results["ach_latency_ms"] = menu.ach_latency_stats()
+        results["stages_ms"] = menu.frame_timings.summary()
+        if menu.frame_cache is not None:
+            menu.frame_cache.close()
+        window.close()
+    return results
+
+
+def startup_child(frames: int, length: int, seed: int, idle: float) -> dict:
+    """Один запуск программы (выполняется в отдельном процессе): время этапов от начала импорта, мс."""
+    t_start = time.perf_counter()
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    fake_osc.install(num_osc=frames, length=length, seed=seed)
+    from PyQt5 import QtWidgets
+    import main
+
+    result = {"import_ms": (time.perf_counter() - t_start) * 1000}
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    window = main.App()
+    window.show()
+    app.processEvents()
+    result["window_ms"] = (time.perf_counter() - t_start) * 1000
+
+    deadline = time.perf_counter() + idle
+    while time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        osc_path = os.path.join(tmp_dir, "bench.osc")
+        with open(osc_path, "wb") as f:
+            f.write(b"\0" * 4096)
+        menu = window.menu
+        t_open = time.perf_counter()
+        menu._open_osc(osc_path)
+        app.processEvents()
+        result["first_frame_ms"] = (time.perf_counter() - t_open) * 1000
+        deadline = time.perf_counter() + 30
+        while not menu.ach_latency_ms and time.perf_counter() < deadline:
+            app.processEvents()
+            time.sleep(0.002)
+        if menu.ach_latency_ms:
+            result["first_ach_ms"] = (time.perf_counter() - t_open) * 1000
+        if menu.frame_cache is not None:
+            menu.frame_cache.close()
+        window.close()
+    return result
+
+
+def bench_startup(inputs: Inputs, repeat: int) -> dict:
+    """
+    Холодный запуск: время до окна, до первого кадра и до первой АЧХ (отдельные процессы).
+    Первый файл открывается сразу после показа окна (idle_0) и через STARTUP_IDLE_S секунд
+    (время, за которое фоновый прогрев numba успевает завершиться).
+    Первый запуск может включать компиляцию numba (если кэш на диске ещё пуст).
+    """
+    results = {}
+    for idle in (0.0, STARTUP_IDLE_S):
+        runs = []
+        for _ in range(STARTUP_RUNS):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--startup-child", str(idle),
+                 "--frames", str(inputs.frames), "--length", str(inputs.length), "--seed", str(inputs.seed)],
+                capture_output=True, text=True, timeout=300,
+            )
+            if out.returncode != 0:
+                return {"skipped": out.stderr.strip().splitlines()[-1:] or out.returncode}
+            runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        results[f"idle_{idle:g}s"] = {
+            "runs": runs,
+            "median_ms": {name: float(np.median([r[name] for r in runs if name in r]))
+                          for name in runs[0]},
+        }
+    return results
+
+
+def run(benchmarks, frames: int, length: int, repeat: int, block_size: int, seed: int) -> dict:
+    fake_osc.install(num_osc=frames, length=length, seed=seed)
+    inputs = Inputs(frames, length, block_size, seed)
+    results = {}
+    for name in benchmarks:
+        print(f"{name}...", file=sys.stderr, flush=True)
+        results[name] = globals()[f"bench_{name}"](inputs, repeat)
+    return {"meta": _meta(frames, length, repeat, block_size), "results": results}
+
+
+def _meta(frames: int, length: int, repeat: int, block_size: int) -> dict:
+    import numba
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "numba": numba.__version__,
+        "cpu_count": os.cpu_count(),
+        "frames": frames,
+        "length": length,
+        "repeat": repeat,
+        "block_size": block_size,
+    }
+
+
+def _flatten(results: dict, prefix: str = "") -> dict:
+    """{"ach/calc_ach": {...}, ...} — замеры со статистикой задержек."""
+    flat = {}
+    for name, value in results.items():
+        if isinstance(value, dict) and "p50_ms" in value:
+            flat[prefix + name] = value
+        elif isinstance(value, dict):
+            flat.update(_flatten(value, prefix + name + "/"))
+    return flat
+
+
+def compare(new: dict, old: dict, threshold: float = 0.1) -> list:
+    """Строки сравнения медианы задержки и кадр/с; "!" — ухудшение больше threshold."""
+    new_flat, old_flat = _flatten(new["results"]), _flatten(old["results"])
+    lines = []
+    for name, stats in new_flat.items():
+        base = old_flat.get(name)
+        if base is None or not base["p50_ms"]:
+            continue
+        ratio = stats["p50_ms"] / base["p50_ms"]
+        mark = "!" if ratio > 1 + threshold else " "
+        lines.append(f"{mark} {name:45s} p50 {base['p50_ms']:9.3f} -> {stats['p50_ms']:9.3f} мс "
+                     f"(x{ratio:.2f}), {stats['frames_per_s']:.1f} кадр/с")
+    return lines
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Замеры производительности на синтетических осциллограммах")
+    parser.add_argument("--frames", type=int, default=2000, help="Число осциллограмм в синтетическом файле")
+    parser.add_argument("--length", type=int, default=4096, help="Длина осциллограммы, отсчётов")
+    parser.add_argument("--repeat", type=int, default=200, help="Число вызовов в замере")
+    parser.add_argument("--block", type=int, default=500, help="Размер блока для пакетных функций")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", default=",".join(BENCHMARKS),
+                        help=f"Замеры через запятую: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--out", default=None, help="Файл результата .json (по умолчанию — вывод в консоль)")
+    parser.add_argument("--compare", default=None, help="Предыдущий результат .json для сравнения")
+    parser.add_argument("--startup-child", type=float, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.startup_child is not None:
+        print(json.dumps(startup_child(args.frames, args.length, args.seed, args.startup_child)))
+        return 0
+
+    benchmarks = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Неизвестные замеры: {', '.join(sorted(unknown))}")
+
+    report = run(benchmarks, args.frames, args.length, args.repeat, args.block, args.seed)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            old = json.load(f)
+        print("\n".join(compare(report, old)), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Построение датасета осциллограмм для обучения (замена списочного DataOsc.create_datasets_with_osc).
+
+    summary = build_dataset(list_osc, csv_categories, "dataset.npz", target_len=4096, augment=True, seed=0)
+    data = load_dataset("dataset.npz")     # X [M, target_len], y, classes, dB, K_mkV, source, frame
+
+Этапы:
+  1. Число осциллограмм в каждом файле определяется параллельно (пул процессов).
+  2. Под все кадры создаётся одна матрица [N, target_len] на диске (memmap);
+     процессы пула читают свои файлы блоками и записывают кадры в свои строки
+     (короткие кадры дополняются по pad_mode — см. padding.pad_block, длинные обрезаются).
+  3. Баланс классов выполняется над массивами индексов (см. balance_indices):
+     слишком частые классы прореживаются, редкие (augment=True) дополняются
+     случайными повторами со сдвигом по времени. Случайность задаётся seed.
+  4. Итоговая матрица собирается из строк по индексам блоками и сохраняется
+     в .npz (без сжатия) или в каталог .npy файлов, открываемых через memmap.
+
+Объём памяти не зависит от числа кадров: в памяти одновременно находятся
+только блоки чтения и сборки.
+"""
+
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+
+from augmentation import shift_block
+from padding import PAD_MODES
+
+
+DEFAULT_BLOCK_SIZE = 500
+# Доля класса, начиная с которой класс прореживается, и доля, до которой
+# прореживаются частые и дополняются редкие классы (как в create_datasets_with_osc)
+MAX_SHARE = 0.4
+TARGET_SHARE = 0.2
+# Диапазон сдвига по времени для дополнительных кадров редких классов, отсчётов
+AUGMENT_SHIFT = (5, 50)
+
+# Массивы датасета по строкам (кроме X)
+ROW_FIELDS = {"y": np.int32, "dB": np.int32, "K_mkV": np.float64, "source": np.int32, "frame": np.int64,
+              "length": np.int32, "augmented": np.bool_}
+
+
+def balance_indices(codes: np.ndarray, rng: np.random.Generator, augment: bool = False,
+                    max_share: float = MAX_SHARE, target_share: float = TARGET_SHARE) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Индексы строк сбалансированного датасета.
+
+    Класс, доля которого не меньше max_share, случайно прореживается до target_share
+    от исходного числа кадров; при augment классы с долей меньше target_share
+    дополняются случайными повторами своих кадров до target_share.
+
+    Returns:
+        (индексы [M] в порядке исходных строк, признак повтора [M]) — повторы идут в конце
+    """
+    codes = np.asarray(codes)
+    total = len(codes)
+    keep = []
+    extra = []
+    for code in np.unique(codes):
+        rows = np.flatnonzero(codes == code)
+        share = len(rows) / total
+        if share >= max_share:
+            # Остаётся на один кадр меньше target_share * total, как в исходном алгоритме
+            n_keep = max(int(np.ceil(target_share * total)) - 1, 0)
+            keep.append(np.sort(rng.choice(rows, size=min(n_keep, len(rows)), replace=False)))
+            continue
+        keep.append(rows)
+        if augment and share < target_share:
+            # Добавляется, пока до target_share * total не останется не больше одного кадра
+            n_add = int(np.ceil(target_share * total - len(rows) - 1))
+            if n_add > 0:
+                extra.append(rng.choice(rows, size=n_add, replace=True))
+    keep = np.sort(np.concatenate(keep)) if keep else np.empty(0, dtype=np.int64)
+    extra = np.concatenate(extra) if extra else np.empty(0, dtype=np.int64)
+    indices = np.concatenate([keep, extra]).astype(np.int64)
+    repeated = np.zeros(len(indices), dtype=bool)
+    repeated[len(keep):] = True
+    return indices, repeated
+
+
+def count_frames(osc_path: str) -> int:
+    """Число осциллограмм в файле (выполняется в процессе пула)."""
+    from osc_store import open_osc_reader
+    return open_osc_reader(osc_path).num_osc
+
+
+def fill_rows(osc_path: str, matrix_path: str, row_start: int, target_len: int,
+              block_size: int = DEFAULT_BLOCK_SIZE, pad_mode: str = "zero", seed=None) -> dict:
+    """
+    Записывает осциллограммы файла в строки [row_start, row_start + N) матрицы matrix_path
+    (.npy, открывается через memmap). Выполняется в процессе пула.
+    pad_mode, seed - режим дополнения коротких кадров и начальное значение генератора шума
+
+    Returns:
+        dict: dB, K_mkV, length — массивы по кадрам файла
+    """
+    from osc_store import open_osc_reader
+    from padding import pad_block
+    from work_with_osc import get_dB_block
+
+    rng = np.random.default_rng(seed)
+    reader = open_osc_reader(osc_path)
+    num_osc = reader.num_osc
+    matrix = np.load(matrix_path, mmap_mode="r+")
+    result = {"dB": np.empty(num_osc, dtype=np.int32), "K_mkV": np.empty(num_osc, dtype=np.float64),
+              "length": np.empty(num_osc, dtype=np.int32)}
+    for start in range(0, num_osc, block_size):
+        end = min(start + block_size, num_osc)
+        samples, K_mkV, _ = reader.read_block(start, end)
+        samples, K_mkV = np.asarray(samples), np.asarray(K_mkV, dtype=np.float64)
+        # Строки блока дополнены нулями до самой длинной — дополняется только после своей длины
+        lengths = np.asarray(reader.lengths(start, end), dtype=np.int64)
+        pad_block(samples, target_len, pad_mode, lengths=lengths, out=matrix[row_start + start:row_start + end],
+                  rng=rng)
+        result["dB"][start:end] = get_dB_block(samples, K_mkV)
+        result["K_mkV"][start:end] = K_mkV
+        result["length"][start:end] = lengths
+    matrix.flush()
+    del matrix
+    return result
+
+
+class _NpyDirWriter:
+    """Массивы датасета в отдельных .npy файлах каталога (открываются через memmap)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def array(self, name: str, dtype, shape) -> np.memmap:
+        return np.lib.format.open_memmap(os.path.join(self.path, name + ".npy"), mode="w+", dtype=dtype, shape=shape)
+
+    def save(self, name: str, value: np.ndarray) -> None:
+        np.save(os.path.join(self.path, name + ".npy"), value)
+
+    def close(self) -> None:
+        pass
+
+
+class _NpzFileWriter(_NpyDirWriter):
+    """Массивы пишутся во временный каталог и при закрытии упаковываются в .npz без сжатия."""
+
+    def __init__(self, path: str, tmp_dir: str):
+        super().__init__(os.path.join(tmp_dir, "npz"))
+        self.npz_path = path
+
+    def close(self) -> None:
+        with zipfile.ZipFile(self.npz_path, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+            for name in sorted(os.listdir(self.path)):
+                zf.write(os.path.join(self.path, name), arcname=name)
+
+
+def build_dataset(
+    list_osc: list,
+    csv_categories: list,
+    out_path: str,
+    target_len: int,
+    augment: bool = False,
+    seed: Optional[int] = None,
+    dtype=np.float32,
+    workers: Optional[int] = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    progress: Optional[Callable[[str, int, int], None]] = None,
+    mp_context=None,
+    pad_mode: str = "zero",
+) -> dict:
+    """
+    Строит датасет из файлов list_osc (файл list_osc[i] относится к категории csv_categories[i]).
+
+    out_path - .npz файл или каталог (массивы X.npy, y.npy, ... для np.load(..., mmap_mode="r"))
+    target_len - длина кадра в датасете
+    augment - дополнять редкие классы повторами со сдвигом по времени
+    seed - начальное значение генератора случайных чисел (одинаковый seed — одинаковый датасет)
+    pad_mode - дополнение коротких кадров: "zero", "noise" или "reflect" (см. padding.PAD_MODES)
+    workers - число процессов (по умолчанию — число ядер)
+    progress(этап, выполнено, всего) - этапы "read" (файлы) и "write" (строки)
+
+    Returns:
+        dict: frames (кадров в файлах), rows (строк в датасете), classes, counts (строк по классам)
+    """
+    if len(list_osc) != len(csv_categories):
+        raise ValueError("Число файлов и категорий не совпадает")
+    classes = sorted(set(csv_categories), key=str)
+    class_codes = {name: i for i, name in enumerate(classes)}
+    if pad_mode not in PAD_MODES:
+        raise ValueError(f"Неизвестный режим дополнения: {pad_mode}")
+    seed_sequence = np.random.SeedSequence(seed)
+    # Генератор шума дополнения у каждого файла свой, чтобы результат не зависел от порядка выполнения задач
+    file_seeds = seed_sequence.spawn(len(list_osc))
+    rng = np.random.default_rng(seed_sequence)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(list_osc) or 1))
+
+    out_is_npz = out_path.lower().endswith(".npz")
+    tmp_root = os.path.dirname(os.path.abspath(out_path))
+    with tempfile.TemporaryDirectory(dir=tmp_root) as tmp_dir, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+        # 1. Число кадров в каждом файле
+        num_osc = np.fromiter(pool.map(count_frames, list_osc), dtype=np.int64, count=len(list_osc))
+        offsets = np.concatenate([[0], np.cumsum(num_osc)])
+        total = int(offsets[-1])
+
+        # 2. Все кадры в одной матрице на диске
+        raw_path = os.path.join(tmp_dir, "raw.npy")
+        np.lib.format.open_memmap(raw_path, mode="w+", dtype=dtype, shape=(total, target_len)).flush()
+        futures = [pool.submit(fill_rows, path, raw_path, int(offsets[i]), target_len, block_size,
+                               pad_mode, file_seeds[i])
+                   for i, path in enumerate(list_osc)]
+        columns = {"dB": np.empty(total, dtype=np.int32), "K_mkV": np.empty(total, dtype=np.float64),
+                   "length": np.empty(total, dtype=np.int32)}
+        for i, future in enumerate(futures):
+            result = future.result()
+            for name, values in result.items():
+                columns[name][offsets[i]:offsets[i + 1]] = values
+            if progress is not None:
+                progress("read", i + 1, len(futures))
+
+        # 3. Баланс классов по индексам
+        source = np.repeat(np.arange(len(list_osc), dtype=np.int32), num_osc)
+        codes = np.array([class_codes[c] for c in csv_categories], dtype=np.int32)[source]
+        indices, repeated = balance_indices(codes, rng, augment)
+        rows = len(indices)
+        shifts = rng.integers(AUGMENT_SHIFT[0], AUGMENT_SHIFT[1] + 1, size=rows)
+
+        # 4. Сборка итоговой матрицы блоками
+        writer = _NpzFileWriter(out_path, tmp_dir) if out_is_npz else _NpyDirWriter(out_path)
+        raw = np.load(raw_path, mmap_mode="r")
+        X = writer.array("X", dtype, (rows, target_len))
+        for start in range(0, rows, block_size):
+            end = min(start + block_size, rows)
+            block_idx = indices[start:end]
+            # Чтение строк в порядке возрастания индексов (последовательный доступ к диску)
+            order = np.argsort(block_idx, kind="stable")
+            block = np.empty((end - start, target_len), dtype=dtype)
+            block[order] = raw[block_idx[order]]
+            rep = repeated[start:end]
+            if rep.any():
+                block[rep] = shift_block(block[rep], shifts[start:end][rep])
+            X[start:end] = block
+            if progress is not None:
+                progress("write", end, rows)
+        X.flush()
+        del X, raw
+
+        row_values = {
+            "y": codes[indices], "dB": columns["dB"][indices], "K_mkV": columns["K_mkV"][indices],
+            "source": source[indices], "frame": (indices - offsets[source[indices]]),
+            "length": columns["length"][indices], "augmented": repeated,
+        }
+        for name, dtype_field in ROW_FIELDS.items():
+            writer.save(name, np.asarray(row_values[name], dtype=dtype_field))
+        writer.save("classes", np.array([str(c) for c in classes]))
+        writer.save("files", np.array([os.path.basename(p) for p in list_osc]))
+        writer.close()
+
+    counts = np.bincount(codes[indices], minlength=len(classes))
+    return {"frames": total, "rows": rows, "classes": classes,
+            "counts": {str(c): int(n) for c, n in zip(classes, counts)}}
+
+
+def load_dataset(path: str, mmap: bool = True) -> dict:
+    """
+    Открывает датасет build_dataset: {имя массива: массив}.
+    Каталог открывается через memmap (mmap=True); .npz читается в память.
+    """
+    if path.lower().endswith(".npz"):
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    mode = "r" if mmap else None
+    return {os.path.splitext(name)[0]: np.load(os.path.join(path, name), mmap_mode=mode)
+            for name in sorted(os.listdir(path)) if name.endswith(".npy")}
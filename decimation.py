@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Прореживание длинных кривых для отображения с сохранением пиков (min/max LOD).
+
+Видимая часть кривой делится на столбцы примерно по одному на пиксель ширины
+графика; для каждого столбца выводятся минимум и максимум (в порядке следования),
+поэтому выбросы и огибающая сигнала не теряются. Огибающая для всей кривой
+рассчитывается один раз на уровень масштаба (столбец = 2 ** k отсчётов) и кэшируется,
+так что при прокрутке и повторном масштабировании берётся только срез.
+Объём данных, передаваемых в pyqtgraph, зависит от ширины графика, а не от длины записи.
+"""
+
+import math
+
+import numpy as np
+from numba import njit
+
+from jit_cache import NUMBA_CACHE
+
+
+# Ширина графика в пикселях, если виджет ещё не показан
+DEFAULT_WIDTH = 1000
+
+
+@njit(cache=NUMBA_CACHE)
+def minmax_decimate(y: np.ndarray, bin_size: int):
+    """
+    Огибающая min/max: для каждых bin_size отсчётов — индексы и значения минимума
+    и максимума в порядке их следования (2 точки на столбец).
+    """
+    n = len(y)
+    n_bins = (n + bin_size - 1) // bin_size
+    idx = np.empty(2 * n_bins, dtype=np.int64)
+    values = np.empty(2 * n_bins, dtype=np.float64)
+    for b in range(n_bins):
+        start = b * bin_size
+        end = min(start + bin_size, n)
+        i_min = start
+        i_max = start
+        for j in range(start + 1, end):
+            if y[j] < y[i_min]:
+                i_min = j
+            if y[j] > y[i_max]:
+                i_max = j
+        if i_min > i_max:
+            i_min, i_max = i_max, i_min
+        idx[2 * b] = i_min
+        idx[2 * b + 1] = i_max
+        values[2 * b] = y[i_min]
+        values[2 * b + 1] = y[i_max]
+    return idx, values
+
+
+class MinMaxLod:
+    """
+    Кривая (x, y) с огибающими min/max, кэшируемыми по уровням масштаба.
+    x должен возрастать; столбцы огибающей делятся по номерам отсчётов.
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray):
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+        self._levels: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.y)
+
+    def level(self, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Огибающая всей кривой для столбцов по 2 ** k отсчётов (рассчитывается один раз)."""
+        envelope = self._levels.get(k)
+        if envelope is None:
+            envelope = minmax_decimate(self.y, 1 << k)
+            self._levels[k] = envelope
+        return envelope
+
+    def select(self, x_min: float, x_max: float, width: int) -> tuple[tuple, np.ndarray, np.ndarray]:
+        """
+        Точки для отображения диапазона [x_min, x_max] на графике шириной width пикселей.
+
+        Returns:
+            (key, x, y) — key одинаков для одинакового набора точек
+        """
+        n = len(self.y)
+        i0 = max(int(np.searchsorted(self.x, x_min)) - 1, 0)
+        i1 = min(int(np.searchsorted(self.x, x_max, side="right")) + 1, n)
+        if i1 - i0 <= 2 * width:
+            return (0, i0, i1), self.x[i0:i1], self.y[i0:i1]
+        k = max(1, math.ceil(math.log2((i1 - i0) / width)))
+        bin_size = 1 << k
+        idx, values = self.level(k)
+        b0, b1 = i0 // bin_size, -(-i1 // bin_size)
+        idx = idx[2 * b0:2 * b1]
+        return (k, b0, b1), self.x[idx], values[2 * b0:2 * b1]
+
+
+_index_axes: dict[int, np.ndarray] = {}
+
+
+def index_axis(n: int) -> np.ndarray:
+    """Ось номеров отсчётов 0..n-1 (кэшируется по длине)."""
+    axis = _index_axes.get(n)
+    if axis is None:
+        axis = np.arange(n, dtype=np.float64)
+        axis.setflags(write=False)
+        _index_axes[n] = axis
+    return axis
+
+
+class DecimatedCurve:
+    """
+    Связывает кривую pyqtgraph (PlotDataItem) с MinMaxLod: при изменении видимого
+    диапазона или размера графика в кривую передаётся только огибающая видимой части.
+
+    Параметры:
+    curve - PlotDataItem
+    view_box - ViewBox графика, на котором находится кривая
+    """
+
+    def __init__(self, curve, view_box):
+        self.curve = curve
+        self.view_box = view_box
+        self.lod = None
+        self._key = None
+        view_box.sigXRangeChanged.connect(self.update)
+        view_box.sigResized.connect(self.update)
+
+    def set_data(self, x: np.ndarray, y: np.ndarray = None) -> None:
+        """Новые данные кривой; если y не задан — x это значения, ось — номера отсчётов."""
+        if y is None:
+            x, y = index_axis(len(x)), x
+        self.lod = MinMaxLod(x, y)
+        self._key = None
+        self.update()
+
+    def update(self, *args) -> None:
+        lod = self.lod
+        if lod is None or len(lod) == 0:
+            if lod is not None:
+                self.curve.setData([], [])
+            return
+        if self.view_box.autoRangeEnabled()[0]:
+            # При автомасштабе показывается вся кривая
+            x_min, x_max = lod.x[0], lod.x[-1]
+        else:
+            x_min, x_max = self.view_box.viewRange()[0]
+        width = int(self.view_box.width()) or DEFAULT_WIDTH
+        key, x, y = lod.select(x_min, x_max, width)
+        key = (key, width)
+        if key == self._key:
+            return
+        self._key = key
+        self.curve.setData(x, y)
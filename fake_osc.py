@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Синтетическая замена модуля Aegis_osc (File_osc, Logger, LogLevel) на чистом Python.
+
+Нужна для проверки и замеров без Windows-модуля Aegis_osc.pyd: FakeFileOsc
+повторяет используемую часть интерфейса File_osc (sdoHdr.NumOSC, oscDefMod[i],
+getDotsOSC, getDotOSC, get_K_mkV) и генерирует осциллограммы, похожие на
+сигналы акустической эмиссии: шум до прихода сигнала, нарастание и
+экспоненциальный спад затухающей синусоиды.
+
+Данные каждой осциллограммы детерминированы (зависят только от seed и номера),
+поэтому блоки можно читать в любом порядке и любого размера.
+
+Подключение вместо настоящего модуля:
+    import fake_osc
+    fake_osc.install(num_osc=100000, length=2048)
+    import seeOSC  # import Aegis_osc внутри получит fake_osc
+"""
+
+import sys
+from typing import Optional
+
+import numpy as np
+
+
+# Параметры файлов, создаваемых через File_osc(name, logger) после install()
+_DEFAULTS = {
+    "num_osc": 1000,
+    "length": 1024,
+    "freq_khz": 1000,
+    "variable_length": False,
+    "seed": 0,
+}
+
+
+class LogLevel:
+    _INFO_ = 0
+    _WARNING_ = 1
+    _ERROR_ = 2
+    _CRITICAL_ = 3
+
+
+class Logger:
+    """Логгер с интерфейсом Aegis_osc.Logger; сообщения не записываются."""
+
+    def __init__(self, file_name: str = ""):
+        self.file_name = file_name
+
+    def logg(self, level, message, file_name="", line=0, func_name="") -> None:
+        pass
+
+
+class _SdoHdr:
+    def __init__(self, num_osc: int):
+        self.NumOSC = num_osc
+
+
+class _OscDefMod:
+    def __init__(self, K_mkV: float, freq: float, buf_size: int):
+        self.K_mkV = K_mkV
+        self.freq = freq
+        self.buf_size = buf_size
+        self.buf_size_max = buf_size
+
+
+class _OscDefModList:
+    """Описания осциллограмм, создаваемые по запросу (без списка на весь файл)."""
+
+    def __init__(self, owner: "FakeFileOsc"):
+        self._owner = owner
+
+    def __len__(self) -> int:
+        return self._owner.sdoHdr.NumOSC
+
+    def __getitem__(self, index: int) -> _OscDefMod:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        owner = self._owner
+        return _OscDefMod(float(owner.k_mkV[index]), owner.freq_khz, int(owner.lengths[index]))
+
+
+class FakeFileOsc:
+    """
+    Синтетический .osc файл.
+
+    Параметры:
+    name - имя файла (не используется для чтения)
+    logger - не используется, для совместимости с File_osc
+    num_osc - количество осциллограмм
+    length - длина осциллограммы (максимальная при variable_length)
+    freq_khz - частота дискретизации, кГц
+    variable_length - осциллограммы разной длины (от length // 2 до length)
+    seed - зерно генератора
+    """
+
+    def __init__(self, name: str = "", logger: Optional[Logger] = None, num_osc: Optional[int] = None,
+                 length: Optional[int] = None, freq_khz: Optional[float] = None,
+                 variable_length: Optional[bool] = None, seed: Optional[int] = None):
+        opts = dict(_DEFAULTS)
+        for key, value in (("num_osc", num_osc), ("length", length), ("freq_khz", freq_khz),
+                           ("variable_length", variable_length), ("seed", seed)):
+            if value is not None:
+                opts[key] = value
+        self.name = name
+        self.seed = opts["seed"]
+        self.freq_khz = float(opts["freq_khz"])
+        num = int(opts["num_osc"])
+        length = int(opts["length"])
+        self.sdoHdr = _SdoHdr(num)
+
+        # Параметры сигналов на весь файл (несколько чисел на осциллограмму)
+        rng = np.random.default_rng(self.seed)
+        self.k_mkV = rng.choice([1.0, 3.05, 6.1], size=num)
+        if opts["variable_length"]:
+            self.lengths = rng.integers(max(1, length // 2), length + 1, size=num)
+        else:
+            self.lengths = np.full(num, length, dtype=np.int64)
+        level_dB = rng.uniform(40, 90, size=num)              # уровень сигнала, дБ отн. 1 мкВ
+        self.amplitude = 10 ** (level_dB / 20) / self.k_mkV    # амплитуда в ед. АЦП
+        self.carrier_khz = rng.uniform(80, 300, size=num)
+        self.rise_us = rng.uniform(5, 60, size=num)
+        self.decay_us = rng.uniform(50, 400, size=num)
+        self.arrival = rng.uniform(0.15, 0.35, size=num)      # доля длины до прихода сигнала
+        self.noise = rng.uniform(2, 8, size=num)                # СКО шума, ед. АЦП
+        self.oscDefMod = _OscDefModList(self)
+
+    def _frame(self, index: int) -> np.ndarray:
+        length = int(self.lengths[index])
+        rng = np.random.default_rng((self.seed, index))
+        t_us = np.arange(length) * (1000.0 / self.freq_khz)
+        t0 = self.arrival[index] * t_us[-1] if length > 1 else 0.0
+        dt = t_us - t0
+        envelope = np.where(dt < 0, 0.0,
+                            (1 - np.exp(-np.maximum(dt, 0) / self.rise_us[index]))
+                            * np.exp(-np.maximum(dt, 0) / self.decay_us[index]))
+        phase = 2 * np.pi * self.carrier_khz[index] * dt / 1000.0
+        burst = self.amplitude[index] * envelope * (np.sin(phase) + 0.3 * np.sin(1.7 * phase))
+        signal = burst + rng.normal(0, self.noise[index], size=length)
+        return np.clip(np.round(signal), -32768, 32767).astype(np.int32)
+
+    def getDotsOSC(self, start: int, end: int) -> list:
+        """Осциллограммы [start, end) списком списков целых (как в Aegis_osc)."""
+        end = min(end, self.sdoHdr.NumOSC)
+        return [self._frame(i).tolist() for i in range(start, end)]
+
+    def getDotOSC(self, index: int) -> list:
+        return self._frame(index).tolist()
+
+    def get_K_mkV(self, start: int, end: int) -> list:
+        end = min(end, self.sdoHdr.NumOSC)
+        return self.k_mkV[start:end].tolist()
+
+
+File_osc = FakeFileOsc
+
+
+def install(**defaults) -> None:
+    """
+    Регистрирует этот модуль как Aegis_osc (если настоящий модуль ещё не импортирован)
+    и задаёт параметры синтетических файлов: num_osc, length, freq_khz, variable_length, seed.
+    """
+    unknown = set(defaults) - set(_DEFAULTS)
+    if unknown:
+        raise TypeError(f"Неизвестные параметры: {', '.join(sorted(unknown))}")
+    _DEFAULTS.update(defaults)
+    sys.modules.setdefault("Aegis_osc", sys.modules[__name__])
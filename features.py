@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Выгрузка признаков осциллограмм для обучения (таблица: строка на кадр).
+
+    summary = export_features(["a.osc", "b.osc"], "features_dir")
+    table = load_features("features_dir")     # {столбец: массив}; file_index — номер в table["files"]
+
+Файлы разбиваются на блоки по block_size кадров, блоки обрабатываются в пуле
+процессов (открытые файлы кэшируются в каждом процессе). Признаки блока
+считаются векторно по действительным отсчётам каждого кадра (длины — от источника
+осциллограмм): frame_metrics (один проход по отсчётам), rFFT блока для доминирующей
+частоты и центроида спектра, calc_ach_batch для Sabs и fmax.
+
+Результат — каталог частей part-00000.npz, part-00001.npz, ... (или .parquet,
+если установлены pandas и pyarrow) по rows_per_part строк и features.json
+со схемой и списком файлов. Строки идут в порядке файлов и кадров.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+
+
+DEFAULT_BLOCK_SIZE = 500
+DEFAULT_ROWS_PER_PART = 100_000
+# Порог времени нарастания: доля максимума модуля сигнала
+RISE_THRESHOLD_SHARE = 0.1
+
+# Схема таблицы признаков: столбец -> тип
+FEATURE_SCHEMA = {
+    "file_index": np.int32,            # номер файла в списке files
+    "frame": np.int64,                 # номер осциллограммы в файле
+    "freq_kHz": np.float64,            # частота дискретизации
+    "dB": np.int32,
+    "peak": np.float64,                # максимум модуля, ед. АЦП
+    "rms": np.float64,
+    "crest_factor": np.float64,        # peak / rms
+    "energy": np.float64,
+    "mean": np.float64,
+    "std_dev": np.float64,
+    "variance": np.float64,
+    "min_val": np.float64,
+    "max_val": np.float64,
+    "kurtosis": np.float64,
+    "rise_time_us": np.float64,        # от первого превышения RISE_THRESHOLD_SHARE * peak до максимума
+    "dominant_kHz": np.float64,
+    "spectral_centroid_kHz": np.float64,
+    "Sabs": np.float64,
+    "fmax": np.float64,
+}
+FORMATS = ("auto", "npz", "parquet")
+
+# Открытые файлы в процессе пула: путь -> источник осциллограмм
+_readers = {}
+
+
+def _reader(osc_path: str, default_freq_khz: float):
+    reader = _readers.get(osc_path)
+    if reader is None:
+        from osc_store import open_osc_reader
+        reader = _readers[osc_path] = open_osc_reader(osc_path, default_freq_khz=default_freq_khz)
+    return reader
+
+
+def count_frames(osc_path: str, default_freq_khz: float = 1000) -> int:
+    """Число осциллограмм в файле (выполняется в процессе пула)."""
+    return _reader(osc_path, default_freq_khz).num_osc
+
+
+def rise_times(osc_block: np.ndarray, peak: np.ndarray, peak_index: np.ndarray, freq_khz,
+               lengths: Optional[np.ndarray] = None) -> np.ndarray:
+    """Время нарастания (мкс): от первого отсчёта с |x| >= RISE_THRESHOLD_SHARE * peak до максимума."""
+    magnitude = np.abs(np.asarray(osc_block, dtype=np.float64))
+    above = magnitude >= (RISE_THRESHOLD_SHARE * peak)[:, None]
+    if lengths is not None:
+        above &= np.arange(magnitude.shape[1])[None, :] < np.asarray(lengths)[:, None]
+    first = np.argmax(above, axis=1)
+    samples = np.maximum(peak_index - first, 0)
+    return samples * 1000.0 / np.asarray(freq_khz, dtype=np.float64)
+
+
+def block_features(osc_path: str, start: int, end: int, config: dict) -> dict:
+    """
+    Признаки осциллограмм [start, end) файла osc_path (выполняется в процессе пула).
+
+    Returns:
+        dict: столбцы FEATURE_SCHEMA, кроме file_index
+    """
+    from ach_calculator import calc_ach_batch
+    from Fourier import spectral_features
+    from work_with_osc import frame_metrics
+
+    reader = _reader(osc_path, config.get("fD_kHz", 1000))
+    osc_block, k_mkV, freq_vec = reader.read_block(start, end)
+    osc_block = np.asarray(osc_block)
+    k_mkV = np.asarray(k_mkV, dtype=np.float64)
+    freq_vec = np.asarray(freq_vec, dtype=np.float64)
+    lengths = np.asarray(reader.lengths(start, end), dtype=np.int64)
+
+    metrics = frame_metrics(osc_block, k_mkV, freq_vec, lengths=lengths, spectral=False)
+    dominant, centroid = spectral_features(osc_block, freq_vec, lengths)
+    _, _, sabs, fmax, _ = calc_ach_batch(osc_block, k_mkV, freq_vec, config, lengths=lengths)
+
+    columns = {name: metrics[name] for name in
+               ("dB", "peak", "rms", "energy", "mean", "std_dev", "variance", "min_val", "max_val", "kurtosis")}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        columns["crest_factor"] = np.where(metrics["rms"] > 0, metrics["peak"] / metrics["rms"], np.nan)
+    columns["rise_time_us"] = rise_times(osc_block, metrics["peak"], metrics["peak_index"], freq_vec, lengths)
+    columns["frame"] = np.arange(start, end)
+    columns["freq_kHz"] = freq_vec
+    columns["dominant_kHz"] = dominant
+    columns["spectral_centroid_kHz"] = centroid
+    columns["Sabs"] = sabs
+    columns["fmax"] = fmax
+    return columns
+
+
+def _parquet_available() -> bool:
+    try:
+        import pandas  # noqa: F401
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _PartWriter:
+    """Накопление строк и запись частей таблицы (part-NNNNN.npz / .parquet) по rows_per_part строк."""
+
+    def __init__(self, path: str, fmt: str, rows_per_part: int):
+        self.path = path
+        self.fmt = fmt
+        self.rows_per_part = rows_per_part
+        self.parts: list[str] = []
+        self.rows = 0
+        self._buffer: list[dict] = []
+        self._buffered = 0
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, columns: dict) -> None:
+        self._buffer.append(columns)
+        self._buffered += len(columns["frame"])
+        self.rows += len(columns["frame"])
+        if self._buffered >= self.rows_per_part:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        table = {name: np.concatenate([c[name] for c in self._buffer]).astype(dtype, copy=False)
+                 for name, dtype in FEATURE_SCHEMA.items()}
+        self._buffer, self._buffered = [], 0
+        name = f"part-{len(self.parts):05d}.{self.fmt}"
+        if self.fmt == "parquet":
+            import pandas as pd
+            pd.DataFrame(table).to_parquet(os.path.join(self.path, name), index=False)
+        else:
+            np.savez(os.path.join(self.path, name), **table)
+        self.parts.append(name)
+
+
+def export_features(
+    list_osc: list,
+    out_path: str,
+    config: Optional[dict] = None,
+    fmt: str = "auto",
+    workers: Optional[int] = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    rows_per_part: int = DEFAULT_ROWS_PER_PART,
+    progress: Optional[Callable[[int, int], None]] = None,
+    mp_context=None,
+) -> dict:
+    """
+    Рассчитывает признаки FEATURE_SCHEMA для всех осциллограмм файлов list_osc
+    и записывает их частями в каталог out_path.
+
+    config - настройки АЧХ (по умолчанию load_ach_config())
+    fmt - "npz", "parquet" или "auto" (parquet, если доступны pandas и pyarrow)
+    workers - число процессов (по умолчанию — число ядер)
+    progress(обработано кадров, всего)
+
+    Returns:
+        dict: frames, parts (имена файлов частей), format
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат: {fmt} (ожидается один из {', '.join(FORMATS)})")
+    if fmt == "auto":
+        fmt = "parquet" if _parquet_available() else "npz"
+    elif fmt == "parquet" and not _parquet_available():
+        raise ValueError("Для формата parquet нужны pandas и pyarrow")
+    if config is None:
+        from ach_calculator import load_ach_config
+        config = load_ach_config()
+    workers = max(1, workers or os.cpu_count() or 1)
+    default_freq_khz = config.get("fD_kHz", 1000)
+
+    writer = _PartWriter(out_path, fmt, rows_per_part)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+        num_osc = list(pool.map(count_frames, list_osc, [default_freq_khz] * len(list_osc)))
+        tasks = [(i, start, min(start + block_size, n))
+                 for i, n in enumerate(num_osc) for start in range(0, n, block_size)]
+        total = int(sum(num_osc))
+        # Не больше 2 * workers блоков в работе: результаты пишутся по порядку, память ограничена
+        window = 2 * workers
+        futures = {}
+        done = 0
+        for k in range(len(tasks)):
+            for j in range(k, min(k + window, len(tasks))):
+                if j not in futures:
+                    i, start, end = tasks[j]
+                    futures[j] = pool.submit(block_features, list_osc[i], start, end, config)
+            columns = futures.pop(k).result()
+            columns["file_index"] = np.full(len(columns["frame"]), tasks[k][0], dtype=np.int32)
+            writer.write(columns)
+            done += len(columns["frame"])
+            if progress is not None:
+                progress(done, total)
+    writer.flush()
+
+    with open(os.path.join(out_path, "features.json"), "w", encoding="utf-8") as f:
+        json.dump({"format": fmt, "frames": writer.rows, "parts": writer.parts,
+                   "schema": {name: np.dtype(dtype).name for name, dtype in FEATURE_SCHEMA.items()},
+                   "files": [os.path.abspath(p) for p in list_osc]}, f, ensure_ascii=False, indent=2)
+    return {"frames": writer.rows, "parts": writer.parts, "format": fmt}
+
+
+def load_features(path: str) -> dict:
+    """Таблица признаков export_features: {столбец: массив} и files — пути файлов по номеру file_index."""
+    with open(os.path.join(path, "features.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    parts = []
+    for name in meta["parts"]:
+        part_path = os.path.join(path, name)
+        if name.endswith(".parquet"):
+            import pandas as pd
+            frame = pd.read_parquet(part_path)
+            parts.append({column: frame[column].to_numpy() for column in FEATURE_SCHEMA})
+        else:
+            with np.load(part_path) as data:
+                parts.append({column: data[column] for column in FEATURE_SCHEMA})
+    table = {name: np.concatenate([p[name] for p in parts]) if parts else np.empty(0, dtype=dtype)
+             for name, dtype in FEATURE_SCHEMA.items()}
+    table["files"] = np.array(meta["files"])
+    return table
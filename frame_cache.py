@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Кэш блоков осциллограмм для навигации по .osc файлу.
+
+Файл читается блоками по block_size осциллограмм. Прочитанные блоки хранятся
+в LRU-кэше с ограничением по объёму памяти, а соседние блоки в направлении
+движения подгружаются в фоновом потоке, чтобы переход через границу блока
+не останавливал интерфейс.
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+import numpy as np
+
+
+# (start, end, osc_datas, K_mkV, dB_data, lengths) — строки osc_datas дополнены нулями
+# до самой длинной осциллограммы блока, lengths — их действительные длины
+FrameBlock = tuple[int, int, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+class FrameBlockCache:
+    """
+    LRU-кэш блоков осциллограмм с фоновой подгрузкой.
+
+    Параметры:
+    loader - функция loader(start, end) -> (osc_datas, K_mkV, dB_data, lengths) для осциллограмм [start, end)
+    num_osc - количество осциллограмм в файле
+    block_size - размер блока (число осциллограмм)
+    max_bytes - ограничение объёма кэша в байтах (текущий блок хранится всегда)
+    prefetch_blocks - сколько блоков подгружать заранее в направлении движения
+    """
+
+    def __init__(self, loader: Callable[[int, int], tuple], num_osc: int, block_size: int = 500,
+                 max_bytes: int = 256 * 1024 * 1024, prefetch_blocks: int = 1):
+        self.loader = loader
+        self.num_osc = num_osc
+        self.block_size = block_size
+        self.max_bytes = max_bytes
+        self.prefetch_blocks = prefetch_blocks
+
+        self._blocks: OrderedDict[int, FrameBlock] = OrderedDict()
+        self._sizes: dict[int, int] = {}
+        self._pending: dict[int, Future] = {}
+        self._lock = threading.Lock()
+        # Чтение файла выполняется строго последовательно (из потока интерфейса или из фонового)
+        self._io_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="osc-prefetch")
+
+    @property
+    def nbytes(self) -> int:
+        """Текущий объём данных в кэше, байт."""
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def block_start(self, osc_index: int) -> int:
+        """Номер первой осциллограммы блока, в который входит osc_index."""
+        return (osc_index // self.block_size) * self.block_size
+
+    def get(self, osc_index: int) -> FrameBlock:
+        """
+        Возвращает блок (start, end, osc_datas, K_mkV, dB_data, lengths), содержащий osc_index.
+        Если блок уже подгружается в фоне — дожидается его, иначе читает сразу.
+        """
+        start = self.block_start(osc_index)
+        with self._lock:
+            block = self._blocks.get(start)
+            if block is not None:
+                self._blocks.move_to_end(start)
+                return block
+            future = self._pending.get(start)
+        if future is not None:
+            return future.result()
+        return self._load(start)
+
+    def prefetch(self, osc_index: int, direction: int = 0) -> None:
+        """
+        Запускает фоновую подгрузку соседних блоков.
+        direction > 0 — следующие блоки, direction < 0 — предыдущие, 0 — с обеих сторон.
+        """
+        start = self.block_start(osc_index)
+        targets = []
+        for k in range(1, self.prefetch_blocks + 1):
+            if direction >= 0:
+                targets.append(start + k * self.block_size)
+            if direction <= 0:
+                targets.append(start - k * self.block_size)
+        for target in targets:
+            if 0 <= target < self.num_osc:
+                self._submit(target)
+
+    def close(self) -> None:
+        """Останавливает фоновую подгрузку и очищает кэш."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._blocks.clear()
+            self._sizes.clear()
+            self._pending.clear()
+
+    def _submit(self, start: int) -> None:
+        with self._lock:
+            if start in self._blocks or start in self._pending:
+                return
+            try:
+                self._pending[start] = self._executor.submit(self._load, start)
+            except RuntimeError:
+                # Кэш уже закрыт
+                pass
+
+    def _load(self, start: int) -> FrameBlock:
+        end = min(start + self.block_size, self.num_osc)
+        try:
+            with self._io_lock:
+                with self._lock:
+                    block = self._blocks.get(start)
+                if block is None:
+                    block = (start, end, *self.loader(start, end))
+                    self._store(start, block)
+            return block
+        finally:
+            with self._lock:
+                self._pending.pop(start, None)
+
+    def _store(self, start: int, block: FrameBlock) -> None:
+        size = sum(np.asarray(arr).nbytes for arr in block[2:])
+        with self._lock:
+            self._blocks[start] = block
+            self._blocks.move_to_end(start)
+            self._sizes[start] = size
+            while len(self._blocks) > 1 and sum(self._sizes.values()) > self.max_bytes:
+                evicted, _ = self._blocks.popitem(last=False)
+                self._sizes.pop(evicted, None)
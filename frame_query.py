@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Отбор кадров по условию над столбцами метрик (индекс osc_index).
+
+    query = FrameQuery("dB >= 60 and 120 <= fmax <= 180")
+    matches = query.evaluate(index.columns)      # отсортированные номера кадров (с 0)
+    next_match(matches, osc_now)                 # следующий подходящий кадр или None
+
+В условии доступны столбцы индекса (dB, Sabs, fmax, dominant_kHz, rms, kurtosis,
+K_mkV, freq_kHz) и frame — номер кадра с 1, как в интерфейсе; числа; сравнения
+(в том числе цепочки 120 <= fmax <= 180); and, or, not; + - * / и abs().
+
+Условие разбирается модулем ast и переводится в векторные операции numpy над
+целыми столбцами (and -> &, or -> |), поэтому выражение не выполняется как код,
+а расчёт по миллиону кадров занимает миллисекунды и не читает осциллограммы.
+"""
+
+import ast
+import operator
+from typing import Callable, Optional
+
+import numpy as np
+
+
+_COMPARE = {
+    ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge,
+    ast.Eq: operator.eq, ast.NotEq: operator.ne,
+}
+_ARITHMETIC = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+}
+_FUNCTIONS = {"abs": np.abs}
+# Столбец с номером кадра (с 1), доступный в любом условии
+FRAME_COLUMN = "frame"
+
+
+class FrameQuery:
+    """
+    Разобранное условие отбора кадров. Ошибки синтаксиса и неизвестные имена — ValueError.
+
+    columns - допустимые имена столбцов (по умолчанию — любые; проверяются при evaluate)
+    """
+
+    def __init__(self, text: str, columns: Optional[set] = None):
+        self.text = text.strip()
+        self.columns = None if columns is None else set(columns) | {FRAME_COLUMN}
+        if not self.text:
+            raise ValueError("Пустое условие")
+        try:
+            tree = ast.parse(self.text, mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Ошибка в условии: {e.msg}") from None
+        self.names: set[str] = set()
+        self._evaluate = self._compile(tree.body)
+
+    def _compile(self, node) -> Callable[[dict], np.ndarray]:
+        """Переводит узел дерева разбора в функцию columns -> массив (или число)."""
+        if isinstance(node, ast.BoolOp):
+            parts = [self._compile(value) for value in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return lambda cols: _reduce(combine, [part(cols) for part in parts])
+        if isinstance(node, ast.UnaryOp):
+            operand = self._compile(node.operand)
+            if isinstance(node.op, ast.Not):
+                return lambda cols: np.logical_not(operand(cols))
+            if isinstance(node.op, ast.USub):
+                return lambda cols: -operand(cols)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+        elif isinstance(node, ast.Compare):
+            ops = [_COMPARE.get(type(op)) for op in node.ops]
+            if None not in ops:
+                terms = [self._compile(node.left)] + [self._compile(c) for c in node.comparators]
+
+                def compare(cols):
+                    values = [term(cols) for term in terms]
+                    return _reduce(np.logical_and, [op(values[i], values[i + 1]) for i, op in enumerate(ops)])
+
+                return compare
+        elif isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+            op = _ARITHMETIC[type(node.op)]
+            left, right = self._compile(node.left), self._compile(node.right)
+            return lambda cols: op(left(cols), right(cols))
+        elif isinstance(node, ast.Call):
+            if (isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS
+                    and len(node.args) == 1 and not node.keywords):
+                func, arg = _FUNCTIONS[node.func.id], self._compile(node.args[0])
+                return lambda cols: func(arg(cols))
+        elif isinstance(node, ast.Name):
+            name = node.id
+            if self.columns is not None and name not in self.columns:
+                raise ValueError(f"Неизвестный столбец: {name} (доступны: {', '.join(sorted(self.columns))})")
+            self.names.add(name)
+            return lambda cols: cols[name]
+        elif isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) \
+                and not isinstance(node.value, bool):
+            value = node.value
+            return lambda cols: value
+        raise ValueError(f"Недопустимое выражение: {ast.unparse(node)}")
+
+    def mask(self, columns: dict, num_osc: Optional[int] = None) -> np.ndarray:
+        """Маска подходящих кадров [num_osc] по столбцам columns ({имя: массив})."""
+        if num_osc is None:
+            num_osc = len(next(iter(columns.values()))) if columns else 0
+        cols = {}
+        for name in self.names:
+            if name == FRAME_COLUMN:
+                cols[name] = np.arange(1, num_osc + 1)
+            elif name in columns:
+                cols[name] = columns[name]
+            else:
+                raise ValueError(f"Неизвестный столбец: {name} (доступны: {', '.join(sorted(columns))})")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = self._evaluate(cols)
+        result = np.asarray(result)
+        if result.dtype != np.bool_:
+            raise ValueError("Условие должно быть сравнением (например, dB >= 60)")
+        return np.broadcast_to(result, (num_osc,))
+
+    def evaluate(self, columns: dict, num_osc: Optional[int] = None) -> np.ndarray:
+        """Отсортированные номера (с 0) кадров, удовлетворяющих условию."""
+        return np.flatnonzero(self.mask(columns, num_osc))
+
+
+def _reduce(func, values: list):
+    result = values[0]
+    for value in values[1:]:
+        result = func(result, value)
+    return result
+
+
+def next_match(matches: np.ndarray, current: int) -> Optional[int]:
+    """Первый подходящий кадр после current (None, если его нет)."""
+    i = int(np.searchsorted(matches, current, side="right"))
+    return int(matches[i]) if i < len(matches) else None
+
+
+def prev_match(matches: np.ndarray, current: int) -> Optional[int]:
+    """Последний подходящий кадр перед current (None, если его нет)."""
+    i = int(np.searchsorted(matches, current, side="left"))
+    return int(matches[i - 1]) if i > 0 else None
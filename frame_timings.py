@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Замер времени этапов отображения кадра (чтение данных, БПФ, АЧХ, отрисовка).
+
+Пример:
+    timings = FrameTimings()
+    timings.begin_frame()
+    with timings.stage("data"):
+        ...
+    with timings.stage("draw"):
+        ...
+    timings.end_frame()
+    timings.summary()   # {"data": {"count": ..., "last": ..., "p50": ..., ...}, "frame": {...}}
+
+Этапы, выполняемые асинхронно (расчёт АЧХ в фоновом потоке), добавляются
+через add(name, seconds) без привязки к кадру. Все значения — в миллисекундах.
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+
+import tracing
+
+
+# Названия этапов для отображения
+STAGE_TITLES = {
+    "data": "данные",
+    "fft": "БПФ",
+    "draw": "отрисовка",
+    "ach": "АЧХ",
+    "ach_draw": "отрисовка АЧХ",
+    "frame": "кадр",
+}
+
+
+class FrameTimings:
+    """
+    История длительностей этапов (последние history значений каждого этапа).
+
+    Этапы между begin_frame() и end_frame() суммируются в этап "frame" —
+    полное время обработки кадра в потоке интерфейса.
+    """
+
+    def __init__(self, history: int = 500):
+        self.history = history
+        self._samples: dict[str, deque] = {}
+        self._frame_start: Optional[float] = None
+        self._frame: dict[str, float] = {}
+        self.last_frame: dict[str, float] = {}
+
+    def clear(self) -> None:
+        self._samples.clear()
+        self._frame_start = None
+        self._frame = {}
+        self.last_frame = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        """Добавляет длительность этапа name (в секундах)."""
+        ms = seconds * 1000.0
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self.history)
+        samples.append(ms)
+        if self._frame_start is not None:
+            self._frame[name] = self._frame.get(name, 0.0) + ms
+
+    @contextmanager
+    def stage(self, name: str):
+        """Контекстный менеджер замера этапа name (при включённой трассировке — и участок трассы)."""
+        t_start = time.perf_counter()
+        try:
+            with tracing.span(f"stage:{name}"):
+                yield
+        finally:
+            self.add(name, time.perf_counter() - t_start)
+
+    def begin_frame(self) -> None:
+        """Начало обработки кадра (незавершённый предыдущий кадр отбрасывается)."""
+        self._frame_start = time.perf_counter()
+        self._frame = {}
+
+    def end_frame(self) -> None:
+        """Конец обработки кадра: сохраняет этапы кадра и полное время в last_frame."""
+        if self._frame_start is None:
+            return
+        total = time.perf_counter() - self._frame_start
+        self._frame_start = None
+        self.add("frame", total)
+        self.last_frame = {**self._frame, "frame": total * 1000.0}
+        self._frame = {}
+
+    def last(self, name: str) -> Optional[float]:
+        """Последняя длительность этапа, мс (None, если замеров не было)."""
+        samples = self._samples.get(name)
+        return samples[-1] if samples else None
+
+    def summary(self) -> dict:
+        """Статистика по этапам, мс: {этап: {count, last, mean, p50, p95, max}}."""
+        result = {}
+        for name, samples in self._samples.items():
+            if not samples:
+                continue
+            values = np.fromiter(samples, dtype=np.float64, count=len(samples))
+            p50, p95 = np.percentile(values, [50, 95])
+            result[name] = {"count": len(values), "last": float(values[-1]), "mean": float(values.mean()),
+                            "p50": float(p50), "p95": float(p95), "max": float(values.max())}
+        return result
+
+    def format_last(self) -> str:
+        """Строка с последними длительностями этапов, например "данные 0.1 мс | БПФ 0.4 мс | ..."."""
+        parts = []
+        for name, title in STAGE_TITLES.items():
+            value = self.last(name)
+            if value is not None:
+                parts.append(f"{title} {value:.1f} мс")
+        return " | ".join(parts)
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Тренд метрик по всему файлу: дБ, доминирующая частота, Sabs и fmax в зависимости
+от номера кадра (по столбцам индекса osc_index, без чтения осциллограмм).
+
+Кривые прореживаются огибающей min/max (decimation.DecimatedCurve), поэтому
+отрисовка не зависит от числа кадров, а одиночные выбросы остаются видны.
+Щелчок по графику выбирает ближайший к курсору кадр в окне нескольких пикселей
+и испускает frame_clicked(номер кадра).
+"""
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtCore import QTimer, pyqtSignal
+from PyQt5.QtWidgets import QLabel, QVBoxLayout, QWidget
+
+from decimation import DecimatedCurve
+
+
+# Столбцы индекса на графиках тренда: (столбец, подпись оси, цвет)
+TREND_COLUMNS = (
+    ("dB", "дБ", (220, 60, 60)),
+    ("dominant_kHz", "кГц", (40, 120, 220)),
+    ("Sabs", "Sabs", (40, 160, 80)),
+    ("fmax", "fmax", (170, 90, 200)),
+)
+# Высота одного графика тренда, пикселей
+ROW_HEIGHT = 55
+# Полуширина окна поиска кадра при щелчке, пикселей
+PICK_RADIUS_PX = 4
+# Минимальный интервал между перемещениями линии текущего кадра, мс
+# (при быстром листании графики тренда не перерисовываются на каждом кадре)
+CURSOR_REFRESH_MS = 100
+
+
+class FrameTrendView(QWidget):
+    """
+    Компактные графики метрик по номеру кадра (общая ось X, номера с 1).
+    Данные задаются set_index(OscIndex); текущий кадр отмечается set_current.
+    """
+
+    frame_clicked = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.values: dict[str, np.ndarray] = {}
+        self.frames = np.empty(0)
+        self.layout_widget = pg.GraphicsLayoutWidget(parent=self)
+        self.layout_widget.ci.setSpacing(0)
+        self.plots = {}
+        self.curves = {}
+        self.cursor_lines = []
+        first = None
+        for row, (name, label, color) in enumerate(TREND_COLUMNS):
+            plot = self.layout_widget.addPlot(row=row, col=0)
+            plot.setMenuEnabled(False)
+            plot.hideButtons()
+            plot.showGrid(x=True, y=True, alpha=0.2)
+            plot.setLabel("left", label)
+            plot.getAxis("left").setWidth(50)
+            plot.setMouseEnabled(x=True, y=False)
+            if row < len(TREND_COLUMNS) - 1:
+                plot.hideAxis("bottom")
+            else:
+                plot.setLabel("bottom", "Номер кадра")
+            if first is None:
+                first = plot
+            else:
+                plot.setXLink(first)
+            curve = plot.plot(pen=pg.mkPen(color))
+            self.curves[name] = DecimatedCurve(curve, plot.getViewBox())
+            line = pg.InfiniteLine(angle=90, pen=pg.mkPen((255, 0, 0, 160)))
+            plot.addItem(line, ignoreBounds=True)
+            self.cursor_lines.append(line)
+            self.plots[name] = plot
+        self.layout_widget.setFixedHeight(ROW_HEIGHT * len(TREND_COLUMNS) + 30)
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("font-size: 11px; color: #666;")
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.layout_widget)
+        layout.addWidget(self.status_label)
+        self.layout_widget.scene().sigMouseClicked.connect(self._on_mouse_clicked)
+        self._current = 0
+        self._cursor_timer = QTimer(self)
+        self._cursor_timer.setSingleShot(True)
+        self._cursor_timer.setInterval(CURSOR_REFRESH_MS)
+        self._cursor_timer.timeout.connect(self._move_cursor)
+
+    def set_index(self, osc_index) -> None:
+        """Показывает столбцы индекса osc_index (OscIndex) по всему файлу."""
+        n = osc_index.num_osc
+        self.frames = np.arange(1, n + 1, dtype=np.float64)
+        self.values = {}
+        for name, _, _ in TREND_COLUMNS:
+            values = np.asarray(osc_index[name], dtype=np.float64) if name in osc_index else np.full(n, np.nan)
+            self.values[name] = values
+            self.curves[name].set_data(self.frames, values)
+        for plot in self.plots.values():
+            plot.enableAutoRange(y=True)
+            plot.setXRange(1, max(n, 2), padding=0.01)
+        self.status_label.setText(f"Тренд метрик: {n} кадров")
+
+    def clear(self, text: str = "") -> None:
+        self.values = {}
+        self.frames = np.empty(0)
+        for curve in self.curves.values():
+            curve.set_data(self.frames, self.frames)
+        self.status_label.setText(text)
+
+    def set_progress(self, done: int, total: int) -> None:
+        """Ход фонового расчёта метрик (пока данных для тренда нет)."""
+        if not self.values:
+            self.status_label.setText(f"Расчёт метрик файла: {done} из {total} кадров")
+
+    def set_current(self, osc_index: int) -> None:
+        """Отмечает текущий кадр вертикальной линией."""
+        self._current = osc_index
+        # Таймер не перезапускается: при непрерывном листании линия всё равно двигается
+        if not self._cursor_timer.isActive():
+            self._cursor_timer.start()
+
+    def _move_cursor(self) -> None:
+        for line in self.cursor_lines:
+            line.setValue(self._current + 1)
+
+    def _on_mouse_clicked(self, evt) -> None:
+        if not self.values:
+            return
+        pos = evt.scenePos()
+        for name, plot in self.plots.items():
+            vb = plot.getViewBox()
+            if not vb.sceneBoundingRect().contains(pos):
+                continue
+            point = vb.mapSceneToView(pos)
+            frame = self.pick_frame(name, point.x(), point.y(), vb.viewPixelSize()[0] * PICK_RADIUS_PX)
+            if frame is not None:
+                self.frame_clicked.emit(frame)
+            return
+
+    def pick_frame(self, name: str, x: float, y: float, radius: float):
+        """
+        Кадр (с 0) в окне [x - radius, x + radius] по оси номеров, значение которого
+        ближе всего к y — чтобы щелчок по выбросу выбирал именно его.
+        """
+        values = self.values.get(name)
+        n = len(self.frames)
+        if values is None or n == 0:
+            return None
+        i0 = int(np.clip(np.floor(x - radius), 1, n)) - 1
+        i1 = int(np.clip(np.ceil(x + radius), 1, n))
+        window = values[i0:i1]
+        if not len(window) or not np.isfinite(window).any():
+            return int(np.clip(round(x), 1, n)) - 1
+        return i0 + int(np.nanargmin(np.abs(window - y)))
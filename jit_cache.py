@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Кэш и прогрев функций numba.
+
+Функции @njit компилируются при первом вызове, что при открытии первого файла
+давало паузу в несколько секунд. Поэтому:
+  * функции компилируются с cache=NUMBA_CACHE — результат компиляции сохраняется
+    на диск (__pycache__ рядом с модулем или каталог пользователя) и при следующих
+    запусках только загружается;
+  * JitWarmup компилирует (или загружает из кэша) все ядра в фоновом потоке,
+    пока пользователь выбирает файл.
+
+В собранной PyInstaller программе исходных .py файлов нет, и кэш numba
+недоступен — там остаётся только фоновый прогрев.
+"""
+
+import sys
+import threading
+
+import numpy as np
+
+
+# Сохранять ли скомпилированные функции на диск
+NUMBA_CACHE = not getattr(sys, "frozen", False)
+
+# Типы отсчётов, с которыми ядра вызываются в программе:
+# int64 — блоки из File_osc, int16 — хранилище osc_store, float64 — расчёты и индекс
+_SAMPLE_DTYPES = (np.int64, np.int16, np.float64)
+
+
+def warm_up() -> None:
+    """Компилирует (или загружает из кэша) ядра numba и импортирует модули расчёта."""
+    from ach_calculator import calc_ach_batch, load_ach_config
+    from decimation import minmax_decimate
+    from Fourier import fill_dataset_for_nulls, four2
+    from work_with_osc import frame_metrics, get_dB_osc
+
+    for dtype in _SAMPLE_DTYPES:
+        block = np.ones((2, 16), dtype=dtype)
+        get_dB_osc(block[0], 1.0)
+        frame_metrics(block, np.ones(2), 1000.0, spectral=False)
+        minmax_decimate(block[0], 4)
+    minmax_decimate(np.ones(16, dtype=np.float32), 4)
+    four2(np.ones(16))
+    fill_dataset_for_nulls(np.ones(4), 8)
+    # Первый вызов calc_ach_batch импортирует scipy.ndimage
+    calc_ach_batch(np.ones((1, 16)), np.ones(1), np.full(1, 1000.0), load_ach_config())
+
+
+class JitWarmup(threading.Thread):
+    """Фоновый прогрев ядер numba (см. warm_up). Ошибки прогрева не мешают работе программы."""
+
+    def __init__(self):
+        super().__init__(name="jit-warmup", daemon=True)
+        self.done = threading.Event()
+
+    def run(self) -> None:
+        try:
+            warm_up()
+        except Exception:
+            # Функции будут скомпилированы при первом вызове
+            pass
+        finally:
+            self.done.set()
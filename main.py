@@ -4,33 +4,326 @@
 Импортирует seeOSC и расширяет его функционалом АЧХ.
 """
 
+import multiprocessing
 import os
 import sys
+import time
+from collections import deque
 
 os.environ['PYQTGRAPH_QT_LIB'] = 'PyQt5'  # До импорта pyqtgraph/Qt
 
 import seeOSC
-from ach_calculator import load_ach_config, calc_ach
+from ach_calculator import AchConfigService, calc_ach_batch
 
 import numpy as np
 import pyqtgraph as pg
 from PyQt5 import QtWidgets
-from PyQt5.QtCore import Qt, QSize, QTimer
+from PyQt5.QtCore import (
+    Qt, QSize, QTimer, QObject, QFileSystemWatcher, QRectF, QRunnable, QThreadPool, pyqtSignal,
+)
 from PyQt5.QtWidgets import (
     QLabel, QVBoxLayout, QPushButton, QWidget, QSplitter,
-    QMessageBox, QFileDialog,
+    QMessageBox, QFileDialog, QTableWidget, QTableWidgetItem, QHeaderView,
 )
-from pyqtgraph.exporters import ImageExporter
+
+
+class AchConfigWatcher(QObject):
+    """Следит за ach_config.json на диске и сообщает об изменении параметров АЧХ."""
+
+    config_changed = pyqtSignal(dict)
+
+    def __init__(self, service: AchConfigService, parent=None):
+        super().__init__(parent)
+        self.service = service
+        self._watcher = QFileSystemWatcher(self)
+        config_dir = os.path.dirname(os.path.abspath(service.config_path))
+        if os.path.isdir(config_dir):
+            self._watcher.addPath(config_dir)
+        if os.path.isfile(service.config_path):
+            self._watcher.addPath(service.config_path)
+        # Файл может сохраняться в несколько приёмов — перечитываем после паузы
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(200)
+        self._timer.timeout.connect(self._reload)
+        self._watcher.fileChanged.connect(self._timer.start)
+        self._watcher.directoryChanged.connect(self._timer.start)
+
+    def _reload(self) -> None:
+        # Редакторы часто сохраняют файл через замену — возвращаем его в список наблюдения
+        path = self.service.config_path
+        if os.path.isfile(path) and path not in self._watcher.files():
+            self._watcher.addPath(path)
+        if self.service.refresh():
+            self.config_changed.emit(self.service.get())
+
+
+class AchRequest:
+    """Данные для расчёта АЧХ одной осциллограммы (снимок, сделанный в потоке интерфейса)."""
+
+    def __init__(self, generation: int, osc_index: int, key, signal: np.ndarray, k_mkV: float,
+                 freq_khz: float, config: dict, requested_at: float):
+        self.generation = generation
+        self.osc_index = osc_index
+        self.key = key
+        self.signal = signal
+        self.k_mkV = k_mkV
+        self.freq_khz = freq_khz
+        self.config = config
+        # Время нажатия клавиши (смены кадра), time.perf_counter()
+        self.requested_at = requested_at
+
+
+class AchJobSignals(QObject):
+    # (AchRequest, результат) — результат None, если расчёт отменён
+    finished = pyqtSignal(object, object)
+
+
+class AchJob(QRunnable):
+    """
+    Расчёт АЧХ в пуле потоков. Если за время ожидания в очереди или расчёта
+    пользователь перешёл к другому кадру (is_stale() == True), результат отбрасывается.
+    """
+
+    def __init__(self, request: AchRequest, spectrum_engine, is_stale, signals: AchJobSignals):
+        super().__init__()
+        self.request = request
+        self.spectrum_engine = spectrum_engine
+        self.is_stale = is_stale
+        self.signals = signals
+
+    def run(self) -> None:
+        result = None
+        try:
+            if not self.is_stale(self.request):
+                t_start = time.perf_counter()
+                result = compute_ach_curve(self.request, self.spectrum_engine)
+                result["seconds"] = time.perf_counter() - t_start
+            if result is not None and self.is_stale(self.request):
+                result = None
+        finally:
+            self.signals.finished.emit(self.request, result)
+
+
+def compute_ach_curve(request: AchRequest, spectrum_engine) -> dict:
+    """
+    АЧХ осциллограммы в диапазоне freq_range конфигурации.
+
+    Returns:
+        dict: freq, ach — кривая для графика; xextr, yextr — положение максимума (None, если кривая пуста);
+        Sabs, fmax — метаданные АЧХ
+    """
+    config = request.config
+    freq_range = config.get("freq_range", [50, 500])
+    fft_size = config.get("fft_size", 8192)
+    # Амплитудный спектр берём из кэша SpectrumEngine (тот же БПФ, что и для графика спектра);
+    # для метода welch спектр рассчитывается в calc_ach_batch по сегментам
+    spectra = None
+    if config.get("method", "fft") == "fft":
+        spectra = spectrum_engine.ach_spectrum(request.key, request.signal, fft_size)[None, :]
+    freq_arr, ach_db, sabs, fmax, _ = calc_ach_batch(
+        request.signal[None, :], np.array([request.k_mkV], dtype=np.float64),
+        np.array([request.freq_khz], dtype=np.float64), config, spectra=spectra,
+    )
+    mask = (freq_arr[0] >= freq_range[0]) & (freq_arr[0] <= freq_range[1])
+    f_plot = np.array(freq_arr[0][mask])
+    a_plot = np.array(ach_db[0][mask])
+    if len(a_plot):
+        idx_max = int(np.argmax(a_plot))
+        xextr, yextr = float(f_plot[idx_max]), float(a_plot[idx_max])
+    else:
+        xextr = yextr = None
+    return {"freq": f_plot, "ach": a_plot, "xextr": xextr, "yextr": yextr,
+            "Sabs": float(sabs[0]), "fmax": float(fmax[0])}
+
+
+class AchCompareSignals(QObject):
+    # (путь, число осциллограмм или None, если файл не открылся)
+    loaded = pyqtSignal(str, object)
+    # (номер кадра, путь, результат compute_frame_ach или None)
+    computed = pyqtSignal(int, str, object)
+
+
+class AchWaterfallView(QWidget):
+    """
+    Водопад АЧХ всего файла: по горизонтали частота, по вертикали номер кадра,
+    цвет — уровень АЧХ в дБ. Заполняется по мере фонового расчёта.
+    Щелчок по строке испускает frame_clicked(номер кадра).
+    """
+
+    frame_clicked = pyqtSignal(int)
+    # (обработано, всего) — из фонового потока расчёта
+    progress_changed = pyqtSignal(int, int)
+
+    # Минимальный интервал между перерисовками изображения, мс
+    REFRESH_MS = 150
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.waterfall = None
+        self._builder = None
+        self._levels = (10, 70)
+
+        self.plot = pg.PlotWidget(parent=self)
+        self.plot.setTitle("Водопад АЧХ")
+        self.plot.setLabel("bottom", "Частота, кГц")
+        self.plot.setLabel("left", "Номер кадра")
+        self.plot.setMinimumSize(QSize(400, 150))
+        self.plot.getViewBox().invertY(True)
+        self.image = pg.ImageItem(axisOrder="row-major")
+        self.image.setColorMap(pg.colormap.get("viridis"))
+        self.plot.addItem(self.image)
+        self.cursor_line = pg.InfiniteLine(angle=0, pen=pg.mkPen((255, 0, 0, 200)))
+        self.plot.addItem(self.cursor_line)
+        self.progress_label = QLabel("")
+        self.progress_label.setStyleSheet("font-size: 11px; color: #666;")
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.plot)
+        layout.addWidget(self.progress_label)
+
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(self.REFRESH_MS)
+        self._refresh_timer.timeout.connect(self.refresh)
+        self.progress_changed.connect(self._on_progress)
+        self.plot.getViewBox().sigRangeChanged.connect(self._schedule_refresh)
+        self.plot.scene().sigMouseClicked.connect(self._on_mouse_clicked)
+
+    def start(self, osc_path: str, num_osc: int, config: dict) -> None:
+        """Начинает расчёт водопада для файла (предыдущий расчёт останавливается)."""
+        from ach_waterfall import AchWaterfall, AchWaterfallBuilder
+
+        self.stop()
+        freq_range = config.get("freq_range", [50, 500])
+        self._levels = tuple(config.get("db_range", [10, 70]))
+        self.waterfall = AchWaterfall(num_osc, freq_range)
+        self._builder = AchWaterfallBuilder(osc_path, config, self.waterfall,
+                                            progress=self.progress_changed.emit)
+        self.progress_label.setText(f"Расчёт: 0 из {num_osc} кадров")
+        self.plot.setXRange(freq_range[0], freq_range[1], padding=0)
+        self.plot.setYRange(0, max(num_osc, 1), padding=0)
+        self._builder.start()
+        self.refresh()
+
+    def stop(self) -> None:
+        if self._builder is not None:
+            self._builder.stop()
+            self._builder = None
+
+    def set_current(self, osc_index: int) -> None:
+        """Отмечает текущий кадр линией."""
+        self.cursor_line.setValue(osc_index + 0.5)
+
+    def _on_progress(self, done: int, total: int) -> None:
+        text = f"Расчёт: {done} из {total} кадров" if done < total else f"Рассчитано {total} кадров"
+        self.progress_label.setText(text)
+        self._schedule_refresh()
+
+    def _schedule_refresh(self, *args) -> None:
+        # Таймер не перезапускается: при непрерывном потоке событий изображение всё равно обновляется
+        if not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+
+    def refresh(self) -> None:
+        """Перерисовывает видимую часть водопада на подходящем уровне пирамиды."""
+        waterfall = self.waterfall
+        if waterfall is None or waterfall.num_osc == 0:
+            return
+        vb = self.plot.getViewBox()
+        (_, _), (y0, y1) = vb.viewRange()
+        # Строк изображения — не больше, чем примерно два на пиксель высоты графика
+        max_rows = max(64, int(vb.height()) * 2)
+        image, frame_start, frame_end = waterfall.view(int(np.floor(y0)), int(np.ceil(y1)), max_rows)
+        if len(image) == 0:
+            return
+        self.image.setImage(image, autoLevels=False, levels=self._levels)
+        f0, f1 = waterfall.freq_range
+        self.image.setRect(QRectF(f0, frame_start, f1 - f0, frame_end - frame_start))
+
+    def _on_mouse_clicked(self, evt) -> None:
+        waterfall = self.waterfall
+        vb = self.plot.getViewBox()
+        if waterfall is None or not vb.sceneBoundingRect().contains(evt.scenePos()):
+            return
+        row = int(np.floor(vb.mapSceneToView(evt.scenePos()).y()))
+        if 0 <= row < waterfall.num_osc:
+            self.frame_clicked.emit(row)
 
 
 class MainMenuWithACH(seeOSC.MainMenu):
     """Расширение MainMenu функционалом расчёта и сохранения АЧХ."""
 
+    # Пауза, в течение которой запросы на расчёт АЧХ объединяются, мс
+    ACH_DEBOUNCE_MS = 10
+    # Период перерисовки статистики АЧХ по файлу во время расчёта, мс
+    ACH_STATS_REFRESH_MS = 300
+
+    # Статистика АЧХ по файлу: (обработано кадров, всего) — из фонового потока
+    ach_stats_progress = pyqtSignal(int, int)
+
     def __init__(self):
         super().__init__()
+        # Конфигурация АЧХ читается один раз и перечитывается при изменении файла
+        self.ach_config = AchConfigService()
+        self.ach_config_watcher = AchConfigWatcher(self.ach_config, self)
+        self.ach_config_watcher.config_changed.connect(self._on_ach_config_changed)
+
+        # АЧХ считается в отдельном потоке: одновременно выполняется не более одного расчёта,
+        # запросы, пришедшие за это время, схлопываются в один — для последнего кадра
+        self._ach_pool = QThreadPool(self)
+        self._ach_pool.setMaxThreadCount(1)
+        self._ach_signals = AchJobSignals(self)
+        self._ach_signals.finished.connect(self._on_ach_computed)
+        self._ach_generation = 0
+        self._ach_pending = None
+        self._ach_running = False
+        self._ach_debounce = QTimer(self)
+        self._ach_debounce.setSingleShot(True)
+        self._ach_debounce.setInterval(self.ACH_DEBOUNCE_MS)
+        self._ach_debounce.timeout.connect(self._submit_ach_request)
+        # Задержка от нажатия клавиши до отображения АЧХ, мс (последние расчёты)
+        self.ach_latency_ms = deque(maxlen=500)
+        # Водопад АЧХ всего файла (создаётся при первом включении)
+        self.ach_waterfall_view = None
+        self._ach_waterfall_source = None
+        # Сравнение АЧХ с другими файлами (пул процессов создаётся при первом сравнении)
+        self.ach_comparison = None
+        self._ach_compare_signals = AchCompareSignals(self)
+        self._ach_compare_signals.loaded.connect(self._on_ach_compare_loaded)
+        self._ach_compare_signals.computed.connect(self._on_ach_compare_computed)
+        self.ach_compare_curves = {}
+        self.ach_compare_table = None
+        self.ach_sabs = None
+        self.ach_fmax = None
+        # Статистика АЧХ по всем кадрам файла (полоса P5–P95, среднее, медиана)
+        self._ach_stats_builder = None
+        self.ach_stats_items = None
+        self.ach_stats_progress.connect(self._on_ach_stats_progress)
+        self._ach_stats_timer = QTimer(self)
+        self._ach_stats_timer.setSingleShot(True)
+        self._ach_stats_timer.setInterval(self.ACH_STATS_REFRESH_MS)
+        self._ach_stats_timer.timeout.connect(self._draw_ach_stats)
 
         self.isInitialization = True
 
+    def _index_config(self) -> dict:
+        """Индекс метрик строится по той же конфигурации АЧХ, что и графики."""
+        return self.ach_config.get()
+
+    def _on_ach_config_changed(self, config: dict) -> None:
+        """Пересчитывает АЧХ с новыми параметрами после изменения ach_config.json."""
+        self.spectrum_engine.fft_size = config["fft_size"]
+        if hasattr(self, "osc_file") and hasattr(self, "num_osc"):
+            # Sabs и fmax в индексе зависят от параметров АЧХ
+            self._open_osc_index()
+            self._recalc_ach_for_current()
+            self._request_ach_compare()
+            self._ach_waterfall_source = None
+            self._update_ach_waterfall()
+            self._update_ach_stats()
+
     def _refresh_ach_coords_label(self, cursor_x=None, cursor_y=None) -> None:
         """Обновляет метку АЧХ: курсор X/Y и Xextr/Yextr. Вызывается при пересчёте и при движении мыши."""
         if not hasattr(self, "coords_label_ach"):
@@ -69,6 +362,26 @@ class MainMenuWithACH(seeOSC.MainMenu):
         self.bttn_save_ach_png.setEnabled(False)
         self.main_layout_v.addWidget(self.bttn_save_ach_png)
 
+        self.bttn_ach_waterfall = QPushButton("Водопад АЧХ по всему файлу")
+        self.bttn_ach_waterfall.setCheckable(True)
+        self.bttn_ach_waterfall.toggled.connect(self._on_toggled_ach_waterfall)
+        self.main_layout_v.addWidget(self.bttn_ach_waterfall)
+
+        self.bttn_ach_stats = QPushButton("Статистика АЧХ по файлу")
+        self.bttn_ach_stats.setCheckable(True)
+        self.bttn_ach_stats.toggled.connect(self._update_ach_stats)
+        self.main_layout_v.addWidget(self.bttn_ach_stats)
+
+        # Сравнение с файлами других ПАЭ: тот же номер кадра во всех файлах
+        self.osc_now_changed.connect(self._request_ach_compare)
+        self.bttn_ach_compare = QPushButton("Сравнить АЧХ с другими файлами")
+        self.bttn_ach_compare.clicked.connect(self._on_clicked_ach_compare)
+        self.main_layout_v.addWidget(self.bttn_ach_compare)
+        self.bttn_ach_compare_clear = QPushButton("Убрать сравнение")
+        self.bttn_ach_compare_clear.clicked.connect(self.clear_ach_compare)
+        self.bttn_ach_compare_clear.setEnabled(False)
+        self.main_layout_v.addWidget(self.bttn_ach_compare_clear)
+
     def _ensure_ach_plot_exists(self) -> None:
         """Создаёт график АЧХ при первом расчёте с возможностью растягивания по ширине и высоте."""
         if hasattr(self, "now_plot_ach"):
@@ -81,12 +394,25 @@ class MainMenuWithACH(seeOSC.MainMenu):
         self.coords_label_ach = QLabel("X: —  Y: —")
         self.ach_xextr = None
         self.ach_yextr = None
+        # Кривая АЧХ создаётся один раз, при смене кадра меняются только её данные
+        self.ach_curve = self.now_plot_ach.plot(pen=pg.mkColor((255, 0, 0, 180)), name="")
+        from decimation import DecimatedCurve
+        self.ach_curve_lod = DecimatedCurve(self.ach_curve, self.now_plot_ach.getViewBox())
+        self._ach_view_ranges = None
+        self.now_plot_ach.setLabel("bottom", "Частота, кГц")
+        self.now_plot_ach.setLabel("left", "дБ отн. 1 В/(м/с)")
         self.coords_label_ach.setStyleSheet("font-size: 11px; color: #666;")
+        self.latency_label_ach = QLabel("")
+        self.latency_label_ach.setStyleSheet("font-size: 11px; color: #666;")
+        self.ach_stats_label = QLabel("")
+        self.ach_stats_label.setStyleSheet("font-size: 11px; color: #666;")
         self.ach_container = QWidget()
         ach_vbox = QVBoxLayout(self.ach_container)
         ach_vbox.setContentsMargins(0, 0, 0, 0)
         ach_vbox.addWidget(self.now_plot_ach)
         ach_vbox.addWidget(self.coords_label_ach)
+        ach_vbox.addWidget(self.latency_label_ach)
+        ach_vbox.addWidget(self.ach_stats_label)
         self.ach_width_spacer = QWidget()
         self.ach_width_spacer.setMinimumSize(30, 30)
         self.ach_h_splitter = QSplitter(Qt.Horizontal)
@@ -104,77 +430,309 @@ class MainMenuWithACH(seeOSC.MainMenu):
 
     def _open_osc(self, name_osc: str) -> None:
         """Переопределение: после загрузки файла автоматически рассчитываем АЧХ."""
+        # Спектр на графике и спектр для АЧХ считаются одним БПФ размера fft_size
+        self.spectrum_engine.fft_size = self.ach_config.get()["fft_size"]
         super()._open_osc(name_osc)
         if hasattr(self, "osc_file") and hasattr(self, "num_osc"):
             self._recalc_ach_for_current()
+            if self.ach_compare_table is not None and self.ach_compare_table.rowCount():
+                self._set_ach_compare_name(0, self.name_osc, self.num_osc)
+            self._request_ach_compare()
+            self._ach_waterfall_source = None
+            self._update_ach_waterfall()
+            self._update_ach_stats()
 
     def _recalc_ach_for_current(self, _osc_index=None) -> None:
-        """Рассчитывает АЧХ для текущей осциллограммы. Вызывается при смене кадра (сигнал osc_now_changed)."""
+        """
+        Запрашивает расчёт АЧХ для текущей осциллограммы (сигнал osc_now_changed).
+        Расчёт выполняется в фоновом потоке; более ранние незавершённые запросы отменяются.
+        """
         if not hasattr(self, "osc_file") or not hasattr(self, "num_osc"):
             return
-        idx_from = idx_to = self.osc_now
+        requested_at = time.perf_counter()
+        idx = self.osc_now
 
         self._ensure_ach_plot_exists()
 
-        config = load_ach_config()
+        config = self.ach_config.get()
+        self.spectrum_engine.fft_size = config.get("fft_size", 8192)
+
+        if self.start_data_osc <= idx < self.end_data_osc:
+            signal = self._frame_row(idx - self.start_data_osc)
+            k_mkV = self.K_mkV[idx - self.start_data_osc]
+        else:
+            block_start, _, osc_datas, K_mkV, _, lengths = self.frame_cache.get(idx)
+            signal = osc_datas[idx - block_start, :lengths[idx - block_start]]
+            k_mkV = K_mkV[idx - block_start]
+
+        self._ach_generation += 1
+        self._ach_pending = AchRequest(
+            self._ach_generation, idx, (self.name_osc, idx), signal, float(k_mkV),
+            self._osc_freq_khz(idx), config, requested_at,
+        )
+        # Таймер не перезапускается, чтобы при частых запросах АЧХ всё равно обновлялась
+        if not self._ach_debounce.isActive():
+            self._ach_debounce.start()
+
+    def _is_ach_request_stale(self, request: AchRequest) -> bool:
+        """Запрос устарел, если после него был запрошен расчёт для другого кадра."""
+        return request.generation != self._ach_generation
+
+    def _submit_ach_request(self) -> None:
+        if self._ach_running or self._ach_pending is None:
+            # Расчёт уже идёт — последний запрос будет отправлен по его завершении
+            return
+        request, self._ach_pending = self._ach_pending, None
+        self._ach_running = True
+        self._ach_pool.start(AchJob(request, self.spectrum_engine, self._is_ach_request_stale,
+                                    self._ach_signals))
+
+    def _on_ach_computed(self, request: AchRequest, result) -> None:
+        """Отображает рассчитанную АЧХ (в потоке интерфейса) и отправляет следующий запрос."""
+        self._ach_running = False
+        if result is not None and not self._is_ach_request_stale(request):
+            self.frame_timings.add("ach", result["seconds"])
+            with self.frame_timings.stage("ach_draw"):
+                self._draw_ach(request, result)
+            self.ach_latency_ms.append((time.perf_counter() - request.requested_at) * 1000)
+            self._refresh_ach_latency_label()
+            self._refresh_timings_label()
+        if self._ach_pending is not None and not self._ach_debounce.isActive():
+            self._submit_ach_request()
+
+    def _draw_ach(self, request: AchRequest, result: dict) -> None:
+        config = request.config
         freq_range = config.get("freq_range", [50, 500])
         db_range = config.get("db_range", [10, 70])
-        fD_default = config.get("fD_kHz", 1000)
 
-        if idx_from < self.start_data_osc or idx_to >= self.end_data_osc:
-            batch_start = max(0, (idx_from // 500) * 500)
-            batch_end = min(self.num_osc, batch_start + max(500, idx_to - idx_from + 1))
-            osc_batch = np.array(self.osc_file.getDotsOSC(batch_start, batch_end))
-            k_mkV_batch = np.array(self.osc_file.get_K_mkV(batch_start, batch_end))
-        else:
-            batch_start = self.start_data_osc
-            osc_batch = self.osc_datas
-            k_mkV_batch = self.K_mkV
-
-        self.now_plot_ach.clear()
-        colors = [
-            (255, 0, 0, 180), (0, 128, 0, 180), (0, 0, 255, 180),
-            (255, 165, 0, 180), (148, 0, 211, 180), (255, 192, 203, 180),
-        ]
-        all_f_plot = []
-        all_a_plot = []
-
-        for i, idx in enumerate(range(idx_from, idx_to + 1)):
-            local_idx = idx - batch_start
-            osc_data = osc_batch[local_idx]
-            k_mkV = float(k_mkV_batch[local_idx])
-            try:
-                freq_osc = self.osc_file.oscDefMod[idx].freq
-            except (AttributeError, IndexError):
-                freq_osc = fD_default
-            freq_arr, ach_db, _ = calc_ach(osc_data, k_mkV, freq_osc, config)
-            mask = (freq_arr >= freq_range[0]) & (freq_arr <= freq_range[1])
-            f_plot = freq_arr[mask]
-            a_plot = ach_db[mask]
-            all_f_plot.append(f_plot)
-            all_a_plot.append(a_plot)
-            color = colors[i % len(colors)]
-            curve_name = f"№ {idx + 1}"
-            self.now_plot_ach.plot(f_plot, a_plot, pen=pg.mkColor(color), name=curve_name)
-
-        if all_f_plot and all_a_plot:
-            f_all = np.concatenate(all_f_plot)
-            a_all = np.concatenate(all_a_plot)
-            idx_max = np.argmax(a_all)
-            self.ach_xextr = float(f_all[idx_max])
-            self.ach_yextr = float(a_all[idx_max])
-        else:
-            self.ach_xextr = None
-            self.ach_yextr = None
+        self.ach_curve_lod.set_data(result["freq"], result["ach"])
+        legend = self.now_plot_ach.plotItem.legend
+        if legend is not None and legend.getLabel(self.ach_curve) is not None:
+            legend.getLabel(self.ach_curve).setText(f"№ {request.osc_index + 1}")
+        self.ach_xextr = result["xextr"]
+        self.ach_yextr = result["yextr"]
+        self.ach_sabs = result["Sabs"]
+        self.ach_fmax = result["fmax"]
+        if self.ach_compare_table is not None:
+            self._set_ach_compare_row(0, self.ach_sabs, self.ach_fmax)
 
         self._refresh_ach_coords_label(cursor_x=None, cursor_y=None)
 
-        self.now_plot_ach.setXRange(freq_range[0], freq_range[1])
-        self.now_plot_ach.setYRange(db_range[0], db_range[1])
-        self.now_plot_ach.setLabel("bottom", "Частота, кГц")
-        self.now_plot_ach.setLabel("left", "дБ отн. 1 В/(м/с)")
+        # Диапазоны осей задаются заново только при изменении конфигурации
+        view_ranges = (tuple(freq_range), tuple(db_range))
+        if view_ranges != self._ach_view_ranges:
+            self._ach_view_ranges = view_ranges
+            self.now_plot_ach.setXRange(freq_range[0], freq_range[1])
+            self.now_plot_ach.setYRange(db_range[0], db_range[1])
         self.bttn_save_ach_png.setEnabled(True)
 
+    def ach_latency_stats(self) -> dict:
+        """Задержка от смены кадра до отображения АЧХ, мс: count, last, p50, p95, max."""
+        if not self.ach_latency_ms:
+            return {"count": 0, "last": None, "p50": None, "p95": None, "max": None}
+        values = np.fromiter(self.ach_latency_ms, dtype=np.float64)
+        p50, p95 = np.percentile(values, [50, 95])
+        return {"count": len(values), "last": float(values[-1]), "p50": float(p50),
+                "p95": float(p95), "max": float(values.max())}
+
+    def _refresh_ach_latency_label(self) -> None:
+        stats = self.ach_latency_stats()
+        if stats["count"]:
+            self.latency_label_ach.setText(
+                f"АЧХ: {stats['last']:.0f} мс (медиана {stats['p50']:.0f} мс, p95 {stats['p95']:.0f} мс)"
+            )
+
+    def _on_toggled_ach_waterfall(self, checked: bool) -> None:
+        """Показывает или скрывает водопад АЧХ; расчёт запускается при первом показе для файла."""
+        if checked and self.ach_waterfall_view is None:
+            self.ach_waterfall_view = AchWaterfallView(self)
+            self.ach_waterfall_view.frame_clicked.connect(self._goto_osc_from_waterfall)
+            self.osc_now_changed.connect(self.ach_waterfall_view.set_current)
+            self.plots_splitter.addWidget(self.ach_waterfall_view)
+        if self.ach_waterfall_view is not None:
+            self.ach_waterfall_view.setVisible(checked)
+        self._update_ach_waterfall()
+
+    def _update_ach_waterfall(self) -> None:
+        """Запускает расчёт водопада для открытого файла, если водопад показан и ещё не рассчитан."""
+        view = self.ach_waterfall_view
+        if view is None or not self.bttn_ach_waterfall.isChecked() or not hasattr(self, "num_osc"):
+            return
+        source = (self.name_osc, self.num_osc)
+        if source != self._ach_waterfall_source:
+            self._ach_waterfall_source = source
+            view.start(self.name_osc, self.num_osc, self.ach_config.get())
+        view.set_current(self.osc_now)
+
+    def _goto_osc_from_waterfall(self, osc_index: int) -> None:
+        """Переход к кадру, выбранному щелчком по водопаду."""
+        self.edit_osc_num.setText(str(osc_index + 1))
+        self._goto_osc_by_edit()
+
+    def _update_ach_stats(self, _checked=None) -> None:
+        """
+        Запускает расчёт статистики АЧХ по всем кадрам открытого файла (кнопка нажата)
+        или убирает её с графика. Расчёт перезапускается при открытии другого файла
+        и при изменении конфигурации АЧХ.
+        """
+        from ach_stats import AchStatsBuilder
+
+        if self._ach_stats_builder is not None:
+            self._ach_stats_builder.stop()
+            self._ach_stats_builder = None
+        self._ach_stats_timer.stop()
+        enabled = self.bttn_ach_stats.isChecked() and hasattr(self, "name_osc")
+        if self.ach_stats_items is not None:
+            for item in self.ach_stats_items.values():
+                item.setVisible(False)
+        if not enabled:
+            self.ach_stats_label.setText("")
+            return
+        self._ensure_ach_plot_exists()
+        self.ach_stats_label.setText("Статистика АЧХ: расчёт...")
+        self._ach_stats_builder = AchStatsBuilder(self.name_osc, self.ach_config.get(),
+                                                  progress=self.ach_stats_progress.emit)
+        self._ach_stats_builder.start()
+
+    def _on_ach_stats_progress(self, done: int, total: int) -> None:
+        builder = self._ach_stats_builder
+        if builder is None:
+            return
+        self.ach_stats_label.setText(f"Статистика АЧХ: {done} из {total} кадров")
+        if done >= total:
+            self._ach_stats_timer.stop()
+            self._draw_ach_stats()
+        elif not self._ach_stats_timer.isActive():
+            self._ach_stats_timer.start()
+
+    def _ensure_ach_stats_items(self) -> None:
+        if self.ach_stats_items is not None:
+            return
+        plot = self.now_plot_ach
+        p5 = pg.PlotDataItem(pen=pg.mkPen((70, 110, 200, 120)))
+        p95 = pg.PlotDataItem(pen=pg.mkPen((70, 110, 200, 120)))
+        band = pg.FillBetweenItem(p5, p95, brush=pg.mkBrush(70, 110, 200, 50))
+        plot.addItem(band)
+        plot.addItem(p5)
+        plot.addItem(p95)
+        mean = plot.plot(pen=pg.mkPen((30, 60, 160), width=2), name="Среднее по файлу")
+        median = plot.plot(pen=pg.mkPen((30, 60, 160), style=Qt.DashLine), name="Медиана (P50)")
+        self.ach_stats_items = {"band": band, "p5": p5, "p95": p95, "mean": mean, "p50": median}
+
+    def _draw_ach_stats(self) -> None:
+        """Отображает накопленную статистику АЧХ: полоса P5–P95, среднее и медиана."""
+        builder = self._ach_stats_builder
+        if builder is None or builder.stats is None:
+            return
+        result = builder.stats.result()
+        self._ensure_ach_stats_items()
+        freq = result["freq"]
+        for name in ("p5", "p95", "mean", "p50"):
+            # Частоты без данных (NaN) не отображаются
+            self.ach_stats_items[name].setData(freq, result[name], connect="finite")
+        for item in self.ach_stats_items.values():
+            item.setVisible(True)
+
+    def _on_clicked_ach_compare(self) -> None:
+        """Выбор файлов других ПАЭ для сравнения АЧХ."""
+        paths, _ = QFileDialog.getOpenFileNames(self, "Файлы для сравнения", "", "osc files (*.osc)")
+        if paths:
+            self.open_ach_compare(paths)
+
+    def open_ach_compare(self, paths: list, mp_context=None) -> None:
+        """
+        Открывает файлы для сравнения АЧХ (файлы открываются и рассчитываются в пуле процессов).
+        Их АЧХ накладываются на график АЧХ, Sabs и fmax выводятся в таблицу.
+        """
+        from ach_compare import AchComparison
+
+        self.clear_ach_compare()
+        paths = [p for p in dict.fromkeys(paths) if p != getattr(self, "name_osc", None)]
+        if not paths:
+            return
+        if self.ach_comparison is None:
+            self.ach_comparison = AchComparison(self._ach_compare_signals.loaded.emit,
+                                                self._ach_compare_signals.computed.emit,
+                                                max_workers=min(len(paths), os.cpu_count() or 1),
+                                                mp_context=mp_context)
+        self._ensure_ach_plot_exists()
+        self._ensure_ach_compare_table()
+        config = self.ach_config.get()
+        self.ach_comparison.open(paths, config)
+
+        self.ach_compare_table.setRowCount(len(paths) + 1)
+        self._set_ach_compare_name(0, getattr(self, "name_osc", ""), getattr(self, "num_osc", None))
+        self._set_ach_compare_row(0, self.ach_sabs, self.ach_fmax)
+        for row, path in enumerate(paths, start=1):
+            color = pg.intColor(row - 1, hues=max(len(paths), 9))
+            self.ach_compare_curves[path] = self.now_plot_ach.plot(pen=color, name=os.path.basename(path))
+            self._set_ach_compare_name(row, path, None)
+            self._set_ach_compare_row(row, None, None)
+        self.ach_compare_table.show()
+        self.bttn_ach_compare_clear.setEnabled(True)
+        self._request_ach_compare()
+
+    def clear_ach_compare(self) -> None:
+        """Убирает файлы сравнения с графика АЧХ и останавливает пул процессов."""
+        if self.ach_comparison is not None:
+            self.ach_comparison.close()
+            self.ach_comparison = None
+        for curve in self.ach_compare_curves.values():
+            self.now_plot_ach.removeItem(curve)
+        self.ach_compare_curves = {}
+        if self.ach_compare_table is not None:
+            self.ach_compare_table.setRowCount(0)
+            self.ach_compare_table.hide()
+        if hasattr(self, "bttn_ach_compare_clear"):
+            self.bttn_ach_compare_clear.setEnabled(False)
+
+    def _ensure_ach_compare_table(self) -> None:
+        if self.ach_compare_table is not None:
+            return
+        self.ach_compare_table = QTableWidget(0, 4)
+        self.ach_compare_table.setHorizontalHeaderLabels(["Файл", "Кадров", "Sabs, дБ", "fmax, кГц"])
+        self.ach_compare_table.verticalHeader().hide()
+        self.ach_compare_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.ach_compare_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.ach_compare_table.setMaximumHeight(160)
+        self.ach_container.layout().addWidget(self.ach_compare_table)
+
+    def _set_ach_compare_name(self, row: int, path: str, num_osc) -> None:
+        self.ach_compare_table.setItem(row, 0, QTableWidgetItem(os.path.basename(path)))
+        self.ach_compare_table.setItem(row, 1, QTableWidgetItem("—" if num_osc is None else str(num_osc)))
+
+    def _set_ach_compare_row(self, row: int, sabs, fmax) -> None:
+        self.ach_compare_table.setItem(row, 2, QTableWidgetItem("—" if sabs is None else f"{sabs:.1f}"))
+        self.ach_compare_table.setItem(row, 3, QTableWidgetItem("—" if fmax is None else f"{fmax:.1f}"))
+
+    def _request_ach_compare(self, _osc_index=None) -> None:
+        """Запрашивает АЧХ текущего кадра во всех файлах сравнения (синхронная навигация)."""
+        if self.ach_comparison is None or not hasattr(self, "osc_now"):
+            return
+        self.ach_comparison.request(self.osc_now, self.ach_config.get())
+
+    def _on_ach_compare_loaded(self, path: str, num_osc) -> None:
+        if self.ach_comparison is None or path not in self.ach_comparison.paths:
+            return
+        row = self.ach_comparison.paths.index(path) + 1
+        self._set_ach_compare_name(row, path, num_osc)
+        if num_osc is None:
+            self.ach_compare_table.item(row, 1).setText("ошибка")
+
+    def _on_ach_compare_computed(self, osc_index: int, path: str, result) -> None:
+        """Отображает АЧХ кадра файла сравнения (в потоке интерфейса)."""
+        curve = self.ach_compare_curves.get(path)
+        if curve is None or self.ach_comparison is None:
+            return
+        row = self.ach_comparison.paths.index(path) + 1
+        if result is None:
+            # В файле нет кадра с таким номером (или файл не открылся)
+            curve.setData([], [])
+            self._set_ach_compare_row(row, None, None)
+            return
+        curve.setData(result["freq"], result["ach"])
+        self._set_ach_compare_row(row, result["Sabs"], result["fmax"])
+
     def _on_clicked_save_ach_png(self) -> None:
         """Сохраняет график АЧХ в PNG."""
         if not hasattr(self, "now_plot_ach"):
@@ -186,6 +744,7 @@ class MainMenuWithACH(seeOSC.MainMenu):
             return
         if not path.endswith(".png"):
             path += ".png"
+        from pyqtgraph.exporters import ImageExporter
         exporter = ImageExporter(self.now_plot_ach.plotItem)
         exporter.export(path)
 
@@ -198,8 +757,15 @@ class App(seeOSC.SeeOSC):
         self.setCentralWidget(self.menu)
         self.show()
 
+    def closeEvent(self, event):
+        # Процессы пула сравнения АЧХ не должны пережить окно
+        self.menu.clear_ach_compare()
+        super().closeEvent(event)
+
 
 if __name__ == "__main__":
+    # Процессы пула сравнения АЧХ в собранной программе запускаются тем же exe
+    multiprocessing.freeze_support()
     try:
         app = QtWidgets.QApplication([])
         ex = App()
@@ -2,22 +2,20 @@
 # oscAfc: SeeOSC + расчёт АЧХ. Точка входа — main.py
 
 import os
-from PyInstaller.utils.hooks import collect_all, collect_submodules, collect_data_files
+from PyInstaller.utils.hooks import collect_submodules
 block_cipher = None
 SPECPATH = os.path.dirname(os.path.abspath(SPEC))
 
-def enhanced_collect(pkg_name):
-    """Собирает datas, binaries и hiddenimports для пакета."""
-    datas, binaries, hiddenimports = collect_all(pkg_name)
-    hiddenimports += collect_submodules(pkg_name)
-    return datas, binaries, hiddenimports
+# Пакеты, которые программа не использует: не попадают в сборку и не распаковываются при запуске
+UNUSED_PACKAGES = ('numba.cuda', 'numba.tests', 'numba.testing', 'numpy.tests', 'numpy.distutils', 'tkinter')
 
-# scipy для ach_calculator (uniform_filter1d)
-scipy_datas, scipy_binaries, scipy_hiddenimports = enhanced_collect('scipy')
-# numpy для всех модулей
-numpy_datas, numpy_binaries, numpy_hiddenimports = enhanced_collect('numpy')
-# numba — все подмодули (включая old_scalars, old_models, old_builtins и др.)
-numba_hiddenimports = collect_submodules('numba')
+# numba импортирует часть своих подмодулей динамически (old_scalars, old_models,
+# old_builtins и др.), поэтому они перечисляются явно — кроме неиспользуемых
+numba_hiddenimports = collect_submodules('numba', filter=lambda name: not name.startswith(UNUSED_PACKAGES))
+
+# numpy и scipy собираются стандартными хуками PyInstaller по импортам программы:
+# из scipy нужен только scipy.ndimage (uniform_filter1d в ach_calculator), он импортируется
+# внутри функции и указывается явно; collect_all('scipy') добавлял все подмодули scipy
 
 a = Analysis(
     ['main.py'],
@@ -27,16 +25,9 @@ a = Analysis(
         ('C:/Windows/System32/mfc140.dll', '.'),
         ('C:/Windows/System32/msvcp140.dll', '.'),
         ('C:/Windows/System32/vccorlib140.dll', '.'),
-        *scipy_binaries,
-        *numpy_binaries
-    ],
-    datas=[
-        *scipy_datas,
-        *numpy_datas,
     ],
+    datas=[],
     hiddenimports=[
-        *scipy_hiddenimports,
-        *numpy_hiddenimports,
         'scipy.ndimage',
         *numba_hiddenimports,
         'pyqtgraph',
@@ -49,7 +40,7 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=list(UNUSED_PACKAGES),
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+Индекс метрик осциллограмм .osc файла (файл-спутник <имя>.osc.idx).
+
+Для каждой осциллограммы хранятся K_mkV, частота дискретизации, уровень в дБ,
+доминирующая частота спектра, Sabs и fmax АЧХ, СКЗ и коэффициент эксцесса —
+в виде отдельных столбцов.
+Индекс строится один раз (в фоновом потоке) и при следующих открытиях файла
+отображается в память (memmap), поэтому статистика по всему файлу доступна сразу.
+
+Индекс считается действительным, если совпадают размер .osc файла, время его
+изменения (или, если оно изменилось, например при копировании, — хэш содержимого),
+а также параметры АЧХ, от которых зависят Sabs и fmax.
+
+Формат файла:
+    8 байт   — сигнатура b"OSCIDX01"
+    4 байта  — длина JSON-заголовка (uint32, little-endian)
+    заголовок JSON (описание столбцов) и данные столбцов, выровненные по 64 байтам
+"""
+
+import hashlib
+import json
+import os
+import struct
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+import tracing
+from ach_calculator import calc_ach_batch
+from work_with_osc import frame_metrics, get_freq_khz, osc_rows_to_block
+
+
+INDEX_MAGIC = b"OSCIDX01"
+INDEX_VERSION = 3
+_ALIGN = 64
+# Объём данных с начала и с конца файла, по которому считается хэш содержимого
+_HASH_CHUNK = 1 << 20
+# Кроме начала и конца, в хэш входят _HASH_SAMPLES равномерно расположенных участков середины файла
+_HASH_SAMPLES = 16
+_HASH_SAMPLE_CHUNK = 1 << 16
+
+COLUMNS = {
+    "K_mkV": np.float64,
+    "freq_kHz": np.float32,
+    "dB": np.int16,
+    "dominant_kHz": np.float32,
+    "Sabs": np.float32,
+    "fmax": np.float32,
+    "rms": np.float32,
+    "kurtosis": np.float32,
+}
+
+# Параметры АЧХ, от которых зависят Sabs и fmax
+_ACH_KEYS = ("refGT200", "SGT200", "fft_size", "smooth_window", "skip_bins",
+             "method", "welch_segment", "welch_overlap", "welch_window")
+
+
+def index_path(osc_path: str) -> str:
+    """Путь к файлу индекса для .osc файла."""
+    return osc_path + ".idx"
+
+
+def file_signature(osc_path: str) -> dict:
+    """Размер, время изменения и хэш (начало, конец и участки середины файла) .osc файла."""
+    stat = os.stat(osc_path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(osc_path, "rb") as f:
+        digest.update(f.read(_HASH_CHUNK))
+        middle_end = stat.st_size - _HASH_CHUNK
+        if middle_end > _HASH_CHUNK:
+            for pos in np.linspace(_HASH_CHUNK, middle_end, _HASH_SAMPLES + 2)[1:-1].astype(np.int64):
+                f.seek(int(pos))
+                digest.update(f.read(_HASH_SAMPLE_CHUNK))
+        if stat.st_size > _HASH_CHUNK:
+            f.seek(max(_HASH_CHUNK, middle_end))
+            digest.update(f.read(_HASH_CHUNK))
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest.hexdigest()}
+
+
+def signature_matches(osc_path: str, signature: dict) -> bool:
+    """
+    Соответствует ли .osc файл сохранённой сигнатуре file_signature.
+
+    Размер должен совпадать всегда; хэш начала, конца и _HASH_SAMPLES участков из
+    середины файла сверяется, только если изменилось время изменения (копирование
+    без изменения содержимого).
+    """
+    stat = os.stat(osc_path)
+    if signature.get("size") != stat.st_size:
+        return False
+    if signature.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    return file_signature(osc_path)["hash"] == signature.get("hash")
+
+
+def _ach_params(config: dict) -> dict:
+    return {key: config.get(key) for key in _ACH_KEYS}
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class OscIndex:
+    """
+    Столбцы метрик осциллограмм .osc файла.
+
+    Доступ к столбцу: index["dB"], index["Sabs"] и т.д. (np.ndarray длины num_osc).
+    """
+
+    def __init__(self, path: str, header: dict, columns: dict):
+        self.path = path
+        self.header = header
+        self.columns = columns
+
+    @property
+    def num_osc(self) -> int:
+        return self.header["num_osc"]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+
+def _read_header(path: str) -> tuple[dict, int]:
+    with open(path, "rb") as f:
+        if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+            raise ValueError(f"Не файл индекса: {path}")
+        (header_len,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    data_start = _align(len(INDEX_MAGIC) + 4 + header_len)
+    return header, data_start
+
+
+def load_osc_index(osc_path: str, config: dict) -> Optional[OscIndex]:
+    """
+    Открывает индекс .osc файла (memmap), если он существует и соответствует файлу.
+
+    Returns:
+        OscIndex или None, если индекса нет или он устарел
+    """
+    path = index_path(osc_path)
+    if not os.path.isfile(path):
+        return None
+    try:
+        header, data_start = _read_header(path)
+        if (header.get("version") != INDEX_VERSION
+                or header.get("ach_params") != _ach_params(config)):
+            return None
+        if not signature_matches(osc_path, header.get("signature", {})):
+            return None
+        num_osc = header["num_osc"]
+        columns = {}
+        for name, desc in header["columns"].items():
+            if num_osc == 0:
+                columns[name] = np.zeros(0, dtype=desc["dtype"])
+                continue
+            columns[name] = np.memmap(path, dtype=np.dtype(desc["dtype"]), mode="r",
+                                      offset=data_start + desc["offset"], shape=(num_osc,))
+        return OscIndex(path, header, columns)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_index(path: str, header: dict, columns: dict) -> None:
+    desc = {}
+    offset = 0
+    for name, arr in columns.items():
+        desc[name] = {"dtype": arr.dtype.str, "offset": offset}
+        offset = _align(offset + arr.nbytes)
+    header = {**header, "columns": desc}
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = _align(len(INDEX_MAGIC) + 4 + len(header_bytes))
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(INDEX_MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for name, arr in columns.items():
+            f.seek(data_start + desc[name]["offset"])
+            f.write(np.ascontiguousarray(arr).tobytes())
+    os.replace(tmp_path, path)
+
+
+def build_osc_index(
+    osc_path: str,
+    config: dict,
+    osc_file=None,
+    block_size: int = 500,
+    progress: Optional[Callable[[int, int], None]] = None,
+    stop_event: Optional[threading.Event] = None,
+) -> Optional[OscIndex]:
+    """
+    Строит индекс метрик для всех осциллограмм файла и сохраняет его рядом с файлом.
+
+    Параметры:
+    osc_path - путь к .osc файлу
+    config - конфигурация АЧХ (для Sabs и fmax)
+    osc_file - уже открытый File_osc (если None — файл открывается заново)
+    block_size - число осциллограмм, читаемых за один раз
+    progress - функция progress(обработано, всего)
+    stop_event - при установке события построение прерывается (возвращается None)
+    """
+    signature = file_signature(osc_path)
+    if osc_file is None:
+        import Aegis_osc
+        osc_file = Aegis_osc.File_osc(osc_path)
+    num_osc = osc_file.sdoHdr.NumOSC
+    fD_default = config.get("fD_kHz", 1000)
+
+    columns = {name: np.zeros(num_osc, dtype=dtype) for name, dtype in COLUMNS.items()}
+    for start in range(0, num_osc, block_size):
+        if stop_event is not None and stop_event.is_set():
+            return None
+        end = min(start + block_size, num_osc)
+        with tracing.span("getDotsOSC", start=start, end=end):
+            rows = osc_file.getDotsOSC(start, end)
+            lengths = np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows))
+            osc_block = osc_rows_to_block(rows)
+        with tracing.span("get_K_mkV", start=start, end=end):
+            k_mkV = np.asarray(osc_file.get_K_mkV(start, end), dtype=np.float64)
+        freq_vec = get_freq_khz(osc_file, start, end, fD_default)
+        _, _, sabs, fmax, _ = calc_ach_batch(osc_block, k_mkV, freq_vec, config, lengths=lengths)
+        metrics = frame_metrics(osc_block, k_mkV, freq_vec, lengths=lengths)
+
+        columns["K_mkV"][start:end] = k_mkV
+        columns["freq_kHz"][start:end] = freq_vec
+        columns["Sabs"][start:end] = sabs
+        columns["fmax"][start:end] = fmax
+        for name in ("dB", "dominant_kHz", "rms", "kurtosis"):
+            columns[name][start:end] = metrics[name]
+        if progress is not None:
+            progress(end, num_osc)
+
+    header = {
+        "version": INDEX_VERSION,
+        "num_osc": num_osc,
+        "signature": signature,
+        "ach_params": _ach_params(config),
+    }
+    path = index_path(osc_path)
+    try:
+        _write_index(path, header, columns)
+    except OSError:
+        # Нет прав на запись рядом с файлом — индекс остаётся только в памяти
+        return OscIndex(path, {**header, "columns": {}}, columns)
+    return load_osc_index(osc_path, config) or OscIndex(path, header, columns)
+
+
+class OscIndexBuilder(threading.Thread):
+    """
+    Фоновое построение индекса. По окончании вызывает on_done(index)
+    (из фонового потока; index = None, если построение прервано или не удалось).
+    """
+
+    def __init__(self, osc_path: str, config: dict, on_done: Callable[[Optional[OscIndex]], None],
+                 progress: Optional[Callable[[int, int], None]] = None):
+        super().__init__(name="osc-index", daemon=True)
+        self.osc_path = osc_path
+        self.config = dict(config)
+        self.on_done = on_done
+        self.progress = progress
+        self.stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def run(self) -> None:
+        try:
+            index = build_osc_index(self.osc_path, self.config, progress=self.progress,
+                                    stop_event=self.stop_event)
+        except Exception:
+            index = None
+        if not self.stop_event.is_set():
+            self.on_done(index)
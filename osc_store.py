@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+Источники осциллограмм (reader backends) и столбцовое хранилище с отображением в память.
+
+Любой источник осциллограмм реализует протокол OscReader:
+    num_osc                   — количество осциллограмм
+    read_block(start, end)    — (samples[N, L], K_mkV[N], freq_kHz[N]) для осциллограмм [start, end)
+    lengths(start, end)       — длины осциллограмм [start, end) (в samples они дополнены нулями до L)
+    frame(index)              — одна осциллограмма (одномерный массив своей длины)
+
+AegisOscReader читает .osc файл через Aegis_osc.File_osc (или совместимый объект).
+OscStore — хранилище, в которое .osc файл один раз конвертируется функцией
+convert_osc_to_store. Оно лежит рядом с файлом (<имя>.osc.store/) и состоит из:
+    samples.bin   — все отсчёты подряд (int16, int32 или int64 — по диапазону значений)
+    offsets.npy   — смещения начала каждой осциллограммы в samples (N + 1 значений)
+    K_mkV.npy, freq_kHz.npy — коэффициенты АЦП -> мкВ и частоты дискретизации
+    meta.json     — тип отсчётов и сигнатура исходного файла
+Чтение из хранилища не копирует данные: read_block возвращает представление memmap,
+если осциллограммы блока одинаковой длины.
+"""
+
+import json
+import os
+import shutil
+from typing import Callable, Optional, Protocol
+
+import numpy as np
+
+import tracing
+from osc_index import file_signature, signature_matches
+from work_with_osc import get_freq_khz, osc_rows_to_block
+
+
+STORE_VERSION = 1
+
+
+class OscReader(Protocol):
+    """Протокол источника осциллограмм."""
+
+    num_osc: int
+
+    def read_block(self, start: int, end: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(samples[N, L], K_mkV[N], freq_kHz[N]) для осциллограмм [start, end)."""
+        ...
+
+    def lengths(self, start: int, end: int) -> np.ndarray:
+        """Длины осциллограмм [start, end) — число действительных отсчётов в строках read_block."""
+        ...
+
+    def frame(self, index: int) -> np.ndarray:
+        """Одна осциллограмма."""
+        ...
+
+
+def store_path(osc_path: str) -> str:
+    """Путь к хранилищу для .osc файла."""
+    return osc_path + ".store"
+
+
+class AegisOscReader:
+    """Источник осциллограмм на основе Aegis_osc.File_osc."""
+
+    def __init__(self, osc_file, default_freq_khz: float = 1000):
+        self.osc_file = osc_file
+        self.num_osc = osc_file.sdoHdr.NumOSC
+        self.default_freq_khz = default_freq_khz
+        # (start, end, длины) последнего read_block — lengths того же блока не читает файл повторно
+        self._last_lengths = None
+
+    def read_block(self, start: int, end: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        with tracing.span("getDotsOSC", start=start, end=end):
+            rows = self.osc_file.getDotsOSC(start, end)
+            self._last_lengths = (start, end, _row_lengths(rows))
+            samples = osc_rows_to_block(rows, dtype=None)
+        return (samples, *self.read_meta(start, end))
+
+    def lengths(self, start: int, end: int) -> np.ndarray:
+        """Длины осциллограмм [start, end)."""
+        last = self._last_lengths
+        if last is not None and last[0] == start and last[1] == end:
+            return last[2]
+        return _row_lengths(self.osc_file.getDotsOSC(start, end))
+
+    def read_meta(self, start: int, end: int) -> tuple[np.ndarray, np.ndarray]:
+        """(K_mkV, freq_kHz) для осциллограмм [start, end)."""
+        with tracing.span("get_K_mkV", start=start, end=end):
+            K_mkV = np.asarray(self.osc_file.get_K_mkV(start, end), dtype=np.float64)
+            return K_mkV, get_freq_khz(self.osc_file, start, end, self.default_freq_khz)
+
+    def read_rows(self, start: int, end: int) -> list:
+        """Осциллограммы [start, end) списком одномерных массивов (каждая своей длины)."""
+        return [np.asarray(row) for row in self.osc_file.getDotsOSC(start, end)]
+
+    def frame(self, index: int) -> np.ndarray:
+        return np.asarray(self.osc_file.getDotsOSC(index, index + 1)[0])
+
+
+def _row_lengths(rows) -> np.ndarray:
+    return np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows))
+
+
+class OscStore:
+    """Хранилище осциллограмм, отображённое в память (см. convert_osc_to_store)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != STORE_VERSION:
+            raise ValueError(f"Неподдерживаемая версия хранилища: {path}")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.K_mkV = np.load(os.path.join(path, "K_mkV.npy"), mmap_mode="r")
+        self.freq_kHz = np.load(os.path.join(path, "freq_kHz.npy"), mmap_mode="r")
+        self.num_osc = len(self.offsets) - 1
+        total = int(self.offsets[-1])
+        dtype = np.dtype(self.meta["dtype"])
+        if total > 0:
+            self.samples = np.memmap(os.path.join(path, "samples.bin"), dtype=dtype, mode="r", shape=(total,))
+        else:
+            self.samples = np.zeros(0, dtype=dtype)
+
+    def lengths(self, start: int, end: int) -> np.ndarray:
+        """Длины осциллограмм [start, end)."""
+        return np.diff(self.offsets[start:end + 1])
+
+    def frame(self, index: int) -> np.ndarray:
+        return self.samples[self.offsets[index]:self.offsets[index + 1]]
+
+    @tracing.traced("OscStore.read_block")
+    def read_block(self, start: int, end: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        lengths = self.lengths(start, end)
+        first, last = int(self.offsets[start]), int(self.offsets[end])
+        if len(lengths) and np.all(lengths == lengths[0]):
+            samples = self.samples[first:last].reshape(end - start, int(lengths[0]))
+        else:
+            samples = np.zeros((end - start, int(lengths.max()) if len(lengths) else 0), dtype=self.samples.dtype)
+            for i in range(end - start):
+                samples[i, :lengths[i]] = self.frame(start + i)
+        return samples, self.K_mkV[start:end], self.freq_kHz[start:end]
+
+    def read_rows(self, start: int, end: int) -> list:
+        """Осциллограммы [start, end) списком представлений (без копирования)."""
+        return [self.frame(i) for i in range(start, end)]
+
+
+def _required_dtype(values: np.ndarray) -> np.dtype:
+    """Минимальный тип отсчётов хранилища для значений values."""
+    if values.size == 0:
+        return np.dtype(np.int16)
+    if values.dtype.kind not in "iub":
+        if not np.all(np.mod(values, 1) == 0):
+            return np.dtype(np.float64)
+    lo, hi = values.min(), values.max()
+    for dtype in (np.int16, np.int32, np.int64):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.float64)
+
+
+class _SampleWriter:
+    """Последовательная запись отсчётов в samples.bin с расширением типа при необходимости."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.dtype = np.dtype(np.int16)
+        self.count = 0
+        self.file = open(path, "wb")
+
+    def append(self, values: np.ndarray) -> None:
+        dtype = np.promote_types(self.dtype, _required_dtype(values))
+        if dtype != self.dtype:
+            self._convert(dtype)
+        self.file.write(np.ascontiguousarray(values, dtype=self.dtype).tobytes())
+        self.count += values.size
+
+    def _convert(self, dtype: np.dtype, chunk: int = 1 << 22) -> None:
+        """Переписывает уже записанные отсчёты в более широкий тип."""
+        self.file.close()
+        tmp_path = self.path + ".tmp"
+        if self.count:
+            old = np.memmap(self.path, dtype=self.dtype, mode="r", shape=(self.count,))
+            with open(tmp_path, "wb") as f:
+                for pos in range(0, self.count, chunk):
+                    f.write(np.asarray(old[pos:pos + chunk], dtype=dtype).tobytes())
+            del old
+            os.replace(tmp_path, self.path)
+        self.dtype = dtype
+        self.file = open(self.path, "ab")
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def convert_osc_to_store(
+    osc_path: str,
+    out_path: Optional[str] = None,
+    osc_file=None,
+    block_size: int = 500,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> OscStore:
+    """
+    Конвертирует .osc файл в хранилище OscStore (один проход по файлу, память — на один блок).
+
+    Параметры:
+    osc_path - путь к .osc файлу
+    out_path - каталог хранилища (по умолчанию <osc_path>.store)
+    osc_file - уже открытый File_osc (если None — открывается через Aegis_osc)
+    block_size - число осциллограмм, читаемых за один раз
+    progress - функция progress(обработано, всего)
+    """
+    out_path = out_path or store_path(osc_path)
+    if osc_file is None:
+        import Aegis_osc
+        osc_file = Aegis_osc.File_osc(osc_path)
+    reader = AegisOscReader(osc_file)
+    num_osc = reader.num_osc
+
+    tmp_dir = out_path + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    offsets = np.zeros(num_osc + 1, dtype=np.int64)
+    K_mkV = np.zeros(num_osc, dtype=np.float64)
+    freq_kHz = np.zeros(num_osc, dtype=np.float64)
+    writer = _SampleWriter(os.path.join(tmp_dir, "samples.bin"))
+    try:
+        for start in range(0, num_osc, block_size):
+            end = min(start + block_size, num_osc)
+            rows = reader.read_rows(start, end)
+            lengths = _row_lengths(rows)
+            offsets[start + 1:end + 1] = offsets[start] + np.cumsum(lengths)
+            writer.append(np.concatenate(rows) if rows else np.zeros(0, dtype=np.int16))
+            K_mkV[start:end], freq_kHz[start:end] = reader.read_meta(start, end)
+            if progress is not None:
+                progress(end, num_osc)
+    finally:
+        writer.close()
+
+    np.save(os.path.join(tmp_dir, "offsets.npy"), offsets)
+    np.save(os.path.join(tmp_dir, "K_mkV.npy"), K_mkV)
+    np.save(os.path.join(tmp_dir, "freq_kHz.npy"), freq_kHz)
+    meta = {"version": STORE_VERSION, "dtype": writer.dtype.str, "num_osc": num_osc,
+            "signature": file_signature(osc_path)}
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    shutil.rmtree(out_path, ignore_errors=True)
+    os.replace(tmp_dir, out_path)
+    return OscStore(out_path)
+
+
+def open_osc_store(osc_path: str) -> Optional[OscStore]:
+    """Открывает хранилище .osc файла, если оно есть и соответствует файлу (иначе None)."""
+    path = store_path(osc_path)
+    if not os.path.isfile(os.path.join(path, "meta.json")):
+        return None
+    try:
+        store = OscStore(path)
+        if not signature_matches(osc_path, store.meta.get("signature", {})):
+            return None
+        return store
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def open_osc_reader(osc_path: str, osc_file=None, default_freq_khz: float = 1000):
+    """
+    Источник осциллограмм для файла: хранилище OscStore, если файл уже конвертирован,
+    иначе AegisOscReader поверх osc_file (или заново открытого File_osc).
+    """
+    store = open_osc_store(osc_path)
+    if store is not None:
+        return store
+    if osc_file is None:
+        import Aegis_osc
+        osc_file = Aegis_osc.File_osc(osc_path)
+    return AegisOscReader(osc_file, default_freq_khz)
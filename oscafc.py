@@ -0,0 +1,389 @@
+# -*- coding: utf-8 -*-
+"""
+Консольная точка входа (без графического интерфейса).
+
+Пакетный расчёт АЧХ и метрик для всех осциллограмм .osc файла:
+    python -m oscafc batch file.osc --out result.npz
+    python -m oscafc batch file.osc --out result.csv
+
+Конвертация .osc файла в хранилище с отображением в память (osc_store):
+    python -m oscafc convert file.osc
+
+Статистика АЧХ по всем кадрам файла (среднее, СКО, P5/P50/P95):
+    python -m oscafc stats file.osc --out stats.csv
+
+Датасет для обучения из списка файлов (CSV: путь,категория):
+    python -m oscafc dataset files.csv --out dataset.npz --len 4096 --augment --seed 0
+
+Аугментированный корпус из датасета (10 копий со сдвигом, усилением и шумом):
+    python -m oscafc augment dataset_dir --out augmented_dir --copies 10 --shift 5 50 --snr 20 40 --seed 0
+
+Признаки всех кадров списка файлов (дБ, RMS, пик-фактор, время нарастания, Sabs, fmax, ...):
+    python -m oscafc features a.osc b.osc --out features_dir
+
+Осциллограммы читаются блоками фиксированного размера, поэтому объём памяти
+не зависит от числа кадров в файле. PyQt5 и pyqtgraph не импортируются.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from typing import Optional
+
+import numpy as np
+
+from ach_calculator import load_ach_config, calc_ach_batch
+import tracing
+from ach_stats import AchStatsBuilder, curves_on_axis
+from osc_store import convert_osc_to_store, open_osc_reader
+from work_with_osc import get_dB_block
+
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+class _CsvWriter:
+    """Построчная запись результатов в CSV: одна строка на осциллограмму."""
+
+    def __init__(self, path: str, num_osc: int, freq_axis: np.ndarray):
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        header = ["frame", "freq_kHz", "Sabs", "fmax", "ref", "dB"] + [f"{f:.4g}" for f in freq_axis]
+        self.file.write(",".join(header) + "\n")
+
+    def write(self, start: int, columns: dict, curves: np.ndarray) -> None:
+        table = np.column_stack([
+            np.arange(start, start + len(curves)) + 1,
+            columns["freq_kHz"], columns["Sabs"], columns["fmax"], columns["ref"], columns["dB"],
+            curves,
+        ])
+        np.savetxt(self.file, table, delimiter=",", fmt="%.6g")
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class _NpzWriter:
+    """
+    Запись результатов в .npz без накопления в памяти.
+    Каждый столбец пишется в отдельный .npy файл на диске (memmap),
+    а при закрытии файлы упаковываются в архив .npz.
+    """
+
+    SCALARS = {"freq_kHz": np.float64, "Sabs": np.float64, "fmax": np.float64, "ref": np.float64,
+               "dB": np.int32}
+
+    def __init__(self, path: str, num_osc: int, freq_axis: np.ndarray):
+        self.path = path
+        self.tmp_dir = tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path)))
+        self.freq_axis = freq_axis
+        self.arrays = {
+            name: np.lib.format.open_memmap(self._tmp(name), mode="w+", dtype=dtype, shape=(num_osc,))
+            for name, dtype in self.SCALARS.items()
+        }
+        self.arrays["ach_db"] = np.lib.format.open_memmap(
+            self._tmp("ach_db"), mode="w+", dtype=np.float32, shape=(num_osc, len(freq_axis))
+        )
+
+    def _tmp(self, name: str) -> str:
+        return os.path.join(self.tmp_dir.name, name + ".npy")
+
+    def write(self, start: int, columns: dict, curves: np.ndarray) -> None:
+        end = start + len(curves)
+        for name in self.SCALARS:
+            self.arrays[name][start:end] = columns[name]
+        self.arrays["ach_db"][start:end] = curves
+
+    def close(self) -> None:
+        for array in self.arrays.values():
+            array.flush()
+        self.arrays.clear()
+        np.save(self._tmp("freq"), self.freq_axis)
+        with zipfile.ZipFile(self.path, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+            for name in ("freq", *self.SCALARS, "ach_db"):
+                zf.write(self._tmp(name), arcname=name + ".npy")
+        self.tmp_dir.cleanup()
+
+
+def run_batch(
+    file_name: str,
+    out_path: str,
+    config_path: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    verbose: bool = True,
+) -> dict:
+    """
+    Рассчитывает АЧХ и метрики (Sabs, fmax, ref, дБ) для всех осциллограмм файла
+    и записывает их в out_path (.npz или .csv).
+
+    Кривые АЧХ сохраняются в диапазоне freq_range из конфигурации на оси частот
+    первой осциллограммы файла.
+
+    Returns:
+        dict: num_osc, seconds, fps — число кадров, время расчёта и кадров в секунду
+    """
+    config = load_ach_config(config_path)
+    freq_range = config.get("freq_range", [50, 500])
+    fD_default = config.get("fD_kHz", 1000)
+
+    ext = os.path.splitext(out_path)[1].lower()
+    if ext not in (".npz", ".csv"):
+        raise ValueError(f"Неподдерживаемый формат результата: {out_path} (ожидается .npz или .csv)")
+
+    reader = open_osc_reader(file_name, default_freq_khz=fD_default)
+    num_osc = reader.num_osc
+    if num_osc == 0:
+        raise ValueError(f"В файле нет осциллограмм: {file_name}")
+
+    writer = None
+    fs_axis = mask = freq_axis = None
+    t_start = time.perf_counter()
+    try:
+        for start in range(0, num_osc, chunk_size):
+            end = min(start + chunk_size, num_osc)
+            osc_block, k_mkV, freq_vec = reader.read_block(start, end)
+
+            freq, ach_db, sabs, fmax, ref = calc_ach_batch(osc_block, k_mkV, freq_vec, config,
+                                                           lengths=reader.lengths(start, end))
+            dB = get_dB_block(osc_block, k_mkV)
+
+            if writer is None:
+                fs_axis = freq_vec[0]
+                mask = (freq[0] >= freq_range[0]) & (freq[0] <= freq_range[1])
+                freq_axis = np.array(freq[0][mask])
+                writer_cls = _NpzWriter if ext == ".npz" else _CsvWriter
+                writer = writer_cls(out_path, num_osc, freq_axis)
+
+            columns = {"freq_kHz": freq_vec, "Sabs": sabs, "fmax": fmax, "ref": ref,
+                       "dB": dB}
+            curves = curves_on_axis(freq, ach_db, freq_vec == fs_axis, mask, freq_axis)
+            writer.write(start, columns, curves)
+
+            if verbose:
+                elapsed = time.perf_counter() - t_start
+                print(f"\rОбработано {end} из {num_osc} кадров, {end / max(elapsed, 1e-9):.1f} кадр/с",
+                      end="", file=sys.stderr, flush=True)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    seconds = time.perf_counter() - t_start
+    fps = num_osc / seconds if seconds > 0 else 0.0
+    if verbose:
+        print(f"\nГотово: {num_osc} кадров за {seconds:.2f} с ({fps:.1f} кадр/с) -> {out_path}",
+              file=sys.stderr)
+    return {"num_osc": num_osc, "seconds": seconds, "fps": fps}
+
+
+def _print_progress(done: int, total: int) -> None:
+    print(f"\rОбработано {done} из {total} кадров", end="", file=sys.stderr, flush=True)
+
+
+def _cmd_batch(args: argparse.Namespace) -> int:
+    run_batch(args.file, args.out, config_path=args.config, chunk_size=args.chunk,
+              verbose=not args.quiet)
+    return 0
+
+
+def _cmd_convert(args: argparse.Namespace) -> int:
+    t_start = time.perf_counter()
+    store = convert_osc_to_store(args.file, args.out, block_size=args.chunk,
+                                 progress=None if args.quiet else _print_progress)
+    if not args.quiet:
+        print(f"\nГотово: {store.num_osc} кадров за {time.perf_counter() - t_start:.2f} с -> {store.path}",
+              file=sys.stderr)
+    return 0
+
+
+def run_stats(file_name: str, out_path: str, config_path: Optional[str] = None,
+              chunk_size: int = DEFAULT_CHUNK_SIZE, verbose: bool = True) -> dict:
+    """
+    Статистика АЧХ по всем осциллограммам файла (см. ach_stats) с записью в out_path
+    (.npz — массивы по именам, .csv — строка на частоту).
+
+    Returns:
+        dict: результат AchStats.result()
+    """
+    ext = os.path.splitext(out_path)[1].lower()
+    if ext not in (".npz", ".csv"):
+        raise ValueError(f"Неподдерживаемый формат результата: {out_path} (ожидается .npz или .csv)")
+    config = load_ach_config(config_path)
+    builder = AchStatsBuilder(file_name, config, progress=_print_progress if verbose else None,
+                              block_size=chunk_size)
+    t_start = time.perf_counter()
+    builder.run()
+    if builder.stats is None:
+        raise ValueError(f"В файле нет осциллограмм: {file_name}")
+    result = builder.stats.result()
+    columns = ["freq", "count", "mean", "std", "p5", "p50", "p95", "min", "max"]
+    if ext == ".npz":
+        np.savez(out_path, **{name: result[name] for name in columns})
+    else:
+        np.savetxt(out_path, np.column_stack([result[name] for name in columns]), delimiter=",",
+                   fmt="%.6g", header=",".join(["freq_kHz", *columns[1:]]), comments="")
+    if verbose:
+        print(f"\nГотово: {result['frames']} кадров за {time.perf_counter() - t_start:.2f} с -> {out_path}",
+              file=sys.stderr)
+    return result
+
+
+def _cmd_stats(args: argparse.Namespace) -> int:
+    run_stats(args.file, args.out, config_path=args.config, chunk_size=args.chunk, verbose=not args.quiet)
+    return 0
+
+
+def _cmd_dataset(args: argparse.Namespace) -> int:
+    from dataset_builder import build_dataset
+
+    list_osc, categories = [], []
+    base_dir = os.path.dirname(os.path.abspath(args.list))
+    with open(args.list, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = [p.strip() for p in line.rsplit(",", 1)]
+            if len(parts) != 2 or not parts[0] or parts[0].startswith("#"):
+                continue
+            list_osc.append(os.path.join(base_dir, parts[0]))
+            categories.append(parts[1])
+
+    def progress(stage: str, done: int, total: int) -> None:
+        title = "Прочитано файлов" if stage == "read" else "Записано строк"
+        print(f"\r{title}: {done} из {total}", end="", file=sys.stderr, flush=True)
+
+    t_start = time.perf_counter()
+    summary = build_dataset(list_osc, categories, args.out, target_len=args.len, augment=args.augment,
+                            seed=args.seed, workers=args.workers, block_size=args.chunk,
+                            progress=None if args.quiet else progress, pad_mode=args.pad)
+    if not args.quiet:
+        counts = ", ".join(f"{name}: {n}" for name, n in summary["counts"].items())
+        print(f"\nГотово: {summary['frames']} кадров -> {summary['rows']} строк ({counts}) "
+              f"за {time.perf_counter() - t_start:.2f} с -> {args.out}", file=sys.stderr)
+    return 0
+
+
+def _cmd_augment(args: argparse.Namespace) -> int:
+    from augmentation import augment_dataset
+
+    def progress(done: int, total: int) -> None:
+        print(f"\rЗаписано строк: {done} из {total}", end="", file=sys.stderr, flush=True)
+
+    t_start = time.perf_counter()
+    summary = augment_dataset(args.dataset, args.out, copies=args.copies, seed=args.seed,
+                              keep_original=not args.no_original, block_size=args.chunk,
+                              progress=None if args.quiet else progress,
+                              shift=args.shift, shift_mode=args.shift_mode, scale=args.scale,
+                              snr_db=args.snr, flip=args.flip)
+    if not args.quiet:
+        print(f"\nГотово: {summary['rows']} строк -> {summary['out_rows']} строк "
+              f"за {time.perf_counter() - t_start:.2f} с -> {args.out}", file=sys.stderr)
+    return 0
+
+
+def _cmd_features(args: argparse.Namespace) -> int:
+    from features import export_features
+
+    t_start = time.perf_counter()
+    summary = export_features(args.files, args.out, config=load_ach_config(args.config), fmt=args.format,
+                              workers=args.workers, block_size=args.chunk,
+                              progress=None if args.quiet else _print_progress)
+    if not args.quiet:
+        print(f"\nГотово: {summary['frames']} кадров за {time.perf_counter() - t_start:.2f} с -> "
+              f"{args.out} ({len(summary['parts'])} частей {summary['format']})", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="oscafc", description="Обработка .osc файлов без графического интерфейса")
+    parser.add_argument("--trace", default=None,
+                        help="Записать трассу выполнения (.json для chrome://tracing / ui.perfetto.dev) и сводку по участкам")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch = subparsers.add_parser("batch", help="Расчёт АЧХ и метрик для всех осциллограмм файла")
+    batch.add_argument("file", help="Путь к .osc файлу")
+    batch.add_argument("--out", required=True, help="Файл результата: .npz или .csv")
+    batch.add_argument("--config", default=None, help="Путь к ach_config.json (по умолчанию — рядом с программой)")
+    batch.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_SIZE,
+                       help=f"Число осциллограмм в одном блоке чтения (по умолчанию {DEFAULT_CHUNK_SIZE})")
+    batch.add_argument("--quiet", action="store_true", help="Не выводить прогресс")
+    batch.set_defaults(func=_cmd_batch)
+
+    convert = subparsers.add_parser("convert", help="Конвертация .osc файла в хранилище с отображением в память")
+    convert.add_argument("file", help="Путь к .osc файлу")
+    convert.add_argument("--out", default=None, help="Каталог хранилища (по умолчанию <файл>.store)")
+    convert.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_SIZE,
+                         help=f"Число осциллограмм в одном блоке чтения (по умолчанию {DEFAULT_CHUNK_SIZE})")
+    convert.add_argument("--quiet", action="store_true", help="Не выводить прогресс")
+    convert.set_defaults(func=_cmd_convert)
+
+    stats = subparsers.add_parser("stats", help="Статистика АЧХ по всем осциллограммам файла")
+    stats.add_argument("file", help="Путь к .osc файлу")
+    stats.add_argument("--out", required=True, help="Файл результата: .npz или .csv")
+    stats.add_argument("--config", default=None, help="Путь к ach_config.json (по умолчанию — рядом с программой)")
+    stats.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_SIZE,
+                       help=f"Число осциллограмм в одном блоке чтения (по умолчанию {DEFAULT_CHUNK_SIZE})")
+    stats.add_argument("--quiet", action="store_true", help="Не выводить прогресс")
+    stats.set_defaults(func=_cmd_stats)
+
+    dataset = subparsers.add_parser("dataset", help="Датасет для обучения из списка файлов .osc")
+    dataset.add_argument("list", help="CSV со строками «путь к .osc,категория» (пути — относительно CSV)")
+    dataset.add_argument("--out", required=True, help="Файл .npz или каталог .npy файлов (memmap)")
+    dataset.add_argument("--len", type=int, required=True, help="Длина кадра в датасете, отсчётов")
+    dataset.add_argument("--augment", action="store_true", help="Дополнять редкие классы сдвинутыми копиями")
+    dataset.add_argument("--pad", choices=("zero", "noise", "reflect"), default="zero",
+                         help="Дополнение коротких кадров: нули, шум по концу сигнала или отражение")
+    dataset.add_argument("--seed", type=int, default=None, help="Начальное значение генератора случайных чисел")
+    dataset.add_argument("--workers", type=int, default=None, help="Число процессов (по умолчанию — число ядер)")
+    dataset.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_SIZE,
+                         help=f"Число осциллограмм в одном блоке чтения (по умолчанию {DEFAULT_CHUNK_SIZE})")
+    dataset.add_argument("--quiet", action="store_true", help="Не выводить прогресс")
+    dataset.set_defaults(func=_cmd_dataset)
+
+    features = subparsers.add_parser("features", help="Таблица признаков всех осциллограмм файлов")
+    features.add_argument("files", nargs="+", help="Пути к .osc файлам")
+    features.add_argument("--out", required=True, help="Каталог результата (части таблицы и features.json)")
+    features.add_argument("--format", choices=("auto", "npz", "parquet"), default="auto",
+                          help="Формат частей (auto — parquet, если установлены pandas и pyarrow)")
+    features.add_argument("--config", default=None, help="Путь к ach_config.json (по умолчанию — рядом с программой)")
+    features.add_argument("--workers", type=int, default=None, help="Число процессов (по умолчанию — число ядер)")
+    features.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_SIZE,
+                          help=f"Число осциллограмм в одном блоке чтения (по умолчанию {DEFAULT_CHUNK_SIZE})")
+    features.add_argument("--quiet", action="store_true", help="Не выводить прогресс")
+    features.set_defaults(func=_cmd_features)
+
+    augment = subparsers.add_parser("augment", help="Аугментированный корпус из датасета (запись блоками)")
+    augment.add_argument("dataset", help="Датасет команды dataset: файл .npz или каталог .npy файлов")
+    augment.add_argument("--out", required=True, help="Файл .npz или каталог .npy файлов (memmap)")
+    augment.add_argument("--copies", type=int, default=10, help="Число аугментированных копий каждой строки")
+    augment.add_argument("--no-original", action="store_true", help="Не включать исходные строки")
+    augment.add_argument("--shift", type=int, nargs=2, default=None, metavar=("MIN", "MAX"),
+                         help="Сдвиг по времени, отсчётов")
+    augment.add_argument("--shift-mode", choices=("cycle", "zero"), default="cycle",
+                         help="Сдвиг циклический или с заполнением начала нулями")
+    augment.add_argument("--scale", type=float, nargs=2, default=None, metavar=("MIN", "MAX"),
+                         help="Коэффициент усиления")
+    augment.add_argument("--snr", type=float, nargs=2, default=None, metavar=("MIN", "MAX"),
+                         help="Отношение сигнал/шум добавляемого шума, дБ")
+    augment.add_argument("--flip", type=float, default=0.0, help="Вероятность смены полярности")
+    augment.add_argument("--seed", type=int, default=None, help="Начальное значение генератора случайных чисел")
+    augment.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_SIZE,
+                         help=f"Число строк в одном блоке (по умолчанию {DEFAULT_CHUNK_SIZE})")
+    augment.add_argument("--quiet", action="store_true", help="Не выводить прогресс")
+    augment.set_defaults(func=_cmd_augment)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.trace:
+        tracing.enable()
+    try:
+        return args.func(args)
+    finally:
+        if args.trace:
+            tracing.disable()
+            tracing.write_chrome_trace(args.trace)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
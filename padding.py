@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Приведение осциллограмм к фиксированной длине (вход модели) блоками.
+
+    out = np.empty((N, 4096), dtype=np.float32)
+    pad_block(block, 4096, mode="noise", lengths=lengths, out=out, rng=np.random.default_rng(0))
+
+Режимы дополнения (PAD_MODES):
+  * "zero" — нули;
+  * "noise" — нормальный шум со средним и СКО последних 30% (TAIL_SHARE) отсчётов
+    каждой строки, чтобы продолжение не отличалось по виду от конца сигнала;
+  * "reflect" — зеркальное продолжение сигнала (как np.pad(..., mode="reflect")).
+Строки длиннее target_len обрезаются.
+
+Все операции выполняются над блоком целиком (без циклов по отсчётам и строкам),
+результат записывается в заранее выделенную матрицу out (например, memmap датасета).
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+PAD_MODES = ("zero", "noise", "reflect")
+# Доля конца сигнала, по которой считается статистика шума
+TAIL_SHARE = 0.3
+
+
+def _tail_stats(block: np.ndarray, lengths: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Среднее и СКО последних TAIL_SHARE отсчётов каждой строки (строка i — первые lengths[i] отсчётов)."""
+    start = np.rint(lengths * (1.0 - TAIL_SHARE)).astype(np.int64)
+    first = int(start.min()) if len(start) else 0
+    cols = np.arange(first, block.shape[1])[None, :]
+    tail = block[:, first:]
+    inside = (cols >= start[:, None]) & (cols < lengths[:, None])
+    count = np.maximum(lengths - start, 1)
+    values = np.where(inside, tail, 0.0)
+    mean = values.sum(axis=1) / count
+    var = (np.where(inside, tail - mean[:, None], 0.0) ** 2).sum(axis=1) / count
+    return mean, np.sqrt(var)
+
+
+def _reflect_index(cols: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Номера отсчётов для зеркального продолжения строк длиной lengths в столбцах cols."""
+    lengths = lengths[:, None]
+    period = np.maximum(2 * (lengths - 1), 1)
+    idx = cols[None, :] % period
+    idx = np.where(idx >= lengths, period - idx, idx)
+    return np.minimum(idx, lengths - 1)
+
+
+def pad_block(block: np.ndarray, target_len: int, mode: str = "zero", lengths: Optional[np.ndarray] = None,
+              out: Optional[np.ndarray] = None, rng: Optional[np.random.Generator] = None,
+              seed: Optional[int] = None) -> np.ndarray:
+    """
+    Приводит строки блока [N, L] к длине target_len.
+
+    lengths - длины строк [N] (отсчёты после lengths[i] не используются); по умолчанию все L
+    out - матрица результата [N, target_len] (по умолчанию создаётся float64)
+    rng, seed - генератор случайных чисел для режима "noise" (rng важнее seed)
+
+    Returns:
+        out
+    """
+    if mode not in PAD_MODES:
+        raise ValueError(f"Неизвестный режим дополнения: {mode} (ожидается один из {', '.join(PAD_MODES)})")
+    block = np.asarray(block)
+    if block.ndim == 1:
+        block = block[None, :]
+    n, width = block.shape
+    if out is None:
+        out = np.empty((n, target_len), dtype=np.float64)
+    if lengths is None:
+        lengths = np.full(n, width, dtype=np.int64)
+        uniform = True
+    else:
+        lengths = np.minimum(np.asarray(lengths, dtype=np.int64), width)
+        uniform = n == 0 or bool(np.all(lengths == lengths[0]))
+
+    copy_width = min(width, target_len)
+    out[:, :copy_width] = block[:, :copy_width]
+    # Дополняются столбцы, начиная с самой короткой строки
+    fill_from = min(int(lengths.min()) if n else target_len, target_len)
+    if fill_from >= target_len:
+        return out
+    cols = np.arange(fill_from, target_len)
+
+    if mode == "zero" or width == 0:
+        fill = 0.0
+    elif mode == "noise":
+        if rng is None:
+            rng = np.random.default_rng(seed)
+        mean, std = _tail_stats(block, lengths)
+        fill = rng.standard_normal((n, len(cols)))
+        fill *= std[:, None]
+        fill += mean[:, None]
+    else:
+        fill = np.take_along_axis(block, _reflect_index(cols, np.maximum(lengths, 1)), axis=1)
+
+    if uniform:
+        out[:, fill_from:] = fill
+    else:
+        target = out[:, fill_from:]
+        np.copyto(target, fill, where=cols[None, :] >= lengths[:, None])
+    return out
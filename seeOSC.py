@@ -3,13 +3,13 @@
 import inspect
 import os
 import sys
+import time
 
 os.environ['PYQTGRAPH_QT_LIB'] = 'PyQt5' # Устанавливаю переменную окружения для pyqtgraph
 
 import numpy as np
 import pyqtgraph as pg
 
-from numba import njit
 from PyQt5 import QtWidgets
 from PyQt5.QtCore import Qt, pyqtSignal, QSize
 from PyQt5.QtWidgets import (QWidget, QPushButton,
@@ -22,30 +22,50 @@ from PyQt5.QtGui import QFontDatabase, QFont
 
 import Aegis_osc
 
-from Fourier import Fourier, four2
-from work_with_osc import DataOsc, get_dB_osc
+from ach_calculator import load_ach_config
+from frame_cache import FrameBlockCache
+from frame_timings import FrameTimings
+import tracing
+from jit_cache import JitWarmup
 
 
 LOG_LEVEL = Aegis_osc.LogLevel
 
 
-@njit
-def set_K_mkV_and_dB(end_data_osc: int, K_mkV: np.ndarray, osc_datas: np.ndarray) -> np.ndarray:
-    """Метод рассчитывает Децибелы для осциллограммы"""
-    dB_data = np.zeros(end_data_osc, dtype=np.int32)  # Массив с нужной длиной
-    for i in range(end_data_osc):
-        dB_data[i] = np.int32(get_dB_osc(osc_datas[i], K_mkV[i]))
-    return dB_data
-
 class MainMenu(QWidget):
     # Создаем сигнал, который уведомит об отображении графиков
     graphs_shown = pyqtSignal()
     osc_now_changed = pyqtSignal(object)
+    # Индекс метрик осциллограмм построен в фоне (OscIndex или None)
+    osc_index_ready = pyqtSignal(object)
+    # (обработано, всего) — ход фонового построения индекса
+    osc_index_progress = pyqtSignal(int, int)
+
+    # Размер блока осциллограмм, читаемого из файла за один раз
+    BLOCK_SIZE = 500
+    # Ограничение объёма кэша блоков осциллограмм, байт
+    FRAME_CACHE_MAX_BYTES = 256 * 1024 * 1024
 
     def __init__(self):
         super().__init__()  # Вызываю конструктор родительского класса QWidget
         self.__set_style_for_app()
         self.logger = Aegis_osc.Logger("log_seeOSC.txt")
+        # Модули расчёта (numba) импортируются при открытии первого файла, а ядра
+        # компилируются в фоне, пока пользователь выбирает файл
+        self._spectrum_engine = None
+        self._jit_warmup = JitWarmup()
+        self._jit_warmup.start()
+        self.frame_cache = None
+        self.osc_index = None
+        self._index_builder = None
+        self.osc_index_ready.connect(self._on_osc_index_ready)
+        # Тренд метрик по всему файлу (создаётся вместе с графиками)
+        self.trend_view = None
+        # Время этапов отображения кадра (данные, БПФ, отрисовка); F2 — показать/скрыть
+        self.frame_timings = FrameTimings()
+        self.timings_label = QLabel(self)
+        self.timings_label.setStyleSheet("font-size: 11px; color: #666;")
+        self.timings_label.hide()
 
         self.dB_text = None
         self.text = None
@@ -57,6 +77,16 @@ class MainMenu(QWidget):
         self.edit_osc_num = QLineEdit()
         self.edit_osc_widget = QWidget()
         self.bttn_goto_osc = QPushButton("Перейти")
+        # Отбор кадров по условию над метриками индекса (frame_query); F8 / Shift+F8 — следующий / предыдущий
+        self.edit_query = QLineEdit()
+        self.edit_query.setPlaceholderText("dB >= 60 and 120 <= fmax <= 180")
+        self.bttn_prev_match = QPushButton("◀")
+        self.bttn_next_match = QPushButton("▶")
+        self.bttn_prev_match.setToolTip("Предыдущий подходящий кадр (Shift+F8)")
+        self.bttn_next_match.setToolTip("Следующий подходящий кадр (F8)")
+        self.query_label = QLabel("")
+        self.frame_query = None
+        self.query_matches = None
 
         # Кнопка для получения открытия отдельной осциллограммы
         self.startWidget = QWidget(self)
@@ -74,13 +104,24 @@ class MainMenu(QWidget):
         # Блок добавления элементов в главное меню
         self.main_layout_v.addWidget(self.startWidget)
 
+    @property
+    def spectrum_engine(self):
+        """Кэш спектров (SpectrumEngine), создаётся при первом обращении."""
+        if self._spectrum_engine is None:
+            from Fourier import SpectrumEngine
+            self._spectrum_engine = SpectrumEngine()
+        return self._spectrum_engine
+
     def _on_clicked_bttn_open_osc(self) -> None:
         """Обработчик события клика для кнопки создания нового датасета"""
         path, _ = QFileDialog.getOpenFileName(self, "Выберите файл", "", "osc files (*.osc)")
 
         self._open_osc(path)
 
+    @tracing.traced("open_osc")
     def _open_osc(self, name_osc: str):
+        from osc_store import open_osc_reader
+
         try:
             self.startWidget.setMinimumSize(0, 0)  # Сбрасываем ограничения на размер виджета
 
@@ -90,38 +131,34 @@ class MainMenu(QWidget):
                         os.path.basename(__file__),
                         inspect.currentframe().f_lineno, 
                         inspect.currentframe().f_code.co_name)
-            self.osc_file = Aegis_osc.File_osc(self.name_osc, self.logger)
+            with tracing.span("File_osc"):
+                self.osc_file = Aegis_osc.File_osc(self.name_osc, self.logger)
 
             self.file_open.setText(f"Открыт файл .osc: {self.name_osc}")
+            self.spectrum_engine.clear()
             self.num_osc = self.osc_file.sdoHdr.NumOSC
-
-            # Предварительная инициализация массивов
-            self.start_data_osc = 0
-            self.end_data_osc = min(self.num_osc, 500)
-
-            # Получаем данные и инициализируем массивы заранее
+            # Осциллограммы читаются из хранилища (если файл конвертирован) или через File_osc
+            self.osc_reader = open_osc_reader(self.name_osc, self.osc_file)
+
+            # Индекс метрик осциллограмм: открываем готовый или строим в фоне
+            self._open_osc_index()
+
+            # Кэш блоков осциллограмм: текущий блок + соседние, подгружаемые в фоне
+            if self.frame_cache is not None:
+                self.frame_cache.close()
+            osc_reader = self.osc_reader
+            self.frame_cache = FrameBlockCache(
+                lambda start, end: self._read_block(osc_reader, start, end),
+                self.num_osc, block_size=self.BLOCK_SIZE, max_bytes=self.FRAME_CACHE_MAX_BYTES,
+            )
+
+            # Получаем данные первого блока
             self.logger.logg(LOG_LEVEL._INFO_, f"Получение данных из файла .osc",
                         os.path.basename(__file__),
                         inspect.currentframe().f_lineno, 
                         inspect.currentframe().f_code.co_name)
-            self.osc_datas = np.array(self.osc_file.getDotsOSC(0, self.end_data_osc))  
-                      
-            # Заполняем массивы за один проход, без использования np.append
-            self.logger.logg(LOG_LEVEL._INFO_, f"Старт получения K_mkV",
-                        os.path.basename(__file__),
-                        inspect.currentframe().f_lineno, 
-                        inspect.currentframe().f_code.co_name)
-            self.K_mkV = np.array(self.osc_file.get_K_mkV(0, self.end_data_osc))
-            self.logger.logg(LOG_LEVEL._INFO_, f"Конец получения K_mkV",
-                        os.path.basename(__file__),
-                        inspect.currentframe().f_lineno, 
-                        inspect.currentframe().f_code.co_name)
-            self.logger.logg(LOG_LEVEL._INFO_, f"Старт получения децибел",
-                    os.path.basename(__file__),
-                    inspect.currentframe().f_lineno, 
-                    inspect.currentframe().f_code.co_name)
-            self.dB_data = set_K_mkV_and_dB(self.end_data_osc, self.K_mkV, self.osc_datas)
-            self.logger.logg(LOG_LEVEL._INFO_, f"Конец получения децибел",
+            self._set_block(0, direction=1)
+            self.logger.logg(LOG_LEVEL._INFO_, f"Конец получения данных из файла .osc",
                         os.path.basename(__file__),
                         inspect.currentframe().f_lineno, 
                         inspect.currentframe().f_code.co_name)
@@ -144,6 +181,23 @@ class MainMenu(QWidget):
                 self.now_plot_spectr.setMinimumSize(QSize(600, 250))
                 self.now_plot_spectr.setMaximumHeight(400)
 
+                # Кривые и подписи создаются один раз, при смене кадра меняются только их данные
+                self.now_plot_osc_item = self.now_plot_osc.plot()
+                self.now_plot_spectr_item = self.now_plot_spectr.plot()
+                # В кривые передаётся огибающая min/max видимой части (объём зависит от ширины графика)
+                from decimation import DecimatedCurve
+                self.osc_curve_lod = DecimatedCurve(self.now_plot_osc_item, self.now_plot_osc.getViewBox())
+                self.spectr_curve_lod = DecimatedCurve(self.now_plot_spectr_item, self.now_plot_spectr.getViewBox())
+                # Информация о том, какая частота более выражена в сигнале
+                self.text = pg.TextItem("", anchor=(0, 1), color="r")
+                self.now_plot_spectr.addItem(self.text)
+                # Информация о децибелах
+                self.dB_text = pg.TextItem("", anchor=(0, 1), color="r")
+                self.now_plot_osc.addItem(self.dB_text)
+                # Связываем изменение диапазона графиков с обновлением позиции текста
+                self.now_plot_spectr.sigRangeChanged.connect(self.__update_info_position)
+                self.now_plot_osc.sigRangeChanged.connect(self.__update_info_position)
+
                 # Метки координат курсора для осциллограммы и спектра
                 self.coords_label_osc = QLabel("X: —  Y: —")
                 self.coords_label_spectr = QLabel("X: —  Y: —")
@@ -185,7 +239,14 @@ class MainMenu(QWidget):
                 self.layout_num_osc_h.addWidget(QLabel("№ осциллограммы:"))
                 self.layout_num_osc_h.addWidget(self.edit_osc_num)
                 self.layout_num_osc_h.addWidget(self.bttn_goto_osc)
+                self.layout_num_osc_h.addWidget(self.get_separator())
+                self.layout_num_osc_h.addWidget(QLabel("Условие:"))
+                self.layout_num_osc_h.addWidget(self.edit_query)
+                self.layout_num_osc_h.addWidget(self.bttn_prev_match)
+                self.layout_num_osc_h.addWidget(self.bttn_next_match)
+                self.layout_num_osc_h.addWidget(self.query_label)
                 self.layout_num_osc_h.addStretch()
+                self.layout_num_osc_h.addWidget(self.timings_label)
                 
                 self.main_layout_v.addLayout(self.layout_num_osc_h)
 
@@ -195,40 +256,27 @@ class MainMenu(QWidget):
                 self.edit_osc_num.setMaximumWidth(120)
                 self.edit_osc_num.returnPressed.connect(self._goto_osc_by_edit)
                 self.bttn_goto_osc.clicked.connect(self._goto_osc_by_edit)
+                self.edit_query.setMinimumWidth(260)
+                self.edit_query.returnPressed.connect(self._apply_query)
+                self.bttn_prev_match.setMaximumWidth(40)
+                self.bttn_next_match.setMaximumWidth(40)
+                self.bttn_prev_match.clicked.connect(self.goto_prev_match)
+                self.bttn_next_match.clicked.connect(self.goto_next_match)
                 self.edit_osc_widget.setLayout(self.layout_num_osc_h)
                 self.main_layout_v.addWidget(self.edit_osc_widget)
 
+                # Тренд метрик по всему файлу под строкой навигации; щелчок — переход к кадру
+                from frame_trend import FrameTrendView
+                self.trend_view = FrameTrendView(self)
+                self.trend_view.frame_clicked.connect(self._goto_osc_index)
+                self.osc_now_changed.connect(self.trend_view.set_current)
+                self.osc_index_progress.connect(self.trend_view.set_progress)
+                self.main_layout_v.addWidget(self.trend_view)
+
             if hasattr(self, "edit_osc_num"):
                 self.edit_osc_num.setPlaceholderText(f"1 - {self.num_osc}")
-            self.now_plot_osc.clear()
-            self.now_plot_spectr.clear()
-
-            self.info_now_num_osc.setText(f"Номер кадра: {self.osc_now + 1} из {self.num_osc}")
-            self.now_plot_osc_item = self.now_plot_osc.plot(self.osc_datas[self.osc_now])
-
-            self.logger.logg(LOG_LEVEL._INFO_, f"Построение спектра осциллограммы",
-                        os.path.basename(__file__),
-                        inspect.currentframe().f_lineno, 
-                        inspect.currentframe().f_code.co_name)
-            spectr = four2(np.array(self.osc_datas[self.osc_now], dtype=np.float64))
-            x = np.array([i / (len(spectr) / 2 / 500) for i in range(round(len(spectr) / 2))])
-            self.now_plot_spectr_item = self.now_plot_spectr.plot(x, spectr[:round(len(spectr) / 2)])
-            # Добавляем информацию о том, какая частота более выражена в сигнале
-            index = np.argmax(spectr[:round(len(spectr) / 2)])
-            self.text = pg.TextItem(f"{x[index]} кГц", anchor=(0, 1), color="r")
-            self.now_plot_spectr.addItem(self.text)
-
-            # Связываем изменение диапазона графика с обновлением позиции текста
-            self.now_plot_spectr.sigRangeChanged.connect(self.__update_info_position)
-
-            # Добавляем информацию о децибелах
-            self.dB_text = pg.TextItem(f"{self.dB_data[self.osc_now]} Дб", anchor=(0, 1), color="r")
-            self.now_plot_osc.addItem(self.dB_text)
-
-            self.__update_info_position()
-
-            # Связываем изменение диапазона графика с обновлением позиции текста
-            self.now_plot_osc.sigRangeChanged.connect(self.__update_info_position)
+            self._update_trend()
+            self._update_query_matches()
 
             # self.plot_layout_h.addWidget(pg.plot(self.osc_datas[self.osc_now]))
             if (not hasattr(self, "bttn_next_osc") and
@@ -245,7 +293,14 @@ class MainMenu(QWidget):
                 self.main_layout_v.addWidget(self.bttn_prev_osc)
 
                 self._add_extra_buttons_after_nav()
-            self.check_next_prev_osc()
+
+            self.logger.logg(LOG_LEVEL._INFO_, f"Построение спектра осциллограммы",
+                        os.path.basename(__file__),
+                        inspect.currentframe().f_lineno, 
+                        inspect.currentframe().f_code.co_name)
+            self.frame_timings.clear()
+            self.frame_timings.begin_frame()
+            self._show_osc()
             # Отправляем сигнал о том, что графики были отображены
             self.adjustSize()
             self.graphs_shown.emit()
@@ -255,6 +310,75 @@ class MainMenu(QWidget):
                         inspect.currentframe().f_lineno, 
                         inspect.currentframe().f_code.co_name)
 
+    def _show_osc(self) -> None:
+        """
+        Отображает текущую осциллограмму self.osc_now, её спектр и подписи.
+        Кривые и подписи не пересоздаются — обновляются только данные и текст.
+        """
+        now_ind = self.osc_now - self.start_data_osc
+        with self.frame_timings.stage("fft"):
+            x, spectr, dominant = self._get_spectr(self.osc_now, now_ind)
+        with self.frame_timings.stage("draw"):
+            self.info_now_num_osc.setText(f"Номер кадра: {self.osc_now + 1} из {self.num_osc}")
+            self.osc_curve_lod.set_data(self._frame_row(now_ind))
+            self.spectr_curve_lod.set_data(x, spectr)
+            self.text.setText(f"{dominant} кГц")
+            self.dB_text.setText(f"{self.dB_data[now_ind]} Дб")
+            self.__update_info_position()
+            self.check_next_prev_osc()
+        self.frame_timings.end_frame()
+        self._refresh_timings_label()
+
+    def _refresh_timings_label(self) -> None:
+        if self.timings_label.isVisible():
+            self.timings_label.setText(self.frame_timings.format_last())
+
+    def toggle_timings_overlay(self) -> None:
+        """Показывает или скрывает строку с временем этапов отображения кадра."""
+        self.timings_label.setVisible(not self.timings_label.isVisible())
+        self._refresh_timings_label()
+
+    def toggle_tracing(self) -> None:
+        """
+        Включает трассировку или выключает её и записывает трассу в trace_<дата_время>.json
+        (открывается в chrome://tracing или ui.perfetto.dev) и сводку по участкам рядом.
+        """
+        if not tracing.is_enabled():
+            tracing.clear()
+            tracing.enable()
+            self.timings_label.setText("Трассировка включена (F3 — остановить и сохранить)")
+            self.timings_label.show()
+            return
+        tracing.disable()
+        path = os.path.abspath(time.strftime("trace_%Y%m%d_%H%M%S.json"))
+        try:
+            tracing.write_chrome_trace(path)
+        except OSError as e:
+            self.timings_label.setText(f"Не удалось сохранить трассу: {e}")
+            return
+        self.logger.logg(LOG_LEVEL._INFO_, f"Трасса сохранена: {path}",
+                         os.path.basename(__file__),
+                         inspect.currentframe().f_lineno,
+                         inspect.currentframe().f_code.co_name)
+        self.timings_label.setText(f"Трасса сохранена: {path}")
+        self.timings_label.show()
+
+    def _osc_freq_khz(self, osc_index: int) -> float:
+        """Частота дискретизации осциллограммы в кГц (1000, если в файле она не указана)."""
+        try:
+            return self.osc_file.oscDefMod[osc_index].freq
+        except (AttributeError, IndexError):
+            return 1000
+
+    def _frame_row(self, local_index: int) -> np.ndarray:
+        """Осциллограмма текущего блока с номером local_index — без нулей дополнения до длины блока."""
+        return self.osc_datas[local_index, :self.osc_lengths[local_index]]
+
+    def _get_spectr(self, osc_index: int, local_index: int) -> tuple[np.ndarray, np.ndarray, float]:
+        """Спектр осциллограммы из кэша SpectrumEngine: (частоты в кГц, спектр, доминирующая частота)."""
+        return self.spectrum_engine.spectrum((self.name_osc, osc_index), self._frame_row(local_index),
+                                             self._osc_freq_khz(osc_index))
+
     def _update_coords_label(self, evt, plot_widget, label: QLabel) -> None:
         """Обновляет метку с координатами X/Y при движении курсора над графиком."""
         pos = evt[0] if isinstance(evt, (tuple, list)) and evt else evt
@@ -265,74 +389,164 @@ class MainMenu(QWidget):
         else:
             label.setText("X: —  Y: —")
 
+    @staticmethod
+    def _place_info_text(curve, text_item) -> None:
+        """Ставит текстовый элемент в правый верхний угол области данных кривой."""
+        x_min, x_max = curve.dataBounds(0)
+        y_min, y_max = curve.dataBounds(1)
+        if x_min is None or y_min is None:
+            # Данных ещё нет
+            return
+        # Устанавливаем текст в правый верхний угол с небольшим отступом
+        text_item.setPos(x_min + (x_max - x_min) * 0.85, y_min + (y_max - y_min) * 0.9)
+
     def __update_info_position(self) -> None:
         """Обновляет позицию текстового элемента в правом верхнем углу графика."""
         graph = self.sender()
 
         if graph == self.now_plot_osc:
-            y_min, y_max = self.now_plot_osc_item.dataBounds(1)
-            x_min, x_max = self.now_plot_osc_item.dataBounds(0)
-            x_width = x_max - x_min
-            y_height = y_max - y_min
-            delta_x = x_width * 0.85
-            delta_y = y_height * 0.9
-            # Устанавливаем текст в правый верхний угол с небольшим отступом
-            self.dB_text.setPos(x_min + delta_x, y_min + delta_y)
-            return
+            self._place_info_text(self.now_plot_osc_item, self.dB_text)
         elif graph == self.now_plot_spectr:
-            y_min, y_max = self.now_plot_spectr_item.dataBounds(1)
-            x_min, x_max = self.now_plot_spectr_item.dataBounds(0)
-            x_width = x_max - x_min
-            y_height = y_max - y_min
-            delta_x = x_width * 0.85
-            delta_y = y_height * 0.9
-            # Устанавливаем текст в правый верхний угол с небольшим отступом
-            self.text.setPos(x_min + delta_x, y_min + delta_y)
-            return
+            self._place_info_text(self.now_plot_spectr_item, self.text)
         else:
             # Если метод вызван напрямую, то устанавливаем инфо-текст в верхний правый угол у обоих графиков
-            # для self.now_plot_osc
-            y_min, y_max = self.now_plot_osc_item.dataBounds(1)
-            x_min, x_max = self.now_plot_osc_item.dataBounds(0)
-            x_width = x_max - x_min
-            y_height = y_max - y_min
-            delta_x = x_width * 0.85
-            delta_y = y_height * 0.9
-            # Устанавливаем текст в правый верхний угол с небольшим отступом
-            self.dB_text.setPos(x_min + delta_x, y_min + delta_y)
-
-            # для self.now_plot_spectr
-            y_min, y_max = self.now_plot_spectr_item.dataBounds(1)
-            x_min, x_max = self.now_plot_spectr_item.dataBounds(0)
-            x_width = x_max - x_min
-            y_height = y_max - y_min
-            delta_x = x_width * 0.85
-            delta_y = y_height * 0.9
-            # Устанавливаем текст в правый верхний угол с небольшим отступом
-            self.text.setPos(x_min + delta_x, y_min + delta_y)
-        return
+            self._place_info_text(self.now_plot_osc_item, self.dB_text)
+            self._place_info_text(self.now_plot_spectr_item, self.text)
+
+    def _index_config(self) -> dict:
+        """Конфигурация АЧХ, по которой строится индекс метрик (Sabs, fmax)."""
+        return load_ach_config()
+
+    def _open_osc_index(self) -> None:
+        """Открывает индекс метрик текущего файла; если его нет или он устарел — строит в фоне."""
+        if self._index_builder is not None:
+            self._index_builder.stop()
+            self._index_builder = None
+        from osc_index import OscIndexBuilder, load_osc_index
+        config = self._index_config()
+        self.osc_index = load_osc_index(self.name_osc, config)
+        if self.osc_index is None:
+            self._index_builder = OscIndexBuilder(self.name_osc, config, on_done=self.osc_index_ready.emit,
+                                                  progress=self.osc_index_progress.emit)
+            self._index_builder.start()
+
+    def _on_osc_index_ready(self, index) -> None:
+        """Принимает индекс, построенный в фоне (вызывается в потоке интерфейса)."""
+        from osc_index import index_path
+        if index is None or index.path != index_path(self.name_osc):
+            return
+        self._index_builder = None
+        self.osc_index = index
+        self._update_trend()
+        self._update_query_matches()
+
+    def _update_trend(self) -> None:
+        """Показывает тренд метрик из индекса (или ход его построения)."""
+        if self.trend_view is None:
+            return
+        osc_index = self.osc_index
+        if osc_index is not None and osc_index.num_osc == self.num_osc:
+            self.trend_view.set_index(osc_index)
+        else:
+            self.trend_view.clear("Расчёт метрик файла…")
+        self.trend_view.set_current(self.osc_now)
+
+    def _goto_osc_index(self, osc_index: int) -> None:
+        """Переход к кадру, выбранному на тренде или по условию (как ввод номера в поле)."""
+        self.edit_osc_num.setText(str(osc_index + 1))
+        self._goto_osc_by_edit()
+
+    def _apply_query(self) -> None:
+        """Разбирает условие из поля, отбирает кадры и переходит к первому из них, начиная с текущего."""
+        from frame_query import FrameQuery, next_match
+
+        text = self.edit_query.text().strip()
+        self.frame_query = None
+        if text:
+            try:
+                self.frame_query = FrameQuery(text)
+            except ValueError as e:
+                self._set_query_label(str(e), error=True)
+                return
+        self._update_query_matches()
+        if self.query_matches is not None and len(self.query_matches):
+            target = next_match(self.query_matches, self.osc_now - 1)
+            self._goto_osc_index(target if target is not None else int(self.query_matches[0]))
+
+    def _update_query_matches(self) -> None:
+        """Пересчитывает подходящие кадры по индексу текущего файла (при смене условия, файла или индекса)."""
+        self.query_matches = None
+        query = self.frame_query
+        if query is None:
+            self._set_query_label("")
+            return
+        osc_index = self.osc_index
+        if osc_index is None or osc_index.num_osc != self.num_osc:
+            self._set_query_label("Условие применится после расчёта метрик файла")
+            return
+        try:
+            self.query_matches = query.evaluate(osc_index.columns, osc_index.num_osc)
+        except ValueError as e:
+            self._set_query_label(str(e), error=True)
+            return
+        self._set_query_label(f"Подходит кадров: {len(self.query_matches)}")
+
+    def _set_query_label(self, text: str, error: bool = False) -> None:
+        self.query_label.setStyleSheet("color: #c00;" if error else "")
+        self.query_label.setText(text)
+
+    def goto_next_match(self) -> None:
+        """Переход к следующему кадру, удовлетворяющему условию."""
+        from frame_query import next_match
+        if self.query_matches is None:
+            return
+        target = next_match(self.query_matches, self.osc_now)
+        if target is not None:
+            self._goto_osc_index(target)
+
+    def goto_prev_match(self) -> None:
+        """Переход к предыдущему кадру, удовлетворяющему условию."""
+        from frame_query import prev_match
+        if self.query_matches is None:
+            return
+        target = prev_match(self.query_matches, self.osc_now)
+        if target is not None:
+            self._goto_osc_index(target)
+
+    def _read_block(self, osc_reader, start: int, end: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Читает осциллограммы [start, end): (осциллограммы, K_mkV, децибелы, длины осциллограмм).
+        Децибелы берутся из индекса или рассчитываются.
+        """
+        from work_with_osc import get_dB_block
+
+        osc_datas, K_mkV, _ = osc_reader.read_block(start, end)
+        osc_datas, K_mkV = np.asarray(osc_datas), np.asarray(K_mkV)
+        osc_index = self.osc_index
+        if osc_index is not None and osc_index.num_osc == self.num_osc:
+            dB_data = np.asarray(osc_index["dB"][start:end], dtype=np.int32)
+        else:
+            dB_data = get_dB_block(osc_datas, K_mkV)
+        return osc_datas, K_mkV, dB_data, np.asarray(osc_reader.lengths(start, end), dtype=np.int64)
+
+    def _set_block(self, osc_index: int, direction: int = 0) -> None:
+        """
+        Делает текущим блок осциллограмм, содержащий osc_index, и запускает
+        фоновую подгрузку соседних блоков в направлении движения direction.
+        """
+        (self.start_data_osc, self.end_data_osc,
+         self.osc_datas, self.K_mkV, self.dB_data, self.osc_lengths) = self.frame_cache.get(osc_index)
+        self.frame_cache.prefetch(osc_index, direction)
 
     def __load_prev_osc(self):
         if self.osc_now <= 0:
             return
-        self.end_data_osc = self.start_data_osc
-        self.start_data_osc = self.start_data_osc - 500 if (self.start_data_osc - 500) > 0 else 0
-        self.osc_datas = np.array(self.osc_file.getDotsOSC(self.start_data_osc, self.end_data_osc))
-
-        self.K_mkV = np.array(self.osc_file.get_K_mkV(self.start_data_osc, self.end_data_osc))
-        self.dB_data = np.array(([get_dB_osc(self.osc_datas[i], self.K_mkV[i])
-                                  for i in range(0, self.end_data_osc - self.start_data_osc)]))
+        self._set_block(self.start_data_osc - 1, direction=-1)
 
     def __load_next_osc(self):
         if self.osc_now >= self.num_osc - 1:
             return
-        self.start_data_osc = self.end_data_osc
-        self.end_data_osc = self.end_data_osc + 500 if (self.num_osc - self.osc_now) > 500 else self.num_osc
-        self.osc_datas = np.array(self.osc_file.getDotsOSC(self.start_data_osc, self.end_data_osc))
-
-        self.K_mkV = np.array(self.osc_file.get_K_mkV(self.start_data_osc, self.end_data_osc))
-        self.dB_data = np.array(([get_dB_osc(self.osc_datas[i], self.K_mkV[i])
-                                  for i in range(0, self.end_data_osc - self.start_data_osc)]))
+        self._set_block(self.end_data_osc, direction=1)
 
     def keyPressEvent(self, event):
         """
@@ -342,6 +556,15 @@ class MainMenu(QWidget):
             self.open_prev_osc()
         elif event.key() == Qt.Key_Right:
             self.open_next_osc()
+        elif event.key() == Qt.Key_F2:
+            self.toggle_timings_overlay()
+        elif event.key() == Qt.Key_F3:
+            self.toggle_tracing()
+        elif event.key() == Qt.Key_F8:
+            if event.modifiers() & Qt.ShiftModifier:
+                self.goto_prev_match()
+            else:
+                self.goto_next_match()
         else:
             event.ignore()  # Позволяет обработать событие другим обработчикам
 
@@ -362,30 +585,13 @@ class MainMenu(QWidget):
         target_index = num - 1  # 0-based
         if target_index == self.osc_now:
             return
-        # Загружаем данные, если целевая осциллограмма вне текущего диапазона
-        if target_index < self.start_data_osc or target_index >= self.end_data_osc:
-            self.start_data_osc = (target_index // 500) * 500
-            self.end_data_osc = min(self.start_data_osc + 500, self.num_osc)
-            self.osc_datas = np.array(self.osc_file.getDotsOSC(self.start_data_osc, self.end_data_osc))
-            self.K_mkV = np.array(self.osc_file.get_K_mkV(self.start_data_osc, self.end_data_osc))
-            self.dB_data = np.array([get_dB_osc(self.osc_datas[i], self.K_mkV[i])
-                                    for i in range(self.end_data_osc - self.start_data_osc)])
-        self.osc_now = target_index
-        now_ind = self.osc_now - self.start_data_osc
-        self.now_plot_osc.clear()
-        self.now_plot_spectr.clear()
-        self.info_now_num_osc.setText(f"Номер кадра: {self.osc_now + 1} из {self.num_osc}")
-        self.now_plot_osc_item = self.now_plot_osc.plot(self.osc_datas[now_ind])
-        spectr = four2(np.array(self.osc_datas[now_ind], dtype=np.float64))
-        x = [i / (len(spectr) / 2 / 500) for i in range(round(len(spectr) / 2))]
-        self.now_plot_spectr_item = self.now_plot_spectr.plot(x, spectr[:round(len(spectr) / 2)])
-        index = np.argmax(spectr[:round(len(spectr) / 2)])
-        self.text = pg.TextItem(f"{x[index]} кГц", anchor=(0, 1), color="r")
-        self.now_plot_spectr.addItem(self.text)
-        self.dB_text = pg.TextItem(f"{self.dB_data[now_ind]} Дб", anchor=(0, 1), color="r")
-        self.now_plot_osc.addItem(self.dB_text)
-        self.__update_info_position()
-        self.check_next_prev_osc()
+        self.frame_timings.begin_frame()
+        with self.frame_timings.stage("data"):
+            # Загружаем данные, если целевая осциллограмма вне текущего диапазона
+            if target_index < self.start_data_osc or target_index >= self.end_data_osc:
+                self._set_block(target_index, direction=1 if target_index > self.osc_now else -1)
+            self.osc_now = target_index
+        self._show_osc()
         self.osc_now_changed.emit(self.osc_now)
 
     def check_next_prev_osc(self) -> None:
@@ -393,41 +599,22 @@ class MainMenu(QWidget):
             self.bttn_next_osc.setEnabled(False)
         elif not self.bttn_next_osc.isEnabled():
             self.bttn_next_osc.setEnabled(True)
-        if self.osc_now <= self.start_data_osc:
+        if self.osc_now <= 0:
             self.bttn_prev_osc.setEnabled(False)
         elif not self.bttn_prev_osc.isEnabled():
             self.bttn_prev_osc.setEnabled(True)
 
     def open_next_osc(self) -> None:
-        if self.osc_now >= self.end_data_osc - 1:
-            self.__load_next_osc()
-            self.check_next_prev_osc()
-            if not self.bttn_next_osc.isEnabled():
-                return
+        self.frame_timings.begin_frame()
+        with self.frame_timings.stage("data"):
+            if self.osc_now >= self.end_data_osc - 1:
+                self.__load_next_osc()
+                self.check_next_prev_osc()
+                if not self.bttn_next_osc.isEnabled():
+                    return
+            self.osc_now += 1
 
-        self.osc_now += 1
-        self.now_plot_osc.clear()
-        self.now_plot_spectr.clear()
-
-        self.info_now_num_osc.setText(f"Номер кадра: {self.osc_now + 1} из {self.num_osc}")
-
-        now_ind = self.osc_now - self.start_data_osc
-        self.now_plot_osc_item = self.now_plot_osc.plot(self.osc_datas[now_ind])
-        spectr = four2(np.array(self.osc_datas[now_ind], dtype=np.float64))
-        x = [i / (len(spectr) / 2 / 500) for i in range(round(len(spectr) / 2))]
-        self.now_plot_spectr_item = self.now_plot_spectr.plot(x, spectr[:round(len(spectr) / 2)])
-
-        # Добавляем информацию о том, какя частота более выражена в сигнале
-        index = np.argmax(spectr[:round(len(spectr) / 2)])
-        self.text = pg.TextItem(f"{x[index]} кГц", anchor=(0, 1), color="r")
-        self.now_plot_spectr.addItem(self.text)
-
-        # Добавляем информацию децибелах
-        self.dB_text = pg.TextItem(f"{self.dB_data[now_ind]} Дб", anchor=(0, 1), color="r")
-        self.now_plot_osc.addItem(self.dB_text)
-
-        self.__update_info_position()
-        self.check_next_prev_osc()
+        self._show_osc()
 
         # Отправляем сигнал о том, что номер осциллограммы изменился
         self.osc_now_changed.emit(self.osc_now)
@@ -436,34 +623,16 @@ class MainMenu(QWidget):
         if self.osc_now == 0:
             return
         
-        if self.osc_now <= (self.start_data_osc - 1):
-            self.__load_prev_osc()
-            self.check_next_prev_osc()
-            if not self.bttn_prev_osc.isEnabled():
-                return
-        self.osc_now -= 1
-        self.now_plot_osc.clear()
-        self.now_plot_spectr.clear()
-
-        self.info_now_num_osc.setText(f"Номер кадра: {self.osc_now + 1} из {self.num_osc}")
-
-        now_ind = self.osc_now - self.start_data_osc
-        self.now_plot_osc_item = self.now_plot_osc.plot(self.osc_datas[now_ind])
-        spectr = four2(np.array(self.osc_datas[now_ind], dtype=np.float64))
-        x = [i / (len(spectr) / 2 / 500) for i in range(round(len(spectr) / 2))]
-        self.now_plot_spectr_item = self.now_plot_spectr.plot(x, spectr[:round(len(spectr) / 2)])
-
-        # Добавляем текст (аннотацию)
-        index = np.argmax(spectr[:round(len(spectr) / 2)])
-        self.text = pg.TextItem(f"{x[index]} кГц", anchor=(0, 1), color="r")
-        self.now_plot_spectr.addItem(self.text)
-
-        # Добавляем информацию децибелах
-        self.dB_text = pg.TextItem(f"{self.dB_data[now_ind]} Дб", anchor=(0, 1), color="r")
-        self.now_plot_osc.addItem(self.dB_text)
-
-        self.__update_info_position()
-        self.check_next_prev_osc()
+        self.frame_timings.begin_frame()
+        with self.frame_timings.stage("data"):
+            if self.osc_now <= self.start_data_osc:
+                self.__load_prev_osc()
+                self.check_next_prev_osc()
+                if not self.bttn_prev_osc.isEnabled():
+                    return
+            self.osc_now -= 1
+
+        self._show_osc()
 
         # Отправляем сигнал о том, что номер осциллограммы изменился
         self.osc_now_changed.emit(self.osc_now)
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Общие настройки тестов: модули приложения импортируются из корня репозитория,
+вместо Aegis_osc подключается синтетический fake_osc (тесты работают без Windows-модуля).
+"""
+
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import fake_osc  # noqa: E402
+
+fake_osc.install()
+
+
+@pytest.fixture
+def osc_files(tmp_path, monkeypatch):
+    """
+    Фабрика синтетических .osc файлов: make(name, num_osc=..., length=..., variable_length=...)
+    задаёт параметры fake_osc и создаёт файл-заглушку (нужен для сигнатуры файла).
+    Возвращает (путь, FakeFileOsc с теми же данными).
+    """
+    def make(name: str = "a.osc", **params):
+        for key, value in params.items():
+            monkeypatch.setitem(fake_osc._DEFAULTS, key, value)
+        path = str(tmp_path / name)
+        with open(path, "wb") as f:
+            f.write(name.encode("utf-8") * 64)
+        return path, fake_osc.File_osc(path)
+
+    return make
+
+
+@pytest.fixture
+def fork_context():
+    """Контекст пула процессов, в котором процессы видят параметры fake_osc, заданные в тесте."""
+    if "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("нужен запуск процессов через fork")
+    return multiprocessing.get_context("fork")
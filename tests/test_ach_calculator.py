@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from scipy.ndimage import uniform_filter1d
+
+from ach_calculator import calc_ach, calc_ach_batch, load_ach_config, validate_ach_config, welch_spectra
+from osc_store import AegisOscReader
+
+
+def _reference_ach(osc_data, k_mkV, freq_khz, config):
+    """Расчёт АЧХ одной осциллограммы по исходному (поэлементному) алгоритму."""
+    fft_size, skip_bins = config["fft_size"], config["skip_bins"]
+    osc_data = np.asarray(osc_data, dtype=np.float64)
+    sref = (20 * np.log10(np.max(np.abs(osc_data)) * k_mkV) - config["refGT200"]) + config["SGT200"]
+    spec = np.abs(np.fft.fft(osc_data, n=fft_size))[: fft_size // 2]
+    f = np.arange(len(spec), dtype=np.float64) * freq_khz / fft_size
+    f_safe = np.where(f > 0, f, f[1])
+    spec_vel = 20 * np.log10(spec / (2 * np.pi * f_safe))
+    spec_vel = uniform_filter1d(spec_vel, size=config["smooth_window"], mode="nearest")
+    region = spec_vel[skip_bins:]
+    max_spec_vel = np.max(region)
+    ref = sref / max_spec_vel if np.isfinite(max_spec_vel) and max_spec_vel > 0 else 1.0
+    return f, spec_vel * ref, sref, float(f[np.argmax(region) + skip_bins]), ref
+
+
+@pytest.fixture
+def block(osc_files):
+    _, osc_file = osc_files(num_osc=12, length=2048)
+    samples = np.asarray(osc_file.getDotsOSC(0, 12), dtype=np.float64)
+    freq = np.where(np.arange(12) % 3 == 0, 2000.0, osc_file.freq_khz)
+    return samples, osc_file.k_mkV[:12], freq
+
+
+def test_batch_matches_single_and_reference(block):
+    samples, k_mkV, freq = block
+    config = load_ach_config()
+    freq_axes, ach_db, sabs, fmax, ref = calc_ach_batch(samples, k_mkV, freq, config)
+
+    for i in range(len(samples)):
+        f, curve, meta = calc_ach(samples[i], k_mkV[i], freq[i], config)
+        np.testing.assert_allclose(curve, ach_db[i], rtol=1e-9)
+        np.testing.assert_allclose(f, freq_axes[i])
+        assert meta["fmax"] == pytest.approx(fmax[i])
+        assert meta["Sabs"] == pytest.approx(sabs[i])
+
+        f_ref, curve_ref, sabs_ref, fmax_ref, ref_ref = _reference_ach(samples[i], k_mkV[i], freq[i], config)
+        np.testing.assert_allclose(ach_db[i], curve_ref, rtol=1e-7, atol=1e-7)
+        assert sabs[i] == pytest.approx(sabs_ref)
+        assert fmax[i] == pytest.approx(fmax_ref)
+        assert ref[i] == pytest.approx(ref_ref)
+
+
+def test_welch_single_segment_is_windowed_fft():
+    x = np.random.default_rng(0).standard_normal((3, 1000))
+    window = np.hanning(1000)
+    expected = np.abs(np.fft.rfft(x * window, n=2048, axis=1))[:, :1024] / window.mean()
+    np.testing.assert_allclose(welch_spectra(x, 2048, segment=1000, overlap=0.5), expected, rtol=1e-10)
+
+
+def test_welch_groups_do_not_change_result():
+    x = np.random.default_rng(1).standard_normal((2, 20000))
+    whole = welch_spectra(x, 4096, segment=512, overlap=0.5)
+    grouped = welch_spectra(x, 4096, segment=512, overlap=0.5, max_bytes=1)
+    np.testing.assert_allclose(grouped, whole, rtol=1e-10)
+
+
+def test_welch_finds_tone():
+    config = dict(load_ach_config(), method="welch")
+    t = np.arange(16384) / 1e6
+    tone = 100 * np.sin(2 * np.pi * 150e3 * t) + np.random.default_rng(2).standard_normal(16384)
+    _, _, _, fmax, _ = calc_ach_batch(tone[None, :], np.ones(1), np.full(1, 1000.0), config)
+    assert fmax[0] == pytest.approx(150, abs=1)
+
+
+def test_invalid_config_values_fall_back_to_defaults():
+    config = validate_ach_config({"method": "wavelet", "welch_overlap": 1.0, "welch_window": "rect",
+                                  "fft_size": 100.5})
+    assert config["method"] == "fft"
+    assert config["welch_overlap"] == 0.5
+    assert config["welch_window"] == "rect"
+    assert config["fft_size"] == 8192
+
+
+def test_welch_ragged_block_matches_single_frames(osc_files):
+    _, osc_file = osc_files(num_osc=8, length=4096, variable_length=True, seed=3)
+    reader = AegisOscReader(osc_file)
+    samples, k_mkV, freq = reader.read_block(0, 8)
+    config = dict(load_ach_config(), method="welch")
+    _, ach_db, sabs, fmax, _ = calc_ach_batch(samples, k_mkV, freq, config, lengths=reader.lengths(0, 8))
+
+    for i in range(8):
+        _, curve, meta = calc_ach(osc_file._frame(i), k_mkV[i], freq[i], config)
+        np.testing.assert_allclose(ach_db[i], curve, rtol=1e-9, atol=1e-9)
+        assert fmax[i] == meta["fmax"]
+        assert sabs[i] == pytest.approx(meta["Sabs"])
+
+
+def test_welch_short_rows_use_own_segment():
+    x = np.random.default_rng(3).standard_normal((3, 3000))
+    lengths = np.array([3000, 700, 1500])
+    x[1, 700:] = 0
+    x[2, 1500:] = 0
+    block = welch_spectra(x, 4096, segment=1024, lengths=lengths)
+    for i, length in enumerate(lengths):
+        np.testing.assert_allclose(block[i], welch_spectra(x[i, :length], 4096, segment=1024)[0], rtol=1e-10)
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from ach_stats import HIST_STEP_DB, AchStats
+
+
+def test_matches_numpy_over_blocks():
+    rng = np.random.default_rng(0)
+    curves = rng.normal(40, 8, size=(3000, 25))
+    curves[5, 3] = -np.inf
+    stats = AchStats(np.arange(25.0))
+    for start in range(0, len(curves), 256):
+        stats.update(curves[start:start + 256])
+    result = stats.result()
+
+    masked = np.ma.masked_invalid(curves)
+    np.testing.assert_allclose(result["mean"], masked.mean(axis=0), rtol=1e-10)
+    np.testing.assert_allclose(result["std"], masked.std(axis=0, ddof=1), rtol=1e-8)
+    np.testing.assert_allclose(result["min"], masked.min(axis=0))
+    np.testing.assert_allclose(result["max"], masked.max(axis=0))
+    assert result["frames"] == 3000
+    assert result["count"][3] == 2999
+    for p in (5, 50, 95):
+        expected = np.array([np.percentile(masked[:, j].compressed(), p) for j in range(25)])
+        np.testing.assert_allclose(result[f"p{p}"], expected, atol=HIST_STEP_DB)
+
+
+def test_merge_equals_single_pass():
+    rng = np.random.default_rng(1)
+    curves = rng.normal(20, 3, size=(500, 10))
+    whole, first, second = AchStats(np.arange(10.0)), AchStats(np.arange(10.0)), AchStats(np.arange(10.0))
+    whole.update(curves)
+    first.update(curves[:123])
+    second.update(curves[123:])
+    first.merge(second)
+    a, b = whole.result(), first.result()
+    for name in ("mean", "std", "min", "max", "p5", "p50", "p95"):
+        np.testing.assert_allclose(b[name], a[name], rtol=1e-10)
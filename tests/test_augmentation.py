@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from augmentation import augment_block, shift_block
+
+
+def test_cycle_shift_matches_roll():
+    block = np.arange(40).reshape(4, 10)
+    shifts = np.array([0, 3, 9, 12])
+    out = shift_block(block, shifts, "cycle")
+    for i, shift in enumerate(shifts):
+        np.testing.assert_array_equal(out[i], np.roll(block[i], shift))
+
+
+def test_shift_respects_lengths():
+    block = np.arange(1, 31).reshape(3, 10)
+    lengths = np.array([10, 6, 4])
+    shifts = np.array([2, 2, 5])
+    out = shift_block(block, shifts, "cycle", lengths)
+    for i, length in enumerate(lengths):
+        np.testing.assert_array_equal(out[i, :length], np.roll(block[i, :length], shifts[i]))
+        np.testing.assert_array_equal(out[i, length:], block[i, length:])
+
+    zero = shift_block(block, shifts, "zero", lengths)
+    np.testing.assert_array_equal(zero[1, :6], [0, 0, 11, 12, 13, 14])
+
+
+def test_unknown_shift_mode():
+    with pytest.raises(ValueError):
+        shift_block(np.zeros((1, 4)), np.zeros(1), "wrap")
+
+
+def test_augment_block_hits_target_snr():
+    t = np.arange(50000)
+    block = np.vstack([np.sin(t / 7.0), 3 * np.cos(t / 11.0)])
+    out, params = augment_block(block, np.random.default_rng(0), snr_db=20)
+    noise = out - block
+    snr = 10 * np.log10(np.mean(block ** 2, axis=1) / np.mean(noise ** 2, axis=1))
+    np.testing.assert_allclose(snr, 20, atol=0.2)
+    np.testing.assert_array_equal(params["snr_db"], [20, 20])
+
+
+def test_augment_block_gain_and_shift():
+    block = np.random.default_rng(1).standard_normal((5, 64))
+    out, params = augment_block(block, np.random.default_rng(2), shift=(1, 10), scale=(0.5, 2.0), flip=0.5)
+    for i in range(5):
+        expected = np.roll(block[i], params["shift"][i]) * params["gain"][i]
+        np.testing.assert_allclose(out[i], expected, rtol=1e-6)
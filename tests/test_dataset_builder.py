@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from dataset_builder import build_dataset, load_dataset
+from padding import TAIL_SHARE
+from work_with_osc import DataOsc
+
+
+@pytest.fixture
+def files(osc_files):
+    """Три файла с кадрами разной длины, по файлу на класс (доли классов равны — без прореживания)."""
+    made = [osc_files(name, num_osc=12, length=700, variable_length=True) for name in ("a.osc", "b.osc", "c.osc")]
+    return [path for path, _ in made], made[0][1]
+
+
+def _frames(dataset, osc_file):
+    """Исходные кадры строк датасета (все файлы fake_osc с одинаковыми параметрами совпадают)."""
+    return [osc_file._frame(int(i)).astype(np.float64) for i in dataset["frame"]]
+
+
+def test_reflect_pads_from_real_length(files, fork_context, tmp_path):
+    paths, osc_file = files
+    out = str(tmp_path / "dataset")
+    build_dataset(paths, ["A", "B", "C"], out, 1000, pad_mode="reflect", dtype=np.float64, workers=1,
+                  block_size=5, mp_context=fork_context)
+    dataset = load_dataset(out)
+    assert len(dataset["X"]) == 36
+    for row, frame in zip(dataset["X"], _frames(dataset, osc_file)):
+        np.testing.assert_allclose(row, np.pad(frame, (0, 1000 - len(frame)), mode="reflect"))
+    np.testing.assert_array_equal(dataset["length"], osc_file.lengths[dataset["frame"]])
+
+
+def test_noise_uses_signal_tail(files, fork_context, tmp_path):
+    paths, osc_file = files
+    out = str(tmp_path / "dataset.npz")
+    build_dataset(paths, ["A", "B", "C"], out, 20000, pad_mode="noise", seed=0, dtype=np.float64, workers=1,
+                  mp_context=fork_context)
+    dataset = load_dataset(out)
+    for row, frame in zip(dataset["X"], _frames(dataset, osc_file)):
+        np.testing.assert_array_equal(row[:len(frame)], frame)
+        tail = frame[int(round(len(frame) * (1 - TAIL_SHARE))):]
+        assert row[len(frame):].std() == pytest.approx(tail.std(), rel=0.1)
+
+
+def test_data_osc_rows_have_true_length(files):
+    paths, osc_file = files
+    oscs, categories, dB, k_mkV = DataOsc.get_data_from_osc_file(paths[0], "A")
+    assert len(oscs) == 12 and categories == ["A"] * 12
+    for i, osc in enumerate(oscs):
+        np.testing.assert_array_equal(osc, osc_file._frame(i))
+    np.testing.assert_array_equal(k_mkV, osc_file.k_mkV)
+
+
+def test_create_datasets_reads_selected_rows(osc_files):
+    path, osc_file = osc_files("a.osc", num_osc=60, length=500, variable_length=True)
+    paths = [path] + [osc_files(name)[0] for name in ("b.osc", "c.osc", "d.osc")]
+    oscs, categories, dB = DataOsc.create_datasets_with_osc(paths, ["A", "A", "A", "B"], seed=0, block_size=7)
+    assert categories.count("B") == 60 and len(oscs) == len(categories) == len(dB)
+    frames = [osc_file._frame(i) for i in range(60)]
+    for osc, value in zip(oscs, dB):
+        i = next(i for i, frame in enumerate(frames) if np.array_equal(osc, frame))
+        expected = np.round(20 * np.log10(np.abs(frames[i]).max() * osc_file.k_mkV[i]))
+        assert value == expected
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from ach_calculator import calc_ach, load_ach_config
+from features import FEATURE_SCHEMA, export_features, load_features
+from Fourier import spectral_features
+from work_with_osc import frame_metrics
+
+
+def test_variable_length_features_use_real_samples(osc_files, fork_context, tmp_path):
+    path, osc_file = osc_files(num_osc=40, length=1024, variable_length=True)
+    config = load_ach_config()
+    summary = export_features([path], str(tmp_path / "features"), config=config, fmt="npz", workers=1,
+                              block_size=16, rows_per_part=25, mp_context=fork_context)
+    assert summary["frames"] == 40
+    assert len(summary["parts"]) == 2
+
+    table = load_features(str(tmp_path / "features"))
+    assert set(FEATURE_SCHEMA) <= set(table)
+    np.testing.assert_array_equal(table["frame"], np.arange(40))
+    for i in range(40):
+        frame = osc_file._frame(i).astype(np.float64)
+        metrics = frame_metrics(frame[None, :], osc_file.k_mkV[i], osc_file.freq_khz, spectral=False)[0]
+        dominant, centroid = spectral_features(frame[None, :], osc_file.freq_khz)
+        _, _, meta = calc_ach(frame, osc_file.k_mkV[i], osc_file.freq_khz, config)
+        assert table["rms"][i] == pytest.approx(np.sqrt(np.mean(frame ** 2)))
+        assert table["mean"][i] == pytest.approx(frame.mean(), abs=1e-9)
+        assert table["std_dev"][i] == pytest.approx(frame.std())
+        assert table["kurtosis"][i] == pytest.approx(metrics["kurtosis"])
+        assert table["dominant_kHz"][i] == pytest.approx(dominant[0])
+        assert table["spectral_centroid_kHz"][i] == pytest.approx(centroid[0])
+        assert table["Sabs"][i] == pytest.approx(meta["Sabs"])
+        assert table["fmax"][i] == pytest.approx(meta["fmax"])
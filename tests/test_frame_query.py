@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from frame_query import FrameQuery, next_match, prev_match
+
+
+@pytest.fixture
+def columns():
+    rng = np.random.default_rng(0)
+    return {"dB": rng.integers(30, 90, size=1000), "fmax": rng.uniform(50, 300, size=1000),
+            "Sabs": rng.normal(60, 5, size=1000)}
+
+
+def test_matches_numpy(columns):
+    query = FrameQuery("dB >= 60 and 120 <= fmax <= 180 or not Sabs < 70")
+    expected = ((columns["dB"] >= 60) & (columns["fmax"] >= 120) & (columns["fmax"] <= 180)) \
+        | ~(columns["Sabs"] < 70)
+    np.testing.assert_array_equal(query.mask(columns), expected)
+    np.testing.assert_array_equal(query.evaluate(columns), np.flatnonzero(expected))
+
+
+def test_arithmetic_and_frame_column(columns):
+    query = FrameQuery("abs(Sabs - 60) / 2 < 1 and frame > 500")
+    expected = (np.abs(columns["Sabs"] - 60) / 2 < 1) & (np.arange(1, 1001) > 500)
+    np.testing.assert_array_equal(query.mask(columns), expected)
+    assert query.names == {"Sabs", "frame"}
+
+
+@pytest.mark.parametrize("text", ["", "dB >", "__import__('os')", "dB.real > 1", "dB", "unknown > 1",
+                                  "'a' < dB", "dB[0] > 1"])
+def test_rejects_invalid_conditions(columns, text):
+    with pytest.raises(ValueError):
+        FrameQuery(text, columns=set(columns)).mask(columns)
+
+
+def test_next_and_prev_match():
+    matches = np.array([3, 10, 42])
+    assert next_match(matches, 3) == 10
+    assert next_match(matches, 0) == 3
+    assert next_match(matches, 42) is None
+    assert prev_match(matches, 10) == 3
+    assert prev_match(matches, 3) is None
+    assert prev_match(matches, 100) == 42
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+
+from ach_calculator import load_ach_config
+from osc_index import build_osc_index, load_osc_index
+from work_with_osc import frame_metrics
+
+
+def test_index_metrics_use_real_frame_lengths(osc_files):
+    path, osc_file = osc_files(num_osc=30, length=600, variable_length=True)
+    index = build_osc_index(path, load_ach_config(), osc_file=osc_file, block_size=8)
+
+    for i in range(30):
+        frame = osc_file._frame(i).astype(np.float64)
+        metrics = frame_metrics(frame[None, :], osc_file.k_mkV[i], osc_file.freq_khz)[0]
+        assert np.isclose(index["rms"][i], np.sqrt(np.mean(frame ** 2)), rtol=1e-5)
+        assert np.isclose(index["kurtosis"][i], metrics["kurtosis"], rtol=1e-4)
+        assert np.isclose(index["dominant_kHz"][i], metrics["dominant_kHz"], rtol=1e-5)
+
+
+def test_index_rejected_after_size_change(osc_files):
+    path, osc_file = osc_files(num_osc=5, length=128)
+    config = load_ach_config()
+    build_osc_index(path, config, osc_file=osc_file)
+    assert load_osc_index(path, config) is not None
+
+    os.utime(path, ns=(1, 1))
+    assert load_osc_index(path, config) is not None
+
+    with open(path, "ab") as f:
+        f.write(b"x")
+    assert load_osc_index(path, config) is None
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+
+from osc_store import AegisOscReader, convert_osc_to_store, open_osc_reader, open_osc_store
+
+
+def test_convert_round_trip_variable_length(osc_files):
+    path, osc_file = osc_files(num_osc=37, length=300, variable_length=True)
+    store = convert_osc_to_store(path, osc_file=osc_file, block_size=10)
+
+    assert store.num_osc == 37
+    for i in range(37):
+        np.testing.assert_array_equal(store.frame(i), osc_file._frame(i))
+    np.testing.assert_array_equal(store.K_mkV, osc_file.k_mkV)
+    np.testing.assert_array_equal(store.freq_kHz, np.full(37, osc_file.freq_khz))
+    np.testing.assert_array_equal(store.lengths(0, 37), osc_file.lengths)
+
+    samples, k_mkV, freq = store.read_block(5, 20)
+    expected, _, _ = AegisOscReader(osc_file).read_block(5, 20)
+    np.testing.assert_array_equal(samples, expected)
+    np.testing.assert_array_equal(k_mkV, osc_file.k_mkV[5:20])
+
+
+def test_aegis_reader_lengths(osc_files):
+    _, osc_file = osc_files(num_osc=20, length=256, variable_length=True)
+    reader = AegisOscReader(osc_file)
+    samples, _, _ = reader.read_block(3, 15)
+    lengths = reader.lengths(3, 15)
+    np.testing.assert_array_equal(lengths, osc_file.lengths[3:15])
+    assert samples.shape[1] == lengths.max()
+    # Длины другого диапазона читаются из файла
+    np.testing.assert_array_equal(reader.lengths(0, 4), osc_file.lengths[0:4])
+
+
+def test_store_used_only_for_unchanged_file(osc_files):
+    path, osc_file = osc_files(num_osc=10, length=128)
+    convert_osc_to_store(path, osc_file=osc_file)
+    assert open_osc_store(path) is not None
+    assert open_osc_reader(path).__class__.__name__ == "OscStore"
+
+    # Копирование меняет время изменения, но не содержимое
+    os.utime(path, ns=(1, 1))
+    assert open_osc_store(path) is not None
+
+    with open(path, "ab") as f:
+        f.write(b"x")
+    assert open_osc_store(path) is None
+    assert isinstance(open_osc_reader(path), AegisOscReader)
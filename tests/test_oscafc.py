@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from oscafc import run_batch
+
+
+def test_batch_writes_row_per_frame(osc_files, tmp_path):
+    path, _ = osc_files(num_osc=7, length=512, variable_length=True)
+    out = str(tmp_path / "ach.npz")
+    assert run_batch(path, out, chunk_size=3, verbose=False)["num_osc"] == 7
+    with np.load(out) as result:
+        assert len(result["Sabs"]) == 7
+
+
+def test_batch_rejects_empty_file(osc_files, tmp_path):
+    path, _ = osc_files(num_osc=0)
+    out = tmp_path / "ach.csv"
+    with pytest.raises(ValueError, match="нет осциллограмм"):
+        run_batch(path, str(out), verbose=False)
+    assert not out.exists()
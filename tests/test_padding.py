@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from padding import TAIL_SHARE, pad_block
+
+
+@pytest.fixture
+def rows():
+    """Блок из строк разной длины, дополненных нулями, и их длины."""
+    rng = np.random.default_rng(0)
+    lengths = np.array([50, 80, 64, 33])
+    block = np.zeros((4, 80))
+    for i, length in enumerate(lengths):
+        block[i, :length] = rng.normal(5.0, 2.0, size=length)
+    return block, lengths
+
+
+@pytest.mark.parametrize("mode", ["zero", "reflect"])
+def test_matches_np_pad(rows, mode):
+    block, lengths = rows
+    out = pad_block(block, 200, mode, lengths=lengths)
+    for i, length in enumerate(lengths):
+        expected = np.pad(block[i, :length], (0, 200 - length), mode="constant" if mode == "zero" else mode)
+        np.testing.assert_allclose(out[i], expected)
+
+
+def test_noise_follows_tail_statistics(rows):
+    block, lengths = rows
+    out = pad_block(block, 20000, "noise", lengths=lengths, rng=np.random.default_rng(1))
+    for i, length in enumerate(lengths):
+        np.testing.assert_array_equal(out[i, :length], block[i, :length])
+        tail = block[i, int(round(length * (1 - TAIL_SHARE))):length]
+        fill = out[i, length:]
+        assert fill.mean() == pytest.approx(tail.mean(), abs=0.1)
+        assert fill.std() == pytest.approx(tail.std(), rel=0.05)
+
+
+def test_noise_is_reproducible(rows):
+    block, lengths = rows
+    a = pad_block(block, 120, "noise", lengths=lengths, seed=3)
+    b = pad_block(block, 120, "noise", lengths=lengths, seed=3)
+    np.testing.assert_array_equal(a, b)
+
+
+def test_truncates_long_rows_into_out(rows):
+    block, lengths = rows
+    out = np.full((4, 40), -1.0, dtype=np.float32)
+    pad_block(block, 40, "reflect", lengths=lengths, out=out)
+    for i, length in enumerate(lengths):
+        expected = np.pad(block[i, :length], (0, max(0, 40 - length)), mode="reflect")[:40]
+        np.testing.assert_allclose(out[i], expected.astype(np.float32))
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        pad_block(np.zeros((1, 4)), 8, "edge")
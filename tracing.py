@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Трассировка горячих участков (чтение осциллограмм, дБ, БПФ, АЧХ, отрисовка).
+
+Пример:
+    import tracing
+
+    with tracing.span("read_block", start=start):
+        ...
+
+    @tracing.traced("calc_ach_batch")
+    def calc_ach_batch(...):
+        ...
+
+    tracing.enable()
+    ...
+    tracing.write_chrome_trace("trace.json")   # открыть в chrome://tracing или ui.perfetto.dev
+    tracing.summary()                          # {участок: {count, total_ms, p50_ms, ..., histogram}}
+
+Пока трассировка выключена, span() возвращает общий пустой контекст, а функции
+с @traced вызываются напрямую — стоимость сводится к проверке одного флага.
+Включённая трассировка хранит последние MAX_EVENTS событий в памяти.
+
+Трассировку можно включить переменной окружения OSCAFC_TRACE=<файл.json>:
+при завершении программы в файл записывается трасса, а рядом (<файл>.summary.json) —
+сводка по участкам.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Optional
+
+import numpy as np
+
+
+# Сколько последних событий хранится при включённой трассировке
+MAX_EVENTS = 1_000_000
+# Границы столбцов гистограммы длительностей, мс (последний столбец — всё, что больше)
+HISTOGRAM_EDGES_MS = (0.01, 0.03, 0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000)
+
+_enabled = False
+# События: (имя, начало в нс, длительность в нс, идентификатор потока, аргументы)
+_events = deque(maxlen=MAX_EVENTS)
+_thread_names: dict[int, str] = {}
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name: str, args: Optional[dict]):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        tid = threading.get_ident()
+        if tid not in _thread_names:
+            _thread_names[tid] = threading.current_thread().name
+        # deque.append потокобезопасен
+        _events.append((self.name, self.start, end - self.start, tid, self.args))
+        return False
+
+
+def span(name: str, **args):
+    """Контекстный менеджер: участок name (args попадают в трассу)."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args or None)
+
+
+def traced(name: Optional[str] = None):
+    """Декоратор: каждый вызов функции записывается как участок name (по умолчанию — имя функции)."""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(span_name, None):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def enable(max_events: int = MAX_EVENTS) -> None:
+    """Включает трассировку (накопленные ранее события сохраняются)."""
+    global _enabled, _events
+    if _events.maxlen != max_events:
+        _events = deque(_events, maxlen=max_events)
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def clear() -> None:
+    _events.clear()
+
+
+def events() -> list:
+    """Снимок накопленных событий."""
+    return list(_events)
+
+
+def chrome_trace(events_list: Optional[list] = None) -> dict:
+    """Трасса в формате Trace Event (Chrome / Perfetto): события "X" с временем в мкс."""
+    events_list = events() if events_list is None else events_list
+    pid = os.getpid()
+    trace = [
+        {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+        for tid, name in list(_thread_names.items())
+    ]
+    for name, start, duration, tid, args in events_list:
+        event = {"name": name, "ph": "X", "pid": pid, "tid": tid, "ts": start / 1000.0, "dur": duration / 1000.0}
+        if args:
+            event["args"] = {key: value if isinstance(value, (int, float, str, bool)) else str(value)
+                             for key, value in args.items()}
+        trace.append(event)
+    return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+
+def summary(events_list: Optional[list] = None) -> dict:
+    """
+    Сводка по участкам, мс: {имя: {count, total_ms, mean_ms, p50_ms, p95_ms, p99_ms, max_ms,
+    histogram}}; histogram — число вызовов в столбцах с границами HISTOGRAM_EDGES_MS.
+    """
+    events_list = events() if events_list is None else events_list
+    durations: dict[str, list] = {}
+    for name, _, duration, _, _ in events_list:
+        durations.setdefault(name, []).append(duration)
+    result = {}
+    for name, values in durations.items():
+        ms = np.asarray(values, dtype=np.float64) / 1e6
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        counts = np.bincount(np.searchsorted(HISTOGRAM_EDGES_MS, ms, side="right"),
+                             minlength=len(HISTOGRAM_EDGES_MS) + 1)
+        result[name] = {
+            "count": len(ms), "total_ms": float(ms.sum()), "mean_ms": float(ms.mean()),
+            "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99), "max_ms": float(ms.max()),
+            "histogram": {"edges_ms": list(HISTOGRAM_EDGES_MS), "counts": counts.tolist()},
+        }
+    return result
+
+
+def write_chrome_trace(path: str) -> None:
+    """Записывает трассу (path) и сводку по участкам (<path без .json>.summary.json)."""
+    events_list = events()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(events_list), f)
+    summary_path = os.path.splitext(path)[0] + ".summary.json"
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary(events_list), f, ensure_ascii=False, indent=2)
+
+
+def _enable_from_env() -> None:
+    path = os.environ.get("OSCAFC_TRACE")
+    if not path:
+        return
+    enable()
+    atexit.register(lambda: _events and write_chrome_trace(path))
+
+
+_enable_from_env()
@@ -1,19 +1,17 @@
-import math
-import random
-from collections import Counter
-from typing import Any, List
+import threading
+from typing import Iterator
 
-from numba import njit
+from numba import njit, prange
 
 import numpy as np
-from numpy.fft import ifft, fft
 
-import Aegis_osc
+import tracing
+from padding import pad_block
+from Fourier import Fourier, dominant_frequencies
+from jit_cache import NUMBA_CACHE
 
-from Fourier import Fourier, four2
 
-
-@njit
+@njit(cache=NUMBA_CACHE)
 def get_dB_osc(signal: np.ndarray, k_mkV: np.float64) -> float:
     """Метод рассчитывает Децибелы для осциллограммы"""
     maximum = np.max(np.abs(signal))  # Используем np.max и np.abs для работы с ndarray
@@ -22,208 +20,371 @@ def get_dB_osc(signal: np.ndarray, k_mkV: np.float64) -> float:
     return res
 
 
-@njit
+@tracing.traced()
+def get_dB_block(osc_block: np.ndarray, k_mkV: np.ndarray) -> np.ndarray:
+    """Рассчитывает Децибелы сразу для блока осциллограмм [N, L] (как get_dB_osc для каждой строки)"""
+    # max|x| через max и min, чтобы не переполнять целые типы (abs(-32768) в int16)
+    peak = np.maximum(np.max(osc_block, axis=1).astype(np.float64), -np.min(osc_block, axis=1).astype(np.float64))
+    with np.errstate(divide="ignore"):
+        dB = np.round(20 * np.log10(peak * np.asarray(k_mkV, dtype=np.float64)))
+    return np.where(np.isfinite(dB), dB, 0).astype(np.int32)
+
+
+# Метрики осциллограммы, рассчитываемые frame_metrics
+FRAME_METRICS_DTYPE = np.dtype([
+    ("dB", np.int32),
+    ("peak", np.float64),
+    ("peak_index", np.int32),
+    ("rms", np.float64),
+    ("energy", np.float64),
+    ("mean", np.float64),
+    ("std_dev", np.float64),
+    ("variance", np.float64),
+    ("min_val", np.float64),
+    ("max_val", np.float64),
+    ("kurtosis", np.float64),
+    ("dominant_kHz", np.float64),
+])
+
+
+# Параллельные ядра numba (слой потоков workqueue) нельзя запускать одновременно
+# из нескольких потоков (интерфейс и фоновое построение индекса)
+_PARALLEL_KERNEL_LOCK = threading.Lock()
+
+
+@njit(parallel=True, cache=NUMBA_CACHE)
+def _frame_metrics_kernel(block, lengths, k_mkV, dB, peak, peak_index, mean, variance,
+                          min_val, max_val, energy, kurtosis):
+    """
+    Метрики всех осциллограмм блока за один проход по отсчётам каждой осциллограммы.
+    Центральные моменты 2-4 порядка накапливаются онлайн (формулы Террибери),
+    осциллограммы обрабатываются параллельно.
+    """
+    for i in prange(block.shape[0]):
+        n = lengths[i]
+        m1 = 0.0
+        m2 = 0.0
+        m3 = 0.0
+        m4 = 0.0
+        e = 0.0
+        lo = np.inf
+        hi = -np.inf
+        pk = 0.0
+        pk_index = 0
+        for j in range(n):
+            x = float(block[i, j])
+            k = j + 1.0
+            delta = x - m1
+            delta_n = delta / k
+            delta_n2 = delta_n * delta_n
+            term1 = delta * delta_n * (k - 1.0)
+            m1 += delta_n
+            m4 += term1 * delta_n2 * (k * k - 3.0 * k + 3.0) + 6.0 * delta_n2 * m2 - 4.0 * delta_n * m3
+            m3 += term1 * delta_n * (k - 2.0) - 3.0 * delta_n * m2
+            m2 += term1
+            e += x * x
+            if x < lo:
+                lo = x
+            if x > hi:
+                hi = x
+            if abs(x) > pk:
+                pk = abs(x)
+                pk_index = j
+
+        var = m2 / n if n > 0 else 0.0
+        mean[i] = m1
+        variance[i] = var
+        min_val[i] = lo if n > 0 else 0.0
+        max_val[i] = hi if n > 0 else 0.0
+        energy[i] = e
+        kurtosis[i] = (m4 / n) / (var * var) if var > 0 else np.nan
+        peak[i] = pk
+        peak_index[i] = pk_index
+        level = pk * k_mkV[i]
+        dB[i] = np.int32(np.rint(20 * np.log10(level))) if level > 0 else 0
+
+
+@tracing.traced()
+def frame_metrics(osc_block: np.ndarray, k_mkV, freq_khz=1000, lengths=None,
+                  spectral: bool = True) -> np.ndarray:
+    """
+    Рассчитывает метрики для каждой осциллограммы блока [N, L] (параллельно, один проход по данным).
+
+    Параметры:
+    * osc_block - осциллограммы в ед. АЦП [N, L]
+    * k_mkV - коэффициенты АЦП -> мкВ [N] (или одно число)
+    * freq_khz - частоты дискретизации в кГц [N] (или одно число)
+    * lengths - длины осциллограмм [N], если в блоке они дополнены нулями (по умолчанию — L)
+    * spectral - рассчитывать ли доминирующую частоту спектра (один rFFT на блок)
+
+    Возвращает структурированный массив [N] с полями FRAME_METRICS_DTYPE:
+    dB, peak, peak_index, rms, energy, mean, std_dev, variance, min_val, max_val,
+    kurtosis, dominant_kHz (NaN, если spectral=False)
+    """
+    block = np.ascontiguousarray(osc_block)
+    if block.ndim == 1:
+        block = block[None, :]
+    n_osc = block.shape[0]
+    if lengths is None:
+        lengths = np.full(n_osc, block.shape[1], dtype=np.int64)
+    else:
+        lengths = np.minimum(np.asarray(lengths, dtype=np.int64), block.shape[1])
+    k_mkV = np.ascontiguousarray(np.broadcast_to(np.asarray(k_mkV, dtype=np.float64), (n_osc,)))
+
+    result = np.zeros(n_osc, dtype=FRAME_METRICS_DTYPE)
+    cols = {name: np.zeros(n_osc, dtype=FRAME_METRICS_DTYPE[name]) for name in FRAME_METRICS_DTYPE.names}
+    with _PARALLEL_KERNEL_LOCK:
+        _frame_metrics_kernel(block, lengths, k_mkV, cols["dB"], cols["peak"], cols["peak_index"],
+                              cols["mean"], cols["variance"], cols["min_val"], cols["max_val"],
+                              cols["energy"], cols["kurtosis"])
+    cols["std_dev"] = np.sqrt(cols["variance"])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cols["rms"] = np.sqrt(cols["energy"] / np.maximum(lengths, 1))
+    if spectral and block.shape[1] > 0:
+        cols["dominant_kHz"] = dominant_frequencies(block, freq_khz, lengths)
+    else:
+        cols["dominant_kHz"][:] = np.nan
+    for name in FRAME_METRICS_DTYPE.names:
+        result[name] = cols[name]
+    return result
+
+
+def get_freq_khz(osc_file, start: int, end: int, default: float = 1000) -> np.ndarray:
+    """Частоты дискретизации (кГц) осциллограмм [start, end); default — если в файле частота не указана"""
+    freq_vec = np.empty(end - start, dtype=np.float64)
+    for i in range(start, end):
+        try:
+            freq_vec[i - start] = osc_file.oscDefMod[i].freq
+        except (AttributeError, IndexError):
+            freq_vec[i - start] = default
+    return freq_vec
+
+
+def osc_rows_to_block(rows, dtype=np.float64) -> np.ndarray:
+    """
+    Собирает список осциллограмм (как из getDotsOSC) в 2D массив [N, L] типа dtype
+    (dtype=None — тип определяется по данным).
+    Осциллограммы разной длины дополняются нулями до максимальной длины блока
+    (на спектр с дополнением нулями и на максимум сигнала это не влияет) —
+    вместо массива объектов, который получился бы из np.array.
+    """
+    lengths = [len(row) for row in rows]
+    max_len = max(lengths) if lengths else 0
+    if all(length == max_len for length in lengths):
+        return np.asarray(rows, dtype=dtype).reshape(len(rows), max_len)
+    if dtype is None:
+        dtype = np.result_type(*[np.asarray(row).dtype for row in rows])
+    block = np.zeros((len(rows), max_len), dtype=dtype)
+    for i, row in enumerate(rows):
+        block[i, :lengths[i]] = row
+    return block
+
+
 def fill_dataset_for_normal_rule_fourier(signal: np.ndarray, target_len: int) -> np.ndarray:
     """
     метод, добавляющий в конец сигнала значения, построенные на мат.статистике
     последних 30% значений оциллограммы, чтобы максимально
-    не отличаться по внешнему виду от изначального сигнала
+    не отличаться по внешнему виду от изначального сигнала (см. padding.pad_block, режим "noise")
     """
-    signal = np.asarray(signal, dtype=np.float64)
-    if len(signal) >= target_len:
-        return signal[:target_len]
+    return pad_block(np.asarray(signal, dtype=np.float64), target_len, "noise")[0]
 
-    current_length = len(signal)
 
-    # Инициализация дополненного массива
-    padded_signal = np.zeros(target_len, dtype=np.float64)
-    padded_signal[:current_length] = signal.copy()
+class DataOsc:
+    def __init__(self, file_name: str):
+        if len(file_name) == 0:
+            return
 
-    # Генерируем шум на основе статистики сигнала
-    mean = np.mean(signal[round(len(signal) * 0.7):])
-    std = np.std(signal[round(len(signal) * 0.7):])
-    noise = np.random.normal(loc=mean, scale=std, size=target_len - current_length)
+    @staticmethod
+    def iter_blocks(file_name: str, block_size: int = 500,
+                    category: str = "") -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Генератор блоков осциллограмм .osc файла — файл читается по block_size осциллограмм,
+        в памяти одновременно находится только один блок.
 
-    # Добавляем шум к оставшейся части массива
-    padded_signal[current_length:] = noise
+        Параметры:
+        * file_name - имя .osc файла
+        * block_size - количество осциллограмм в блоке
+        * category - категория, к которой относятся все осциллограммы из файла
 
-    # Переходим в частотную область, чтобы сгладить переход
-    spectr = four2(padded_signal)
-    spectrum_padded = np.array([i / (len(spectr) / 2 / 500) for i in range(round(len(spectr) / 2))])
+        Выдаёт кортежи NumPy массивов:
+            1) осциллограммы [N, L] (осциллограммы разной длины дополнены нулями до длины блока)
+            2) K_mkV [N]
+            3) децибелы [N]
+            4) категории [N]
+            5) длины осциллограмм [N] (действительные отсчёты строк 1)
+        """
+        # Импорт здесь: osc_store сам использует функции этого модуля
+        from osc_store import open_osc_reader
 
-    # Применяем обратное преобразование Фурье для получения дополненного сигнала
-    spectr = four2(spectrum_padded, d=1)
-    from_spectr = np.array([i / (len(spectr) / 2 / 500) for i in range(round(len(spectr) / 2))])
-    from_spectr[:current_length] = signal
-    return from_spectr[:target_len]
+        reader = open_osc_reader(file_name)
+        for start in range(0, reader.num_osc, block_size):
+            end = min(start + block_size, reader.num_osc)
+            samples, K_mkV, _ = reader.read_block(start, end)
+            samples, K_mkV = np.asarray(samples), np.asarray(K_mkV, dtype=np.float64)
+            yield (samples, K_mkV, get_dB_block(samples, K_mkV), np.full(end - start, category),
+                   np.asarray(reader.lengths(start, end), dtype=np.int64))
 
+    @staticmethod
+    def iter_files_blocks(list_osc: list, csv_categories: list,
+                          block_size: int = 500) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Генератор блоков осциллограмм из нескольких .osc файлов подряд
+        (файл list_osc[i] относится к категории csv_categories[i]).
+        Выдаёт те же кортежи, что и iter_blocks.
+        """
+        for file_name, category in zip(list_osc, csv_categories):
+            yield from DataOsc.iter_blocks(file_name, block_size, category)
 
-class DataOsc:
-    def __init__(self, file_name: str):
-        if len(file_name) == 0:
-            return
+    @staticmethod
+    def _block_rows(samples: np.ndarray, lengths: np.ndarray, rows=None) -> list:
+        """
+        Строки блока (или только строки rows) отдельными массивами своей длины.
+        Строки копируются, чтобы не удерживать в памяти весь блок.
+        """
+        if rows is None:
+            rows = range(len(samples))
+        return [samples[i, :lengths[i]].copy() for i in rows]
 
     @staticmethod
-    def get_data_from_osc_file(file_name: str, category: str) -> (list[list[int]], list[str], list[int]):
+    def get_data_from_osc_file(file_name: str, category: str) -> (list[np.ndarray], list[str], list[int]):
         """
         Параметры:
         * file_name - имя .osc файла
         * category - категория, к которой относятся все осциллограммы из файла
 
         Возвращает списки из .osc файла с именем file_name:
-            1) список осциллограмм
+            1) список осциллограмм (каждая своей длины)
             2) список категорий осциллограамм
             3) список децибел
+            4) список K_mkV
         """
         categories = []
         data_oscs = []
         k_mkV_list = []
         dB_list = []
-        osc_file = Aegis_osc.File_osc(file_name)
-        num_osc = osc_file.sdoHdr.NumOSC
-        list_osc_data = osc_file.getDotsOSC(0, num_osc)
-        for i in range(num_osc):
-            categories.append(category)
-            data_oscs.append(list_osc_data[i])
-            k_mkV_list.append(osc_file.oscDefMod[i].K_mkV)
-            dB_list.append(get_dB_osc(np.array(list_osc_data[i]),
-                                      np.float64(k_mkV_list[len(k_mkV_list) - 1])))
+        for samples, K_mkV, dB, cats, lengths in DataOsc.iter_blocks(file_name, category=category):
+            data_oscs.extend(DataOsc._block_rows(samples, lengths))
+            k_mkV_list.extend(K_mkV.tolist())
+            dB_list.extend(dB.tolist())
+            categories.extend(cats.tolist())
         return data_oscs, categories, dB_list, k_mkV_list
 
     @staticmethod
     def create_datasets_with_osc(list_osc: list
                                  , csv_categories: list
-                                 , augment: bool = False) -> (list[list], list[str], list[int]):
+                                 , augment: bool = False
+                                 , seed: int | None = None
+                                 , block_size: int = 500) -> (list[np.ndarray], list[str], list[int]):
         """
         Возвращает кортеж списаков:
-            1. осциллограммы
+            1. осциллограммы (каждая своей длины)
             2. категории осциллограмм
             3. значения децибелл
+
+        Баланс классов — dataset_builder.balance_indices (по массивам индексов): класс с долей
+        не меньше 40% прореживается до 20%, при augment классы с долей меньше 20% дополняются
+        до 20% копиями своих осциллограмм со сдвигом по времени. Строки выбираются по числу
+        осциллограмм в файлах до чтения данных, поэтому в памяти хранятся только осциллограммы
+        результата, а из файлов читаются только участки блоков по block_size осциллограмм,
+        содержащие выбранные строки. Для больших наборов файлов используйте dataset_builder.build_dataset
+        (параллельное чтение, матрица на диске).
         """
-        data_oscs = []
-        categories = []
-        dB_list = []
-        k_mkV_list = []
-        # цикл для заполнения списков значениями осциллограмм и категорий
-        for ind, file_name in enumerate(list_osc):
-            data_oscs_loc, categories_loc, dB_list_loc, k_mkV_list_loc = DataOsc.get_data_from_osc_file(file_name, csv_categories[ind])
-            data_oscs.extend(data_oscs_loc)
-            categories.extend(categories_loc)
-            dB_list.extend(dB_list_loc)
-            k_mkV_list.extend(k_mkV_list_loc)
-
-        # цикл для подсчёта кол-ва данных, относящихся к одной категории
-        counts = Counter(categories)
-        delete_el: list[list] = []
-        add_el: list[list] = []
-        for name in counts:
-            part_of_all = counts[name] / len(categories)
-            # если данных одной категории слишком много,
-            # то запоминаем какой класс нужно уменьшить
-            if part_of_all >= 0.4:
-                delete_el.append([name, len(categories) * 0.2])
-                continue
-
-            if augment and part_of_all < 0.2:
-                add_el.append([name, len(categories) * 0.2])
-
-        # Увеличиваем выборку путём аугментации, если необходимо
-        if len(add_el) != 0:
-            length_cat = len(categories)
-            for a in add_el:
-                count_add = a[1] - counts[a[0]]
-                for i in range(length_cat):
-                    if count_add > 1 and categories[i] == a[0]:
-                        new_osc = DataOsc.augmentation_on_time_cycle(data_oscs[i])
-                        k_mkV_list.append(k_mkV_list[i])
-                        data_oscs.append(new_osc)
-                        categories.append(a[0])
-                        dB_list.append(get_dB_osc(np.array(new_osc), np.float64(k_mkV_list[i])))
-                        count_add -= 1
-                    elif count_add <= 0:
-                        break
-
-        # уменьшаем выборку, если это необходимо
-        if len(delete_el) != 0:
-            for d in delete_el:
-                for i in range(len(categories) - 1, -1, -1):
-                    if d[1] <= counts[d[0]] and categories[i] == d[0]:
-                        categories.pop(i)
-                        data_oscs.pop(i)
-                        dB_list.pop(i)
-                        counts[d[0]] -= 1
-                    elif d[1] > counts[d[0]]:
-                        break
-        return data_oscs, categories, dB_list
+        from dataset_builder import AUGMENT_SHIFT, balance_indices
+        from osc_store import open_osc_reader
+
+        files = list(zip(list_osc, csv_categories))
+        readers = [open_osc_reader(file_name) for file_name, _ in files]
+        counts = [reader.num_osc for reader in readers]
+        categories = np.repeat(np.asarray([category for _, category in files]), counts)
+        if not len(categories):
+            return [], [], []
+
+        rng = np.random.default_rng(seed)
+        _, codes = np.unique(categories, return_inverse=True)
+        indices, repeated = balance_indices(codes, rng, augment)
+        shifts = rng.integers(AUGMENT_SHIFT[0], AUGMENT_SHIFT[1] + 1, size=len(indices))
+
+        # из каждого блока файла читается только участок от первой до последней выбранной строки,
+        # блоки без выбранных строк не читаются
+        selected = np.unique(indices)
+        oscs = {}
+        dB_all = np.zeros(len(categories), dtype=np.int32)
+        offset = 0
+        for reader in readers:
+            first, last = np.searchsorted(selected, [offset, offset + reader.num_osc])
+            rows = selected[first:last] - offset
+            for block_rows in np.split(rows, np.flatnonzero(np.diff(rows // block_size)) + 1):
+                if not len(block_rows):
+                    continue
+                start, end = int(block_rows[0]), int(block_rows[-1]) + 1
+                samples, K_mkV, _ = reader.read_block(start, end)
+                samples, K_mkV = np.asarray(samples), np.asarray(K_mkV, dtype=np.float64)
+                local = (block_rows - start).tolist()
+                dB_all[offset + block_rows] = get_dB_block(samples[local], K_mkV[local])
+                rows_data = DataOsc._block_rows(samples, np.asarray(reader.lengths(start, end)), local)
+                for i, osc in zip(block_rows.tolist(), rows_data):
+                    oscs[offset + i] = osc
+            offset += reader.num_osc
+
+        # Сдвиг по времени не меняет максимум модуля сигнала, поэтому дБ копий те же
+        result_oscs = [oscs[i] for i in indices.tolist()]
+        rep = np.flatnonzero(repeated)
+        shifted = DataOsc._shift_rows([result_oscs[i] for i in rep.tolist()], shifts[rep], "cycle")
+        for i, osc in zip(rep.tolist(), shifted):
+            result_oscs[i] = osc
+        return result_oscs, categories[indices].tolist(), dB_all[indices].tolist()
 
     @staticmethod
-    def augmentation_on_time_cycle(list_osc: list) -> list:
-        augm_list = []
-        for osc in list_osc:
-            augm_list.append(np.roll(osc, random.randint(5, 50)))
-        return augm_list
+    def augmentation_on_time_cycle(list_osc: list, seed=None) -> list:
+        """Циклический сдвиг каждой осциллограммы на случайное число отсчётов (AUGMENT_SHIFT)."""
+        return DataOsc._augmentation_shift(list_osc, "cycle", seed)
 
     @staticmethod
-    def augmentation_on_time(list_osc: list) -> list:
-        augm_list = []
-        for osc in list_osc:
-            shift = random.randint(5, 50)
-            augm_list.append(np.roll(osc, shift))
-            augm_list[-1][:shift] = 0
-        return augm_list
+    def augmentation_on_time(list_osc: list, seed=None) -> list:
+        """Сдвиг каждой осциллограммы на случайное число отсчётов с заполнением начала нулями."""
+        return DataOsc._augmentation_shift(list_osc, "zero", seed)
 
     @staticmethod
-    def fill_dataset_for_nulls(signal: list, target_len: int) -> list:
-        """метод, добавляющий нули в конец датасета до определённой длины"""
-        if len(signal) >= target_len:
-            return signal[:target_len]
+    def _augmentation_shift(list_osc: list, mode: str, seed=None) -> list:
+        from dataset_builder import AUGMENT_SHIFT
 
-        fill_len = target_len - len(signal)
-        signal.extend([0 for _ in range(fill_len)])
-        return signal
+        rng = np.random.default_rng(seed)
+        shifts = rng.integers(AUGMENT_SHIFT[0], AUGMENT_SHIFT[1] + 1, size=len(list_osc))
+        return DataOsc._shift_rows(list_osc, shifts, mode)
 
     @staticmethod
-    def fill_dataset_for_normal_rule_fft(signal: list, target_len: int) -> list | np.ndarray:
+    def _shift_rows(list_osc: list, shifts: np.ndarray, mode: str) -> list:
+        """Сдвиг осциллограмм (разной длины) на shifts отсчётов одной выборкой по индексам."""
+        from augmentation import shift_block
+
+        if not len(list_osc):
+            return []
+        lengths = np.fromiter((len(osc) for osc in list_osc), dtype=np.int64, count=len(list_osc))
+        block = shift_block(osc_rows_to_block(list_osc, dtype=None), shifts, mode, lengths)
+        return [row[:length] for row, length in zip(block, lengths.tolist())]
+
+    @staticmethod
+    def fill_dataset_for_nulls(signal: list, target_len: int) -> np.ndarray:
+        """метод, добавляющий нули в конец датасета до определённой длины"""
+        return pad_block(np.asarray(signal), target_len, "zero")[0]
+
+    @staticmethod
+    def fill_dataset_for_normal_rule_fft(signal: list, target_len: int) -> np.ndarray:
         """
         метод, добавляющий в конец сигнала значения, построенные на мат.статистике
         последних 30% значений оциллограммы, чтобы максимально
         не отличаться по внешнему виду от изначального сигнала
         """
-        if len(signal) >= target_len:
-            return signal[:target_len]
-
-        current_length = len(signal)
-
-        # Инициализация дополненного массива
-        padded_signal = np.zeros(target_len)
-        padded_signal[:current_length] = signal.copy()
-
-        # Генерируем шум на основе статистики сигнала
-        mean = np.mean(signal[round(len(signal) * 0.7):])
-        std = np.std(signal[round(len(signal) * 0.7):])
-        noise = np.random.normal(loc=mean, scale=std, size=target_len - current_length)
-
-        # Добавляем шум к оставшейся части массива
-        padded_signal[current_length:] = noise
-
-        # Переходим в частотную область, чтобы сгладить переход
-        spectrum_padded = fft(padded_signal)
-
-        # Применяем обратное преобразование Фурье для получения дополненного сигнала
-        from_spectr = list(np.real(ifft(spectrum_padded)))
-        from_spectr[:current_length] = signal
-        return from_spectr
+        return pad_block(np.asarray(signal), target_len, "noise")[0]
 
     @staticmethod
     def get_math_features(signal: list) -> dict:
         """метод считает характеристики мат. статистики для сигнала"""
         # Получаем значения из мат. статистики, которые могут помочь
-        # в обучении нейронной сети
-        features = {"mean": np.mean(signal), "std_dev": np.std(signal), "variance": np.var(signal),
-                    "min_val": np.min(signal), "max_val": np.max(signal)}
-        features["kurtosis"] = np.mean((signal - features["mean"]) ** 4) / (features["std_dev"] ** 4)
-        features["energy"] = np.sum([i ** 2 for i in signal])
-        return features
+        # в обучении нейронной сети (один проход по сигналу, см. frame_metrics)
+        metrics = frame_metrics(np.asarray(signal)[None, :], 1.0, spectral=False)[0]
+        return {name: float(metrics[name])
+                for name in ("mean", "std_dev", "variance", "min_val", "max_val", "kurtosis", "energy")}
 
     @staticmethod
     def get_spectr(signal: list) -> list: